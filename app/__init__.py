@@ -1,71 +1,104 @@
+import json
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.openapi.utils import get_openapi
+from app import api_schema
 from app.api.v1 import apiv1_router
+from app.core import deadline, metrics
+from app.core.admission import AdmissionMiddleware
 from app.core.config import settings
-from app.db.base import Base, async_engine
+from app.db.base import (
+    AsyncSessionLocal,
+    Base,
+    async_engine,
+    is_in_memory,
+)
+from app.workers import BackgroundWorker
+from app.workers.activity_listener import ActivityBroadcaster, asyncpg_dsn
+from app.workers.archiver import ActivityArchiver
+from app.workers.outbox import OutboxDispatcher, build_sinks
+from app.workers.rate_limits import RateLimitPurger
+from app.workers.reminders import TaskReminderScheduler
+from app.workers.revocations import RevocationPurger
+
+
+def build_workers(app: FastAPI) -> list[BackgroundWorker]:
+    """Background workers enabled in `Settings`."""
+    workers: list[BackgroundWorker] = []
+    if settings.OUTBOX_ENABLED:
+        dispatcher = OutboxDispatcher(AsyncSessionLocal, build_sinks())
+        metrics.register("outbox", dispatcher.stats)
+        workers.append(dispatcher)
+    if (
+        settings.ACTIVITY_STREAM_ENABLED
+        and async_engine.dialect.name == "postgresql"
+    ):
+        broadcaster = ActivityBroadcaster(
+            AsyncSessionLocal, asyncpg_dsn(settings.DATABASE_URL)
+        )
+        metrics.register("activity_stream", broadcaster.stats)
+        app.state.activity_broadcaster = broadcaster
+        workers.append(broadcaster)
+    if settings.TASK_REMINDERS_ENABLED:
+        reminders = TaskReminderScheduler(AsyncSessionLocal)
+        metrics.register("task_reminders", reminders.stats)
+        workers.append(reminders)
+    if settings.ACTIVITY_ARCHIVE_ENABLED:
+        archiver = ActivityArchiver(AsyncSessionLocal)
+        metrics.register("activity_archive", archiver.stats)
+        workers.append(archiver)
+    if settings.REVOCATION_PURGE_ENABLED:
+        purger = RevocationPurger(AsyncSessionLocal)
+        metrics.register("revocation_purge", purger.stats)
+        workers.append(purger)
+    if settings.LOGIN_RATE_LIMIT_ENABLED and settings.LOGIN_RATE_SHARED:
+        counters = RateLimitPurger(AsyncSessionLocal)
+        metrics.register("login_rate_purge", counters.stats)
+        workers.append(counters)
+    return workers
 
 
 @asynccontextmanager  # type: ignore
 async def on_startup(app: FastAPI):
-    # Create database tables (for demo purposes).
-    # In production use Alembic migrations.
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Schema changes belong to `python -m app migrate`, not to every
+    # worker boot; create_all here is opt-in (demo / in-memory setups).
+    if settings.DB_CREATE_ALL_ON_STARTUP or is_in_memory(async_engine.url):
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    app.state.workers = build_workers(app)
+    for worker in app.state.workers:
+        worker.start()
     yield
+    # uvicorn runs this after in-flight requests drained (or the graceful
+    # timeout hit): stop background work, then close pooled connections
+    # cleanly instead of letting the process exit drop them
+    for worker in app.state.workers:
+        await worker.stop()
+    await async_engine.dispose()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     lifespan=on_startup,
-    swagger_ui_parameters={"persistAuthorization": True},
+    # served by app.api_schema: prebuilt artifact + ETag
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
 )
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+# outermost: time spent queued for admission counts against the deadline
+deadline.install(app)
 app.include_router(apiv1_router)
+api_schema.install(app, swagger_ui_parameters={"persistAuthorization": True})
 
 
 def custom_openapi():
+    # built (or read from the artifact) on first use, never at startup
     if app.openapi_schema:
         return app.openapi_schema
-    text = """
-    # Kuxnya-CRM API
-
-
-    Документация: все запросы проходят в контексте организации через заголовок
-    `X-Organization-Id`.
-
-
-    Auth flow:
-    - POST /api/v1/auth/register — регистрирует пользователя
-    и первую организацию
-    - POST /api/v1/auth/login — логин
-
-
-    Роли: owner, admin, manager, member — подробнее в описании сервиса.
-    """
-
-    openapi_schema = get_openapi(
-        title=settings.PROJECT_NAME,
-        version="1.0.0",
-        description=text,
-        routes=app.routes,
-    )
-
-    # добавляем security схемы
-    # openapi_schema.setdefault("components", {})
-    # openapi_schema["components"].setdefault("securitySchemes", {})
-
-    # openapi_schema["components"]["securitySchemes"]["BearerAuth"] = {
-    #     "type": "http",
-    #     "scheme": "bearer",
-    #     "bearerFormat": "JWT",
-    # }
-
-    # глобальная авторизация
-    # openapi_schema["security"] = [{"BearerAuth": []}]
-
-    app.openapi_schema = openapi_schema
+    app.openapi_schema = json.loads(api_schema.document(app)[0])
     return app.openapi_schema
 
 
-
 app.openapi = custom_openapi
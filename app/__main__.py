@@ -0,0 +1,305 @@
+"""
+Command line entry points:
+
+    python -m app migrate [--status]   alembic upgrade head
+    python -m app reminders [--once]   run the due-task reminder worker
+    python -m app partitions setup [--mode range|hash]
+    python -m app partitions maintain  pre-create / detach partitions
+    python -m app archive [--older-than-days N]  move old activities
+    python -m app fx-rates FILE [--org ID]  load FX rates (JSON / CSV)
+    python -m app startup-bench [--runs N]  measure worker cold start
+    python -m app openapi [--output PATH] [--check]  build the schema file
+    python -m app serve [--host H] [--port P] [--workers N]  run the API
+"""
+import argparse
+import asyncio
+import signal
+import statistics
+import subprocess
+import sys
+from datetime import timedelta
+from app.core.config import settings
+from app.db import migrations, partitioning
+from app.db.base import AsyncSessionLocal, async_engine
+from app.workers.archiver import ActivityArchiver
+from app.workers.reminders import TaskReminderScheduler
+
+
+async def run_migrate(status: bool):
+    try:
+        if status:
+            todo = await migrations.pending(async_engine)
+            for script in todo:
+                print(f"pending  {script.revision}  {script.doc}")
+            if not todo:
+                print("up to date")
+            return
+        for revision in await migrations.upgrade(async_engine):
+            print(f"applied  {revision}")
+    finally:
+        await async_engine.dispose()
+
+
+async def run_partitions(action: str, mode: str):
+    try:
+        async with async_engine.begin() as conn:
+            if action == "setup":
+                converted = await partitioning.convert(conn, mode)
+                print(
+                    f"activities converted to {mode} partitioning"
+                    if converted
+                    else "activities is already partitioned"
+                )
+                return
+            report = await partitioning.maintain(conn)
+            for name in report.created:
+                print(f"created   {name}")
+            for name in report.detached:
+                print(f"detached  {name}")
+    finally:
+        await async_engine.dispose()
+
+
+async def run_archive(older_than_days: int):
+    archiver = ActivityArchiver(
+        AsyncSessionLocal, after=timedelta(days=older_than_days)
+    )
+    try:
+        while await archiver.run_once() >= archiver.batch_size:
+            pass
+        print(f"archived {archiver.archived} activities")
+    finally:
+        await async_engine.dispose()
+
+
+async def run_fx_rates(path: str, org_id: int | None):
+    from fastapi import HTTPException
+    from app.services.fx_service import FxService, read_rates_file
+
+    try:
+        rates = read_rates_file(path)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"{path}: {exc}")
+    if settings.FX_BASE_CURRENCY in rates:
+        sys.exit(f"{path}: {settings.FX_BASE_CURRENCY} is the base currency")
+    try:
+        async with AsyncSessionLocal() as session, session.begin():
+            version, deals = await FxService(session).load(rates, org_id)
+    except HTTPException as exc:
+        sys.exit(f"{path}: {exc.detail}")
+    else:
+        print(
+            f"loaded {len(rates)} rates (version {version}), "
+            f"re-normalized {deals} deals"
+        )
+    finally:
+        await async_engine.dispose()
+
+
+async def run_reminders(once: bool):
+    scheduler = TaskReminderScheduler(AsyncSessionLocal)
+    try:
+        if once:
+            while await scheduler.run_once() >= scheduler.batch_size:
+                pass
+            return
+        loop = asyncio.get_running_loop()
+        scheduler.start()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(
+                sig, lambda: asyncio.ensure_future(scheduler.stop())
+            )
+        await scheduler.join()
+    finally:
+        await async_engine.dispose()
+
+
+# Runs in a fresh interpreter: import time of the app, then time to get
+# through the lifespan startup (what a worker does before it is ready).
+STARTUP_PROBE = """
+import asyncio, time
+t0 = time.perf_counter()
+from app import app
+t1 = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+print(t1 - t0, asyncio.run(boot()) - t1)
+"""
+
+
+def run_startup_bench(runs: int, top: int):
+    imports, startups = [], []
+    self_us: dict[str, list[int]] = {}
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_s, startup_s = map(float, proc.stdout.split()[-2:])
+        imports.append(import_s)
+        startups.append(startup_s)
+        # "import time: <self us> | <cumulative us> | <module>"
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            own, _, module = line[len("import time:"):].split("|")
+            self_us.setdefault(module.strip(), []).append(int(own))
+
+    print(
+        f"import app      median {statistics.median(imports):.3f}s"
+        f"  min {min(imports):.3f}s  ({runs} runs)"
+    )
+    print(
+        f"lifespan start  median {statistics.median(startups):.3f}s"
+        f"  min {min(startups):.3f}s"
+    )
+    print("slowest imports (self time, median ms):")
+    slowest = sorted(
+        self_us.items(), key=lambda kv: statistics.median(kv[1]), reverse=True
+    )
+    for module, samples in slowest[:top]:
+        print(f"  {statistics.median(samples) / 1000:8.1f}  {module}")
+
+
+def run_openapi(output: str | None, check: bool):
+    from pathlib import Path
+    from app import api_schema, app
+
+    path = Path(output) if output else api_schema.artifact_path()
+    body = api_schema.render(api_schema.generate(app))
+    if check:
+        if not path.is_file() or path.read_bytes() != body:
+            sys.exit(f"{path} is stale: run `python -m app openapi`")
+        print(f"{path} is up to date")
+        return
+    path.write_bytes(body)
+    print(f"wrote {path} ({len(body)} bytes)")
+
+
+def run_serve(host: str, port: int, workers: int):
+    """
+    uvicorn with the `SERVER_*` settings. On SIGTERM it stops accepting,
+    lets in-flight requests finish for up to SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+    then runs the lifespan shutdown (workers, connection pool).
+    """
+    import uvicorn
+
+    uvicorn.run(
+        "app:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        lifespan="on",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        limit_max_requests=settings.SERVER_LIMIT_MAX_REQUESTS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser(
+        "migrate", help="apply the Alembic revisions (upgrade head)"
+    )
+    migrate.add_argument(
+        "--status", action="store_true", help="only list pending migrations"
+    )
+
+    reminders = commands.add_parser(
+        "reminders", help="run the due-task reminder worker"
+    )
+    reminders.add_argument(
+        "--once", action="store_true", help="drain due tasks and exit"
+    )
+
+    partitions = commands.add_parser(
+        "partitions", help="manage partitioning of the activities table"
+    )
+    partitions.add_argument("action", choices=["setup", "maintain"])
+    partitions.add_argument(
+        "--mode",
+        choices=partitioning.MODES,
+        default=(
+            settings.ACTIVITY_PARTITIONING
+            if settings.ACTIVITY_PARTITIONING in partitioning.MODES
+            else "range"
+        ),
+    )
+
+    archive = commands.add_parser(
+        "archive", help="move old activities to cold storage"
+    )
+    archive.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.ACTIVITY_ARCHIVE_AFTER_DAYS,
+    )
+
+    fx = commands.add_parser(
+        "fx-rates", help="load FX rates to the base currency from a file"
+    )
+    fx.add_argument("path", help="JSON object or CSV `currency,rate` rows")
+    fx.add_argument(
+        "--org", type=int, help="organization's own rates (default: shared)"
+    )
+
+    bench = commands.add_parser(
+        "startup-bench",
+        help="time `import app` (-X importtime) and lifespan startup",
+    )
+    bench.add_argument("--runs", type=int, default=5)
+    bench.add_argument(
+        "--top", type=int, default=15, help="slowest imports to list"
+    )
+
+    openapi = commands.add_parser(
+        "openapi", help="render the OpenAPI document to the artifact file"
+    )
+    openapi.add_argument("--output", help="default: OPENAPI_ARTIFACT")
+    openapi.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if the artifact differs from the live routes",
+    )
+
+    serve = commands.add_parser("serve", help="run the API server")
+    serve.add_argument("--host", default=settings.SERVER_HOST)
+    serve.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    serve.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        asyncio.run(run_migrate(args.status))
+    elif args.command == "reminders":
+        asyncio.run(run_reminders(args.once))
+    elif args.command == "partitions":
+        asyncio.run(run_partitions(args.action, args.mode))
+    elif args.command == "archive":
+        asyncio.run(run_archive(args.older_than_days))
+    elif args.command == "fx-rates":
+        asyncio.run(run_fx_rates(args.path, args.org))
+    elif args.command == "serve":
+        run_serve(args.host, args.port, args.workers)
+    elif args.command == "openapi":
+        run_openapi(args.output, args.check)
+    elif args.command == "startup-bench":
+        run_startup_bench(args.runs, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 from app.core.config import settings
 from fastapi import APIRouter
 from .activity import activities_router
+from .activity_feed import activity_feed_router
 from .analytics import analytics_router
 from .auth import auth_router
 from .contacts import contacts_router
 from .organizations import organizations_router
 from .deals import deals_router
+from .fx_rates import fx_rates_router
+from .system import system_router
 from .tasks import tasks_router
 
 
@@ -16,4 +19,7 @@ apiv1_router.include_router(contacts_router)
 apiv1_router.include_router(deals_router)
 apiv1_router.include_router(tasks_router)
 apiv1_router.include_router(activities_router)
+apiv1_router.include_router(activity_feed_router)
 apiv1_router.include_router(analytics_router)
+apiv1_router.include_router(fx_rates_router)
+apiv1_router.include_router(system_router)
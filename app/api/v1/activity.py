@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_current_org, get_current_user, get_db
+from app.repositories.activity_archive_repo import ActivityArchiveRepository
 from app.repositories.activity_repo import ActivityRepository
+from app.services.activity_archive_service import ActivityTimelineService
 from app.services.activity_service import ActivityService
+from app.uow import UnitOfWork, get_uow
+from app.services.permission_service import Permissions, get_permissions
 
-from app.schemas.activity import ActivityCreate, ActivityOut
+from app.schemas.activity import (
+    ActivityCreate,
+    ActivityOut,
+    ActivityPageParams,
+)
 
 
 activities_router = APIRouter(prefix="/deals", tags=["Activities"])
@@ -15,16 +24,26 @@ activities_router = APIRouter(prefix="/deals", tags=["Activities"])
 )
 async def list_contacts(
     deal_id: int,
+    query: Annotated[ActivityPageParams, Query()],
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
 ):
-    """List activities for a specific deal."""
-    repo = ActivityRepository(db)
-    contacts = await repo.list_by_deal(
+    """
+    List activities for a specific deal, oldest first, one page at a time.
+    Pages older than the hot table are read from the activity archive.
+    """
+    svc = ActivityTimelineService(
+        ActivityRepository(db, perms.scope),
+        ActivityArchiveRepository(db, perms.scope),
+    )
+    return await svc.page(
         deal_id,
+        org_id=current_org.id,
+        before_id=query.before_id,
+        limit=query.limit,
     )
-    return contacts
 
 
 @activities_router.post(
@@ -35,12 +54,14 @@ async def create_activity(
     payload: ActivityCreate,
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
-    current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
     """Create an activity for a specific deal."""
     svc = ActivityService(ActivityRepository(db))
     activity = await svc.create(
         user=current_user,
+        perms=perms,
         deal_id=deal_id,
         payload=payload,
     )
@@ -0,0 +1,126 @@
+import asyncio
+import json
+from typing import Annotated, Any, Dict
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.deps import get_current_org, get_current_user, get_db
+from app.repositories.activity_repo import ActivityRepository
+from app.schemas.activity import ActivityOut, ActivityQueryParams
+from app.services.permission_service import Permissions, get_permissions
+
+
+activity_feed_router = APIRouter(prefix="/activities", tags=["Activities"])
+
+
+def sse_event(event: Dict[str, Any]) -> str:
+    return (
+        f"id: {event['id']}\n"
+        "event: activity\n"
+        f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+    )
+
+
+@activity_feed_router.get("", response_model=list[ActivityOut])
+async def query_activities(
+    query: Annotated[ActivityQueryParams, Query()],
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+):
+    """
+    Activities of the current organization filtered by deal, type and
+    payload fields (e.g. `?type=status_changed&to=won`), newest first.
+    Page with `before_id` = the smallest id of the previous page.
+    """
+    return await ActivityRepository(db, perms.scope).query(
+        current_org.id,
+        deal_id=query.deal_id,
+        types=query.type,
+        payload=query.payload_filters(),
+        before_id=query.before_id,
+        limit=query.limit,
+    )
+
+
+@activity_feed_router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}},
+)
+async def stream_activities(
+    request: Request,
+    deal_id: int | None = None,
+    last_event_id: int | None = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+):
+    """
+    Server-Sent Events stream of new activities in the current
+    organization, optionally for a single deal. Reconnecting clients
+    send `Last-Event-ID` (an activity id) and get the missed rows first.
+    """
+    broadcaster = getattr(request.app.state, "activity_broadcaster", None)
+    if broadcaster is None or not broadcaster.listening:
+        raise HTTPException(
+            status_code=503, detail="Activity stream is unavailable"
+        )
+
+    # subscribe before the replay query so nothing falls in between;
+    # members only get events of deals they own when the event happens
+    sub = broadcaster.subscribe(
+        current_org.id, deal_id, owner_id=perms.scope.owner_id
+    )
+    replay = []
+    if last_event_id is not None:
+        rows = await ActivityRepository(db, perms.scope).list_by_org_after(
+            current_org.id,
+            last_event_id,
+            deal_id=deal_id,
+            limit=settings.ACTIVITY_STREAM_REPLAY_LIMIT,
+        )
+        replay = [
+            ActivityOut.model_validate(row, from_attributes=True).model_dump(
+                mode="json"
+            )
+            for row in rows
+        ]
+    # an idle stream must not pin a pooled connection
+    await db.close()
+
+    async def events():
+        last_id = last_event_id or 0
+        try:
+            for event in replay:
+                last_id = event["id"]
+                yield sse_event(event)
+            if len(replay) >= settings.ACTIVITY_STREAM_REPLAY_LIMIT:
+                # more backlog than one replay: let the client reconnect
+                # from the new Last-Event-ID instead of buffering it here
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        sub.queue.get(), settings.ACTIVITY_STREAM_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                if event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield sse_event(event)
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from app.deps import get_current_user, get_current_org, get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.analytics_service import AnalyticsService
@@ -9,13 +9,17 @@ analytics_router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 @analytics_router.get("/deals/summary")
 async def deals_summary(
+    currency: str | None = Query(None, pattern="^[A-Za-z]{3}$"),
     user=Depends(get_current_user),
     org=Depends(get_current_org),
     session: AsyncSession = Depends(get_db),
 ):
-    """Get summary statistics for deals in the organization."""
+    """
+    Get summary statistics for deals in the organization. Amounts are
+    totalled in `currency` (default: the base currency).
+    """
     service = AnalyticsService(session)
-    return await service.deals_summary(org.id)
+    return await service.deals_summary(org.id, currency=currency)
 
 
 @analytics_router.get("/deals/funnel")
@@ -27,3 +31,15 @@ async def deals_funnel(
     """Get deals funnel data for the organization."""
     service = AnalyticsService(session)
     return await service.deals_funnel(org.id)
+
+
+@analytics_router.get("/deals/status-transitions")
+async def deals_status_transitions(
+    to: str | None = None,
+    user=Depends(get_current_user),
+    org=Depends(get_current_org),
+    session: AsyncSession = Depends(get_db),
+):
+    """Count deal status changes by (from, to), optionally for one target."""
+    service = AnalyticsService(session)
+    return await service.status_transitions(org.id, to=to)
@@ -1,16 +1,21 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, Form
+from fastapi import APIRouter, Depends, Form, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.auth import RegisterIn, LoginIn, TokenOut
+from app.schemas.auth import RegisterIn, LoginIn, RefreshIn, TokenOut
 from app.deps import get_db
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, enforce_login_rate_limit
+from app.uow import UnitOfWork, get_uow
 
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @auth_router.post("/register", response_model=TokenOut)
-async def register(payload: RegisterIn, db: AsyncSession = Depends(get_db)):
+async def register(
+    payload: RegisterIn,
+    db: AsyncSession = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
+):
     """Register a new user and organization."""
     svc = AuthService(db)
     res = await svc.register(
@@ -29,10 +34,16 @@ async def register(payload: RegisterIn, db: AsyncSession = Depends(get_db)):
 
 @auth_router.post("/login", response_model=TokenOut)
 async def login(
+    request: Request,
     payload: Annotated[LoginIn, Form()],
     db: AsyncSession = Depends(get_db),
 ):
     """Authenticate a user and return access and refresh tokens."""
+    await enforce_login_rate_limit(
+        db,
+        ip=request.client.host if request.client else "unknown",
+        email=payload.username,
+    )
     svc = AuthService(db)
     res = await svc.login(
         email=payload.username,
@@ -43,3 +54,19 @@ async def login(
         "refresh_token": res["refresh"],
         "token_type": "bearer",
     }
+
+
+@auth_router.post("/refresh", response_model=TokenOut)
+async def refresh(
+    payload: RefreshIn,
+    db: AsyncSession = Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
+):
+    """Exchange a refresh token for a new access/refresh pair (rotation)."""
+    svc = AuthService(db)
+    res = await svc.refresh(payload.refresh_token)
+    return {
+        "access_token": res["access"],
+        "refresh_token": res["refresh"],
+        "token_type": "bearer",
+    }
@@ -2,11 +2,13 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps import get_db, get_current_user, get_current_org
+from app.repositories import Scope
 from app.repositories.contact_repo import ContactRepository
 from app.repositories.deal_repo import DealRepository
 from app.services.contact_service import ContactService
+from app.uow import UnitOfWork, get_uow
 from app.schemas.contact import ContactCreate, ContactOut, ContactQueryParams
-from app.services.permission_service import is_owner
+from app.services.permission_service import Permissions, get_permissions
 
 contacts_router = APIRouter(prefix="/contacts", tags=["contacts"])
 
@@ -17,19 +19,30 @@ async def list_contacts(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
 ):
-    """List contacts for the current organization."""
-    repo = ContactRepository(db)
+    """
+    List contacts for the current organization, optionally ranked or
+    filtered by their deal aggregates (deal count, open pipeline value in
+    the base currency, last activity).
+    """
+    # members only ever see their own contacts
+    repo = ContactRepository(db, perms.scope)
     ffilters = {}
     if query.search:
         ffilters["name"] = query.search
-    if query.owner_id and is_owner(db, current_user.id, current_org.id):
+    if query.owner_id and perms.is_owner:
         ffilters["owner_id"] = query.owner_id
+    for key in ("min_deals", "min_open_amount", "active_since"):
+        if getattr(query, key) is not None:
+            ffilters[key] = getattr(query, key)
     contacts = await repo.list_by_org(
         current_org.id,
         offset=(query.page - 1) * query.page_size,
         limit=query.page_size,
         filters=ffilters,
+        order_by=query.order_by,
+        order=query.order,
     )
     return contacts
 
@@ -42,6 +55,7 @@ async def create_contact(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
     """Create a new contact in the current organization."""
     svc = ContactService(ContactRepository(db))
@@ -50,6 +64,7 @@ async def create_contact(
         org_id=current_org.id,
         payload=payload,
     )
+    await uow.flush()
     return contact
 
 
@@ -59,14 +74,17 @@ async def delete_contact(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
     """Delete a contact by ID."""
-    contact_repo = ContactRepository(db)
+    contact_repo = ContactRepository(db, perms.scope)
     contact = await contact_repo.get(contact_id)
 
     if not contact or contact.organization_id != current_org.id:
         raise HTTPException(status_code=404, detail="Contact not found")
 
     svc = ContactService(contact_repo)
-    await svc.delete(contact, DealRepository(db))
+    # deals of other owners still block the deletion: org-wide scope
+    await svc.delete(contact, DealRepository(db, Scope(current_org.id)))
     return
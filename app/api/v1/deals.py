@@ -2,13 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
 from app.deps import get_db, get_current_user, get_current_org
+from app.repositories import Scope
 from app.repositories.deal_repo import DealRepository
 from app.repositories.activity_repo import ActivityRepository
 from app.repositories.contact_repo import ContactRepository
+from app.repositories.user_repo import UserRepository
 from app.services.deal_service import DealService
+from app.uow import UnitOfWork, get_uow
+from app.services.permission_service import Permissions, get_permissions
+from app.core.config import settings
+from app.repositories.deal_repo import (
+    decode_board_cursor,
+    encode_board_cursor,
+)
 from app.schemas.deal import (
+    DealBoardOut,
+    DealBoardQuery,
     DealCreate,
     DealFilterQuery,
+    DealListItem,
     DealOut,
     DealPatch,
     DealsListOut,
@@ -32,6 +44,8 @@ async def create_deal(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
     """Create a new deal in the current organization."""
     # current_org is membership object or has organization_id and role
@@ -41,9 +55,11 @@ async def create_deal(
         else current_org.id
     )
     # repos/services
-    deal_repo = DealRepository(db)
+    deal_repo = DealRepository(db, perms.scope)
     activity_repo = ActivityRepository(db)
-    contact_repo = ContactRepository(db)
+    # any contact of the organization, members included: only deal
+    # ownership is per user
+    contact_repo = ContactRepository(db, Scope(org_id))
     svc = DealService(deal_repo, activity_repo, contact_repo)
 
     # members: manager/member can create;
@@ -52,7 +68,6 @@ async def create_deal(
     deal = await svc.create_deal(
         org_id=org_id, owner_id=current_user.id, payload=payload
     )
-    await db.commit()
     return deal
 
 
@@ -62,30 +77,127 @@ async def list_deals(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
 ):
-    """List deals for the current organization."""
+    """
+    List deals for the current organization with their contact and
+    owner. Members only get the deals they own.
+    """
     org_id = (
         current_org.organization_id
         if hasattr(current_org, "organization_id")
         else current_org.id
     )
-    repo = DealRepository(db)
+    # members only ever see their own deals
+    repo = DealRepository(db, perms.scope)
     offset = (query.page - 1) * query.page_size
-    items = await repo.list_by_org(
-        org_id=org_id,
+    filters = dict(
         status=query.status or None,
         stage=query.stage,
         min_amount=query.min_amount,
         max_amount=query.max_amount,
         owner_id=query.owner_id,
+    )
+    items = await repo.list_by_org(
+        org_id=org_id,
         offset=offset,
         limit=query.page_size,
         order_by=query.order_by,
         order=query.order,
+        **filters,
+    )
+    total = await repo.count_by_org(org_id, **filters)
+
+    # one IN query each for the page's contacts and owners; the lookups
+    # below are then served from the identity map
+    contacts = ContactRepository(db, Scope(org_id))
+    owners = UserRepository(db)
+    await contacts.prefetch(deal.contact_id for deal in items)
+    await owners.prefetch(deal.owner_id for deal in items)
+    return {
+        "items": [
+            DealListItem(
+                **DealOut.model_validate(
+                    deal, from_attributes=True
+                ).model_dump(),
+                contact=await contacts.get(deal.contact_id),
+                owner=await owners.get(deal.owner_id),
+            )
+            for deal in items
+        ],
+        "total": total,
+    }
+
+
+# registered before /{deal_id}, which would otherwise claim the path
+@deals_router.get(
+    "/board",
+    response_model=DealBoardOut,
+    responses={400: {"description": "Bad Request"}},
+)
+async def deals_board(
+    query: Annotated[DealBoardQuery, Query()],
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+):
+    """
+    Pipeline board: for every stage the first `limit` deals, the stage's
+    deal count and amount total, and a cursor to load more of it; all in
+    one query. Pass `cursor` (repeatable) to continue only those stages.
+    """
+    cursors = {}
+    for token in query.cursor or []:
+        try:
+            stage, value, deal_id = decode_board_cursor(
+                token, query.order_by, query.order
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        cursors[stage] = (value, deal_id)
+
+    repo = DealRepository(db, perms.scope)
+    columns = await repo.board(
+        current_org.id,
+        limit=query.limit,
+        order_by=query.order_by,
+        order=query.order,
+        cursors=cursors,
+        status=query.status or None,
+        min_amount=query.min_amount,
+        max_amount=query.max_amount,
+        owner_id=query.owner_id,
     )
-    # naive total (should be optimized)
-    total = len(items)
-    return {"items": items, "total": total}
+    for stage, column in columns.items():
+        if column.pop("has_more") and column["items"]:
+            last = column["items"][-1]
+            column["next_cursor"] = encode_board_cursor(
+                stage,
+                query.order_by,
+                query.order,
+                getattr(last, query.order_by),
+                last.id,
+            )
+    return {
+        "currency": settings.FX_BASE_CURRENCY,
+        "columns": list(columns.values()),
+    }
+
+
+@deals_router.get("/modifiable", response_model=list[int])
+async def modifiable_deals(
+    ids: Annotated[list[int], Query(max_length=500)],
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    perms: Permissions = Depends(get_permissions),
+):
+    """
+    Which of the given deal ids (`?ids=1&ids=2`) the caller may update
+    or delete, checked in one query. Unknown deals and deals of other
+    organizations are left out.
+    """
+    return sorted(await perms.modifiable_deal_ids(db, ids))
 
 
 @deals_router.get("/{deal_id}", response_model=DealOut)
@@ -94,9 +206,13 @@ async def get_deal(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
 ):
-    """Get a specific deal by ID."""
-    repo = DealRepository(db)
+    """
+    Get a specific deal by ID. Another member's deal is 404 for members,
+    as if it did not exist.
+    """
+    repo = DealRepository(db, perms.scope)
     deal = await repo.get(deal_id)
     if not deal or deal.organization_id != (
         current_org.organization_id
@@ -114,30 +230,28 @@ async def patch_deal(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
-    """Update a specific deal by ID."""
-    repo = DealRepository(db)
+    """
+    Update a specific deal by ID. Members may only update their own
+    deals (403 otherwise).
+    """
+    repo = DealRepository(db, perms.scope)
     activity_repo = ActivityRepository(db)
-    contact_repo = ContactRepository(db)
+    contact_repo = ContactRepository(db, perms.scope)
     svc = DealService(repo, activity_repo, contact_repo)
 
-    deal = await repo.get(deal_id)
-    if not deal or deal.organization_id != (
-        current_org.organization_id
-        if hasattr(current_org, "organization_id")
-        else current_org.id
-    ):
-        raise HTTPException(status_code=404, detail="Deal not found")
-
     # membership object provides role and organization_id
     membership = current_org
     updated = await svc.patch_deal(
         current_user=current_user,
         membership=membership,
-        deal=deal,
+        deal_id=deal_id,
         patch=patch,
     )
-    await db.commit()
+    if updated is None:
+        await perms.deny(db, deal_id)
     return updated
 
 
@@ -147,20 +261,16 @@ async def delete_deal(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
     current_org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
-    """Delete a specific deal by ID."""
-    repo = DealRepository(db)
-    activity_repo = ActivityRepository(db)
-    svc = DealService(repo, activity_repo, ContactRepository(db))
-    deal = await repo.get(deal_id)
-    if not deal or deal.organization_id != (
-        current_org.organization_id
-        if hasattr(current_org, "organization_id")
-        else current_org.id
-    ):
-        raise HTTPException(status_code=404, detail="Deal not found")
-    await svc.delete_deal(
-        current_user=current_user, membership=current_org, deal=deal
-    )
-    await db.commit()
-    return None
+    """
+    Delete a specific deal by ID (members: their own only, 403
+    otherwise). Its activities go with it; the deletion is published
+    as a `deal.deleted` outbox event instead of an activity.
+    """
+    repo = DealRepository(db, perms.scope)
+    svc = DealService(repo, ActivityRepository(db), ContactRepository(db))
+    if await svc.delete_deal(current_user=current_user, deal_id=deal_id):
+        return None
+    await perms.deny(db, deal_id)
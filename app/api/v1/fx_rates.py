@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.deps import get_db, get_current_user, get_current_org
+from app.models.models import RoleEnum
+from app.schemas.fx import FxRatesIn, FxRatesOut
+from app.services.fx_service import FxService
+from app.services.permission_service import RoleChecker
+from app.uow import UnitOfWork, get_uow
+
+fx_rates_router = APIRouter(prefix="/fx-rates", tags=["FX rates"])
+
+
+@fx_rates_router.get("", response_model=FxRatesOut)
+async def get_fx_rates(
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    current_org=Depends(get_current_org),
+):
+    """Rates in effect for the organization (its own over shared ones)."""
+    fx = FxService(db)
+    rates = await fx.rates(current_org.id)
+    return {
+        "base_currency": fx.base,
+        "version": fx.cache.version,
+        "rates": rates,
+    }
+
+
+@fx_rates_router.put(
+    "",
+    response_model=FxRatesOut,
+    dependencies=[Depends(RoleChecker(RoleEnum.admin))],
+)
+async def put_fx_rates(
+    payload: FxRatesIn,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+    current_org=Depends(get_current_org),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
+):
+    """
+    Set the organization's own rates (admin or owner). Base amounts of
+    its deals in these currencies are recomputed in the same transaction.
+    """
+    fx = FxService(db)
+    version, _ = await fx.load(payload.rates, org_id=current_org.id)
+    return {
+        "base_currency": fx.base,
+        "version": version,
+        # not refreshed from the database: it would read our uncommitted
+        # rows into the shared cache
+        "rates": {**fx.cache.rates(current_org.id), **payload.rates},
+    }
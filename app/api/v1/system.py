@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.core import metrics
+
+
+system_router = APIRouter(prefix="/system", tags=["System"])
+
+
+@system_router.get("/metrics")
+async def get_metrics():
+    """In-process metrics of this worker (outbox throughput, etc.)."""
+    return metrics.collect()
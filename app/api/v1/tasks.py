@@ -4,6 +4,8 @@ from app.repositories.deal_repo import DealRepository
 from app.repositories.task_repo import TaskRepository
 from app.schemas.task import TaskCreate, TaskOut, TaskQueryParams
 from app.services.task_service import TaskService
+from app.uow import UnitOfWork, get_uow
+from app.services.permission_service import Permissions, get_permissions
 from app.deps import get_current_user, get_current_org
 from fastapi import APIRouter, Depends, Query
 
@@ -15,10 +17,11 @@ async def list_tasks(
     query: Annotated[TaskQueryParams, Query()],
     user=Depends(get_current_user),
     org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
     db=Depends(get_db),
 ):
     """List tasks for the current organization."""
-    repo = TaskRepository(db)
+    repo = TaskRepository(db, perms.scope)
     return await repo.list_by_org(org_id=org.id, **query.model_dump())
 
 
@@ -27,10 +30,14 @@ async def create_task(
     payload: TaskCreate,
     user=Depends(get_current_user),
     org=Depends(get_current_org),
+    perms: Permissions = Depends(get_permissions),
     db=Depends(get_db),
+    uow: UnitOfWork = Depends(get_uow, scope="function"),
 ):
     """Create a new task in the current organization."""
-    task_repo = TaskRepository(db)
-    deal_repo = DealRepository(db)
+    task_repo = TaskRepository(db, perms.scope)
+    deal_repo = DealRepository(db, perms.scope)
     service = TaskService(task_repo, deal_repo)
-    return await service.create(user, org.id, payload)
+    task = await service.create(user, org.id, payload)
+    await uow.flush()
+    return task
@@ -0,0 +1,123 @@
+"""
+The OpenAPI document. `python -m app openapi` renders it at build time
+into the OPENAPI_ARTIFACT file; workers serve that file with an ETag
+instead of walking every route and model on their first /openapi.json
+hit, and only generate it when no artifact was shipped.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from fastapi import FastAPI, Request, Response
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+from fastapi.openapi.utils import get_openapi
+from app.core.config import settings
+
+DESCRIPTION = """
+    # Kuxnya-CRM API
+
+
+    Документация: все запросы проходят в контексте организации через заголовок
+    `X-Organization-Id`.
+
+
+    Auth flow:
+    - POST /api/v1/auth/register — регистрирует пользователя
+    и первую организацию
+    - POST /api/v1/auth/login — логин
+
+
+    Роли: owner, admin, manager, member — подробнее в описании сервиса.
+    """
+
+OPENAPI_URL = "/openapi.json"
+
+
+def generate(app: FastAPI) -> Dict[str, Any]:
+    """Build the schema from the live routes (slow: every model)."""
+    openapi_schema = get_openapi(
+        title=settings.PROJECT_NAME,
+        version="1.0.0",
+        description=DESCRIPTION,
+        routes=app.routes,
+    )
+
+    # добавляем security схемы
+    # openapi_schema.setdefault("components", {})
+    # openapi_schema["components"].setdefault("securitySchemes", {})
+
+    # openapi_schema["components"]["securitySchemes"]["BearerAuth"] = {
+    #     "type": "http",
+    #     "scheme": "bearer",
+    #     "bearerFormat": "JWT",
+    # }
+
+    # глобальная авторизация
+    # openapi_schema["security"] = [{"BearerAuth": []}]
+    return openapi_schema
+
+
+def render(schema: Dict[str, Any]) -> bytes:
+    # stable output: the artifact is diffable and its ETag reproducible
+    return (
+        json.dumps(schema, ensure_ascii=False, indent=2, sort_keys=True)
+        + "\n"
+    ).encode()
+
+
+def artifact_path() -> Path:
+    if settings.OPENAPI_ARTIFACT:
+        return Path(settings.OPENAPI_ARTIFACT)
+    return Path(__file__).with_name("openapi.json")
+
+
+def document(app: FastAPI) -> Tuple[bytes, str]:
+    """The served body and its ETag, computed once per worker."""
+    cached = getattr(app.state, "openapi_document", None)
+    if cached is None:
+        path = artifact_path()
+        body = path.read_bytes() if path.is_file() else render(generate(app))
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        cached = app.state.openapi_document = (body, etag)
+    return cached
+
+
+def install(app: FastAPI, swagger_ui_parameters: Dict[str, Any]):
+    """
+    /openapi.json, /docs and /redoc. Create the app with
+    `openapi_url=None` so FastAPI does not register its own versions.
+    """
+
+    async def openapi_json(request: Request) -> Response:
+        body, etag = document(app)
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=0"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def swagger_ui(request: Request) -> Response:
+        return get_swagger_ui_html(
+            openapi_url=OPENAPI_URL,
+            title=f"{settings.PROJECT_NAME} - Swagger UI",
+            oauth2_redirect_url="/docs/oauth2-redirect",
+            swagger_ui_parameters=swagger_ui_parameters,
+        )
+
+    async def swagger_ui_redirect(request: Request) -> Response:
+        return get_swagger_ui_oauth2_redirect_html()
+
+    async def redoc(request: Request) -> Response:
+        return get_redoc_html(
+            openapi_url=OPENAPI_URL, title=f"{settings.PROJECT_NAME} - ReDoc"
+        )
+
+    app.add_route(OPENAPI_URL, openapi_json, include_in_schema=False)
+    app.add_route("/docs", swagger_ui, include_in_schema=False)
+    app.add_route(
+        "/docs/oauth2-redirect", swagger_ui_redirect, include_in_schema=False
+    )
+    app.add_route("/redoc", redoc, include_in_schema=False)
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import math
+from collections import deque
+from typing import Deque, Dict, Mapping, Tuple
+from app.core import metrics
+from app.core.config import settings
+from app.core.security import access_claims
+
+# budget shared by requests that name an organization they are not
+# authenticated for (no or invalid token, or not a member of it)
+SHARED_BUCKET = "shared"
+
+
+class WeightedLimiter:
+    """
+    Concurrency limit in cost units (a semaphore whose holders take
+    `weight` units) with a bounded FIFO wait queue. Waiters are served
+    in order, so a heavy request is not starved by a stream of light ones.
+    """
+
+    def __init__(self, capacity: int, max_waiters: int, max_wait: float):
+        self.capacity = capacity
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self.in_use = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        return not self.in_use and not self._waiters
+
+    async def acquire(self, weight: int) -> bool:
+        """Take `weight` units; False when the queue is full or times out."""
+        weight = min(weight, self.capacity)
+        if not self._waiters and self.in_use + weight <= self.capacity:
+            self.in_use += weight
+            return True
+        if len(self._waiters) >= self.max_waiters:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (weight, waiter)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # granted just as the timeout fired: hand the units back
+                self.release(weight)
+            else:
+                self._waiters.remove(entry)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release(weight)
+            else:
+                self._waiters.remove(entry)
+            raise
+
+    def release(self, weight: int):
+        self.in_use -= min(weight, self.capacity)
+        while self._waiters:
+            weight, waiter = self._waiters[0]
+            if self.in_use + weight > self.capacity:
+                break
+            self._waiters.popleft()
+            self.in_use += weight
+            waiter.set_result(None)
+
+
+class AdmissionController:
+    """
+    Admission control for org-scoped requests (`X-Organization-Id`).
+    Every organization gets its own budget of `org_capacity` cost units,
+    so a noisy tenant queues and gets 429s on its own budget only.
+    Route classes (longest path prefix in `route_weights`) make expensive
+    endpoints cost more units; `route_capacity` additionally caps a class
+    across all organizations. Unauthenticated traffic shares one budget
+    of `shared_capacity` units (`SHARED_BUCKET`). Limits are per worker
+    process.
+    """
+
+    def __init__(
+        self,
+        org_capacity: int,
+        max_waiters: int,
+        max_wait: float,
+        route_weights: Mapping[str, int],
+        route_capacity: Mapping[str, int],
+        shared_capacity: int | None = None,
+    ):
+        self.org_capacity = org_capacity
+        self.shared_capacity = shared_capacity or org_capacity
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        # longest prefix first
+        self.route_weights = sorted(
+            route_weights.items(), key=lambda kv: len(kv[0]), reverse=True
+        )
+        self.classes = {
+            prefix: WeightedLimiter(capacity, max_waiters, max_wait)
+            for prefix, capacity in route_capacity.items()
+        }
+        self._orgs: Dict[str, WeightedLimiter] = {}
+        self.admitted = 0
+        self.rejected_org = 0
+        self.rejected_route = 0
+
+    def route_class(self, path: str) -> Tuple[str, int]:
+        for prefix, weight in self.route_weights:
+            if path.startswith(prefix):
+                return prefix, weight
+        return "default", 1
+
+    def _org(self, org_id: str) -> WeightedLimiter:
+        limiter = self._orgs.get(org_id)
+        if limiter is None:
+            capacity = (
+                self.shared_capacity
+                if org_id == SHARED_BUCKET
+                else self.org_capacity
+            )
+            limiter = self._orgs[org_id] = WeightedLimiter(
+                capacity, self.max_waiters, self.max_wait
+            )
+        return limiter
+
+    async def acquire(self, org_id: str, path: str) -> Tuple[str, int] | None:
+        """Admit a request: its (route class, weight), or None for a 429."""
+        route, weight = self.route_class(path)
+        if weight <= 0:
+            return route, 0
+        shared = self.classes.get(route)
+        if shared is not None and not await shared.acquire(weight):
+            self.rejected_route += 1
+            return None
+        if not await self._org(org_id).acquire(weight):
+            if shared is not None:
+                shared.release(weight)
+            self.rejected_org += 1
+            return None
+        self.admitted += 1
+        return route, weight
+
+    def release(self, org_id: str, route: str, weight: int):
+        if weight <= 0:
+            return
+        limiter = self._orgs[org_id]
+        limiter.release(weight)
+        if limiter.idle:
+            # keep only tenants with traffic in flight
+            del self._orgs[org_id]
+        shared = self.classes.get(route)
+        if shared is not None:
+            shared.release(weight)
+
+    def stats(self):
+        busiest = sorted(
+            self._orgs.items(), key=lambda kv: kv[1].in_use, reverse=True
+        )[:10]
+        return {
+            "admitted": self.admitted,
+            "rejected_org": self.rejected_org,
+            "rejected_route": self.rejected_route,
+            "active_orgs": len(self._orgs),
+            "org_capacity": self.org_capacity,
+            "busiest_orgs": {
+                org: {"in_use": lim.in_use, "queued": lim.queued}
+                for org, lim in busiest
+            },
+            "route_classes": {
+                route: {"in_use": lim.in_use, "queued": lim.queued}
+                for route, lim in self.classes.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware in front of the routers: waits for (or refuses)
+    the organization's budget before the request touches the database.
+    The bearer token is verified first (signature only, no queries): a
+    header naming an organization the caller cannot prove to belong to
+    is charged to the shared bucket, so nobody spends another tenant's
+    budget. Requests without `X-Organization-Id` (auth, docs) are not
+    limited.
+    """
+
+    def __init__(self, app, controller: "AdmissionController | None" = None):
+        self.app = app
+        self.controller = controller or admission
+
+    @staticmethod
+    def bucket(headers) -> str | None:
+        """Budget a request is charged to; None when it is not limited."""
+        org_id = token = None
+        for name, value in headers:
+            if name == b"x-organization-id":
+                org_id = value.decode("latin-1")
+            elif name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer":
+                    token = None
+        if not org_id:
+            return None
+        claims = access_claims(token) if token else None
+        if claims is None:
+            return SHARED_BUCKET
+        # embedded memberships prove the org; without them membership is
+        # checked on the first query, against an authenticated user
+        orgs = claims.get("orgs")
+        if orgs is not None and org_id not in orgs:
+            return SHARED_BUCKET
+        return org_id
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        org_id = self.bucket(scope["headers"])
+        if not org_id:
+            return await self.app(scope, receive, send)
+
+        admitted = await self.controller.acquire(org_id, scope["path"])
+        if admitted is None:
+            return await self._reject(send)
+        route, weight = admitted
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(org_id, route, weight)
+
+    async def _reject(self, send):
+        body = json.dumps(
+            {"detail": "Too many concurrent requests for this organization"}
+        ).encode()
+        retry_after = str(max(1, math.ceil(self.controller.max_wait)))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", retry_after.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+admission = AdmissionController(
+    org_capacity=settings.ADMISSION_ORG_CAPACITY,
+    max_waiters=settings.ADMISSION_QUEUE_SIZE,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+    route_weights=settings.ADMISSION_ROUTE_WEIGHTS,
+    route_capacity=settings.ADMISSION_ROUTE_CAPACITY,
+    shared_capacity=settings.ADMISSION_SHARED_CAPACITY,
+)
+metrics.register("admission", admission.stats)
@@ -15,7 +15,129 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "DSBFBNFEHNRWGdgzash"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # embed org_id -> role memberships in access tokens ("orgs" claim),
+    # so org-scoped requests authorize without membership queries
+    TOKEN_EMBED_MEMBERSHIPS: bool = False
+    TOKEN_MEMBERSHIPS_MAX: int = 20
+    EMBEDDED_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    # login throttling: in-process token buckets per IP and per email,
+    # optionally backed by a shared fixed-window counter in Postgres
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_PER_IP_PER_MINUTE: float = 30
+    LOGIN_RATE_PER_IP_BURST: int = 10
+    LOGIN_RATE_PER_EMAIL_PER_MINUTE: float = 10
+    LOGIN_RATE_PER_EMAIL_BURST: int = 5
+    LOGIN_RATE_SHARED: bool = False
+    LOGIN_RATE_SHARED_WINDOW_SECONDS: int = 60
+    # cleanup of the shared counters once their window is over
+    LOGIN_RATE_PURGE_INTERVAL: float = 300.0
+    LOGIN_RATE_PURGE_BATCH_SIZE: int = 5000
+    # in-process front of the refresh token revocation table
+    REVOCATION_BLOOM_CAPACITY: int = 200_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_LRU_SIZE: int = 10_000
+    # periodic cleanup of revocations whose tokens expired anyway
+    REVOCATION_PURGE_ENABLED: bool = True
+    REVOCATION_PURGE_INTERVAL: float = 3600.0
+    REVOCATION_PURGE_BATCH_SIZE: int = 5000
     API_V1_STR: str = "/api/v1"
+    # create missing tables when a worker boots; off by default, the
+    # schema is managed with `python -m app migrate` (in-memory SQLite
+    # databases are always created, nothing else could do it)
+    DB_CREATE_ALL_ON_STARTUP: bool = False
+    # `python -m app serve` (uvicorn). Keep-alive should outlast the load
+    # balancer's idle timeout, or it races us closing idle connections;
+    # the graceful timeout must fit in the orchestrator's stop grace period
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_LOOP: str = "auto"  # uvloop when installed
+    SERVER_HTTP: str = "auto"  # httptools when installed
+    SERVER_KEEPALIVE_SECONDS: int = 75
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    SERVER_LIMIT_MAX_REQUESTS: int | None = None
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 25
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SERVER_ACCESS_LOG: bool = True
+    # admission control for org-scoped requests (X-Organization-Id), per
+    # worker: each organization gets ADMISSION_ORG_CAPACITY cost units of
+    # concurrent work, requests beyond it wait in a bounded FIFO queue and
+    # get 429 + Retry-After when it is full or the wait runs out.
+    # Route weights are matched by longest path prefix (default 1,
+    # 0 = not limited); route capacity caps a route class across all orgs
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_ORG_CAPACITY: int = 8
+    # one budget for requests not authenticated for the org they name
+    ADMISSION_SHARED_CAPACITY: int = 8
+    ADMISSION_QUEUE_SIZE: int = 16
+    ADMISSION_MAX_WAIT_SECONDS: float = 2.0
+    ADMISSION_ROUTE_WEIGHTS: dict[str, int] = {
+        "/api/v1/analytics": 4,
+        "/api/v1/activities/stream": 0,
+        "/api/v1/activities": 2,
+    }
+    ADMISSION_ROUTE_CAPACITY: dict[str, int] = {
+        "/api/v1/analytics": 16,
+    }
+    # request deadlines: X-Request-Timeout (seconds, up to the max) or the
+    # default of the route class (longest prefix, 0 = no deadline).
+    # Postgres sessions get `SET LOCAL statement_timeout` = time left
+    REQUEST_TIMEOUT_SECONDS: float = 30.0
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 120.0
+    REQUEST_TIMEOUT_ROUTES: dict[str, float] = {
+        "/api/v1/analytics": 15.0,
+        "/api/v1/activities/stream": 0,
+    }
+    # prebuilt OpenAPI document (`python -m app openapi`);
+    # empty means app/openapi.json
+    OPENAPI_ARTIFACT: str = ""
+
+    # reporting currency of Deal.amount_base / analytics totals; workers
+    # re-check the fx_rates version at most this often
+    FX_BASE_CURRENCY: str = "USD"
+    FX_RATES_CHECK_SECONDS: float = 30.0
+
+    # Transactional outbox for activity events
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_MAX_BACKOFF: float = 300.0
+    # claimed rows are hidden from other dispatchers this long; must
+    # outlast a batch's delivery to all sinks
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_NDJSON_PATH: str | None = None
+    OUTBOX_WEBHOOK_URL: str | None = None
+    OUTBOX_WEBHOOK_TIMEOUT: float = 5.0
+
+    # Server-Sent Events stream of activities (Postgres LISTEN/NOTIFY)
+    ACTIVITY_STREAM_ENABLED: bool = True
+    ACTIVITY_STREAM_CHANNEL: str = "activity_events"
+    ACTIVITY_STREAM_QUEUE_SIZE: int = 1000
+    ACTIVITY_STREAM_REPLAY_LIMIT: int = 500
+    ACTIVITY_STREAM_HEARTBEAT: float = 15.0
+
+    # Due-task reminders
+    TASK_REMINDERS_ENABLED: bool = True
+    TASK_REMINDER_INTERVAL: float = 30.0
+    TASK_REMINDER_BATCH_SIZE: int = 500
+    TASK_REMINDER_LEAD_MINUTES: int = 60
+
+    # Declarative partitioning of `activities`: "none", "range" (monthly
+    # by created_at) or "hash" (by organization_id)
+    ACTIVITY_PARTITIONING: str = "none"
+    ACTIVITY_HASH_PARTITIONS: int = 16
+    ACTIVITY_PARTITION_MONTHS_AHEAD: int = 3
+    # detach monthly partitions older than this (0 = keep everything)
+    ACTIVITY_PARTITION_RETENTION_MONTHS: int = 0
+
+    # Cold storage of old activities (gzip NDJSON per org and month)
+    ACTIVITY_ARCHIVE_ENABLED: bool = False
+    ACTIVITY_ARCHIVE_DIR: str = "var/activity_archive"
+    ACTIVITY_ARCHIVE_AFTER_DAYS: int = 180
+    ACTIVITY_ARCHIVE_BATCH_SIZE: int = 5000
+    ACTIVITY_ARCHIVE_INTERVAL: float = 3600.0
+
     model_config = SettingsConfigDict(env_file=".env")
 
     class ConfigDict:
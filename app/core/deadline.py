@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+from contextvars import ContextVar
+from typing import Mapping
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from app.core import metrics
+from app.core.config import settings
+
+# absolute time.monotonic() by which the current request must finish
+_deadline: ContextVar[float | None] = ContextVar(
+    "request_deadline", default=None
+)
+
+QUERY_CANCELED = "57014"  # statement_timeout (or pg_cancel_backend)
+_stats = {"timed_out": 0, "client_disconnects": 0, "statement_timeouts": 0}
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before the database was reached."""
+
+
+def remaining() -> float | None:
+    """Seconds left for the current request, None outside a deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def statement_timeout_ms() -> int | None:
+    """Value for `SET LOCAL statement_timeout` in the current request."""
+    left = remaining()
+    if left is None:
+        return None
+    if left <= 0:
+        raise DeadlineExceeded()
+    return max(1, int(left * 1000))
+
+
+class DeadlineMiddleware:
+    """
+    Gives every HTTP request a deadline: `X-Request-Timeout` (seconds,
+    capped by REQUEST_TIMEOUT_MAX_SECONDS) or the default of its route
+    class (longest prefix in REQUEST_TIMEOUT_ROUTES). The deadline is
+    kept in a contextvar, so DB sessions opened by the request set
+    `statement_timeout` to the time left (see app.db.base).
+    The request is cancelled (and with it the running query) when the
+    deadline passes, answering 504, or when the client disconnects
+    before the response is complete.
+    """
+
+    def __init__(
+        self,
+        app,
+        default: float = settings.REQUEST_TIMEOUT_SECONDS,
+        routes: Mapping[str, float] = settings.REQUEST_TIMEOUT_ROUTES,
+        maximum: float = settings.REQUEST_TIMEOUT_MAX_SECONDS,
+    ):
+        self.app = app
+        self.default = default
+        self.maximum = maximum
+        # longest prefix first
+        self.routes = sorted(
+            routes.items(), key=lambda kv: len(kv[0]), reverse=True
+        )
+
+    def timeout_for(self, scope) -> float:
+        timeout = self.default
+        for prefix, value in self.routes:
+            if scope["path"].startswith(prefix):
+                timeout = value
+                break
+        if not timeout:
+            # 0 = no deadline (long-lived streams)
+            return 0
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout":
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    timeout = min(requested, self.maximum)
+                break
+        return timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timeout = self.timeout_for(scope)
+        if not timeout:
+            return await self.app(scope, receive, send)
+
+        token = _deadline.set(time.monotonic() + timeout)
+        try:
+            await self._run(scope, receive, send, timeout)
+        finally:
+            _deadline.reset(token)
+
+    async def _run(self, scope, receive, send, timeout: float):
+        messages: asyncio.Queue = asyncio.Queue()
+        response = {"started": False, "complete": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["started"] = True
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response["complete"] = True
+            await send(message)
+
+        request = asyncio.ensure_future(
+            self.app(scope, messages.get, send_wrapper)
+        )
+
+        async def watch_disconnect():
+            # the only reader of the server's receive channel; the app
+            # gets the same messages through `messages`
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not response["complete"]:
+                        _stats["client_disconnects"] += 1
+                        request.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            done, _ = await asyncio.wait({request}, timeout=timeout)
+            if not done:
+                _stats["timed_out"] += 1
+                request.cancel()
+                await asyncio.wait({request})
+                if not response["started"]:
+                    await _send_json(send, 504, "Request deadline exceeded")
+                return
+            if not request.cancelled():
+                request.result()
+        finally:
+            watcher.cancel()
+            if not request.done():
+                request.cancel()
+
+
+async def _send_json(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def deadline_exceeded_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=504, content={"detail": "Request deadline exceeded"}
+    )
+
+
+async def pool_timeout_handler(request: Request, exc: Exception):
+    # every pooled connection stayed busy for pool_timeout
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+async def db_error_handler(request: Request, exc: Exception):
+    orig = getattr(exc, "orig", None)
+    if getattr(orig, "sqlstate", None) == QUERY_CANCELED or getattr(
+        orig, "pgcode", None
+    ) == QUERY_CANCELED:
+        _stats["statement_timeouts"] += 1
+        return await deadline_exceeded_handler(request, exc)
+    raise exc
+
+
+def stats():
+    return dict(_stats)
+
+
+metrics.register("request_deadlines", stats)
+
+
+def install(app):
+    """Deadline middleware plus 503/504 mapping of DB timeouts."""
+    app.add_middleware(DeadlineMiddleware)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+    app.add_exception_handler(DBAPIError, db_error_handler)
@@ -0,0 +1,91 @@
+import time
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Callable, Dict, Mapping, Optional
+from app.core import metrics
+from app.core.config import settings
+
+CENTS = Decimal("0.01")
+# shared rates (no organization) are kept under this key
+SHARED = None
+
+
+class FxRateCache:
+    """
+    In-process copy of the `fx_rates` table (so per worker). It is
+    reloaded whole when the table's version moved on; the version itself
+    is re-checked at most every `check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        base: str,
+        check_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.base = base
+        self.check_interval = check_interval
+        self.clock = clock
+        self.version: int | None = None
+        self.checked_at = 0.0
+        self.reloads = 0
+        self._rates: Dict[Optional[int], Dict[str, Decimal]] = {}
+
+    def needs_check(self) -> bool:
+        return (
+            self.version is None
+            or self.clock() - self.checked_at >= self.check_interval
+        )
+
+    def checked(self):
+        self.checked_at = self.clock()
+
+    def replace(
+        self, rates: Mapping[Optional[int], Dict[str, Decimal]], version: int
+    ):
+        self._rates = dict(rates)
+        self.version = version
+        self.reloads += 1
+        self.checked()
+
+    def invalidate(self):
+        """Force a version check on next use (after a local write)."""
+        self.version = None
+
+    def rate(self, org_id: int, currency: str) -> Decimal | None:
+        """Value of one `currency` unit in the base currency, if known."""
+        if currency == self.base:
+            return Decimal(1)
+        own = self._rates.get(org_id)
+        if own and currency in own:
+            return own[currency]
+        return self._rates.get(SHARED, {}).get(currency)
+
+    def rates(self, org_id: int) -> Dict[str, Decimal]:
+        """Effective rates of an organization (own over shared)."""
+        return {
+            **self._rates.get(SHARED, {}),
+            **self._rates.get(org_id, {}),
+        }
+
+    def to_base(
+        self, org_id: int, amount: Decimal | None, currency: str
+    ) -> Decimal | None:
+        rate = self.rate(org_id, currency)
+        if amount is None or rate is None:
+            return None
+        return (Decimal(amount) * rate).quantize(CENTS, ROUND_HALF_UP)
+
+    def stats(self):
+        return {
+            "base": self.base,
+            "version": self.version,
+            "reloads": self.reloads,
+            "organizations": sum(1 for key in self._rates if key is not None),
+        }
+
+
+fx_rates = FxRateCache(
+    base=settings.FX_BASE_CURRENCY,
+    check_interval=settings.FX_RATES_CHECK_SECONDS,
+)
+metrics.register("fx_rates", fx_rates.stats)
@@ -0,0 +1,20 @@
+from typing import Any, Callable, Dict
+
+# In-process metrics registry: components register a collector callable
+# returning a flat dict, `/system/metrics` renders all of them at once.
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register(name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) a metrics collector under `name`."""
+    _collectors[name] = collector
+
+
+def unregister(name: str) -> None:
+    """Remove a metrics collector, ignoring unknown names."""
+    _collectors.pop(name, None)
+
+
+def collect() -> Dict[str, Dict[str, Any]]:
+    """Snapshot all registered collectors."""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict
+from app.core import metrics
+from app.core.config import settings
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """
+    Per-key token buckets held in process memory (so per worker).
+    Idle keys are evicted LRU-style once `max_keys` is reached.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        burst: int,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def hit(self, key: str) -> float:
+        """Take one token: 0.0 if allowed, else seconds until allowed."""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * self.rate
+            )
+            bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate if self.rate else float("inf")
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class LoginRateLimiter:
+    """Login attempts limited both per client IP and per email."""
+
+    def __init__(self, by_ip: RateLimiter, by_email: RateLimiter):
+        self.by_ip = by_ip
+        self.by_email = by_email
+        self.allowed = 0
+        self.rejected_ip = 0
+        self.rejected_email = 0
+        self.rejected_shared = 0
+
+    def check(self, ip: str, email: str) -> float:
+        """0.0 if the attempt may proceed, else a Retry-After in seconds."""
+        wait = self.by_ip.hit(ip)
+        if wait:
+            self.rejected_ip += 1
+            return wait
+        wait = self.by_email.hit(email.lower())
+        if wait:
+            self.rejected_email += 1
+            return wait
+        self.allowed += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "allowed": self.allowed,
+            "rejected_ip": self.rejected_ip,
+            "rejected_email": self.rejected_email,
+            "rejected_shared": self.rejected_shared,
+            "tracked_ips": len(self.by_ip),
+            "tracked_emails": len(self.by_email),
+        }
+
+
+login_limiter = LoginRateLimiter(
+    by_ip=RateLimiter(
+        settings.LOGIN_RATE_PER_IP_PER_MINUTE, settings.LOGIN_RATE_PER_IP_BURST
+    ),
+    by_email=RateLimiter(
+        settings.LOGIN_RATE_PER_EMAIL_PER_MINUTE,
+        settings.LOGIN_RATE_PER_EMAIL_BURST,
+    ),
+)
+metrics.register("login_rate_limit", login_limiter.stats)
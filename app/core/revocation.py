@@ -0,0 +1,90 @@
+import hashlib
+import math
+from collections import OrderedDict
+from app.core import metrics
+from app.core.config import settings
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(
+            8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        # double hashing: h1 + i * h2
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self._positions(item)
+        )
+
+
+class RevocationCache:
+    """
+    In-process front of the `revoked_tokens` table.
+
+    Every jti this worker has seen revoked goes into a Bloom filter; a jti
+    that is not in it skips the database lookup entirely. Bloom hits are
+    confirmed through a small LRU of known revocations before falling back
+    to the table. Revocations made by other workers are still caught by
+    the unique insert that rotation performs.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, lru_size: int):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.lru: OrderedDict[str, None] = OrderedDict()
+        self.lru_size = lru_size
+        self.bloom_negatives = 0
+        self.lru_hits = 0
+        self.db_checks = 0
+
+    def add(self, jti: str):
+        self.bloom.add(jti)
+        self.lru[jti] = None
+        self.lru.move_to_end(jti)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def maybe_revoked(self, jti: str) -> bool | None:
+        """False: surely not revoked; True: revoked; None: ask the DB."""
+        if jti not in self.bloom:
+            self.bloom_negatives += 1
+            return False
+        if jti in self.lru:
+            self.lru_hits += 1
+            self.lru.move_to_end(jti)
+            return True
+        self.db_checks += 1
+        return None
+
+    def stats(self):
+        return {
+            "bloom_entries": self.bloom.count,
+            "bloom_negatives": self.bloom_negatives,
+            "lru_hits": self.lru_hits,
+            "db_checks": self.db_checks,
+        }
+
+
+revocation_cache = RevocationCache(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    lru_size=settings.REVOCATION_LRU_SIZE,
+)
+metrics.register("token_revocation", revocation_cache.stats)
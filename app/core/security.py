@@ -1,5 +1,6 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
+from functools import lru_cache
+from uuid import uuid4
 import jwt
 from typing import Any, Dict
 from app.core.config import settings
@@ -8,7 +9,14 @@ from logging import getLogger
 
 logger = getLogger(__name__)
 
-_pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def _pwd():
+    # passlib + bcrypt load on the first hash / verify, not at import:
+    # most requests only ever check a JWT
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def decode_token(token: str) -> Dict[str, Any]:
@@ -19,17 +27,45 @@ def decode_token(token: str) -> Dict[str, Any]:
         raise
 
 
+def access_claims(token: str) -> Dict[str, Any] | None:
+    """Claims of a valid access token, None for anything else; quiet."""
+    try:
+        payload = jwt.decode(
+            token, settings.JWT_SECRET, algorithms=["HS256"]
+        )
+    except jwt.exceptions.PyJWTError:
+        return None
+    return payload if payload.get("typ", "access") == "access" else None
+
+
 class TokenService:
     def __init__(self, secret: str = settings.JWT_SECRET):
         self.secret = secret
 
     def create_access_token(
-        self, subject: int, expires_minutes: int | None = None
+        self,
+        subject: int,
+        expires_minutes: int | None = None,
+        orgs: Dict[int, str] | None = None,
+        membership_version: int | None = None,
     ) -> str:
+        """
+        `orgs` (org_id -> role) is embedded as a compact claim together
+        with the user's `membership_version`; such tokens are short-lived.
+        """
+        if orgs is not None and expires_minutes is None:
+            expires_minutes = settings.EMBEDDED_ACCESS_TOKEN_EXPIRE_MINUTES
         expire = datetime.now() + timedelta(
             minutes=(expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         )
-        payload = {"sub": str(subject), "exp": expire}
+        payload: Dict[str, Any] = {
+            "sub": str(subject),
+            "exp": expire,
+            "typ": "access",
+        }
+        if orgs is not None:
+            payload["orgs"] = {str(k): v for k, v in orgs.items()}
+            payload["mv"] = membership_version
         return jwt.encode(payload, self.secret, algorithm="HS256")
 
     def decode(self, token: str) -> Dict[str, Any]:
@@ -47,13 +83,19 @@ class TokenService:
         expire = datetime.now() + timedelta(
             days=(expires_days or settings.REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        to_encode = {"sub": str(subject), "exp": expire}
-        return jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
+        # jti identifies the token in the revocation table on rotation
+        to_encode = {
+            "sub": str(subject),
+            "exp": expire,
+            "typ": "refresh",
+            "jti": uuid4().hex,
+        }
+        return jwt.encode(to_encode, self.secret, algorithm="HS256")
 
 
 class PasswordHasher:
     def hash(self, password: str) -> str:
-        return _pwd.hash(password)
+        return _pwd().hash(password)
 
     def verify(self, plain: str, hashed: str) -> bool:
-        return _pwd.verify(plain, hashed)
+        return _pwd().verify(plain, hashed)
@@ -0,0 +1,58 @@
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.config import settings
+from app.db.base import Base
+import app.models.models  # noqa: F401  (registers the tables)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def run_migrations_offline():
+    """`alembic upgrade --sql`: print the SQL instead of running it."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection: Connection):
+    # Tables new to the models are created from them (missing ones only,
+    # create_all never alters); revisions change tables that existed.
+    Base.metadata.create_all(connection)
+    connection.commit()
+    context.configure(
+        connection=connection,
+        target_metadata=Base.metadata,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    engine = create_async_engine(
+        settings.DATABASE_URL, poolclass=pool.NullPool
+    )
+    try:
+        async with engine.connect() as connection:
+            await connection.run_sync(run_migrations)
+    finally:
+        await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    # called from app.db.migrations with a connection of its own engine
+    run_migrations(config.attributes["connection"])
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,32 @@
+"""activity stream index and task reminders
+
+Revision ID: 0001
+Revises:
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_activities_deal_id "
+        "ON activities (deal_id)"
+    )
+    op.execute(
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS "
+        "reminded_at TIMESTAMP WITH TIME ZONE"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_is_done_due_date "
+        "ON tasks (is_done, due_date) WHERE reminded_at IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tasks_is_done_due_date")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS reminded_at")
+    op.execute("DROP INDEX IF EXISTS ix_activities_deal_id")
@@ -0,0 +1,103 @@
+"""organization_id/owner_id on tasks and activities
+
+Revision ID: 0002
+Revises: 0001
+"""
+from alembic import op
+from app.core.config import settings
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# the NOTIFY payload reads NEW.organization_id from here on; before, the
+# trigger looked the organization up through the deal
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_activity_insert() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        '{channel}',
+        json_build_object(
+            'id', NEW.id,
+            'deal_id', NEW.deal_id,
+            'organization_id', {organization_id}
+        )::text
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _notify_function(organization_id: str) -> str:
+    return NOTIFY_FUNCTION.format(
+        channel=settings.ACTIVITY_STREAM_CHANNEL,
+        organization_id=organization_id,
+    )
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS organization_id "
+        "INTEGER REFERENCES organizations (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS owner_id "
+        "INTEGER REFERENCES users (id)"
+    )
+    op.execute(
+        """
+        UPDATE tasks t
+           SET organization_id = d.organization_id,
+               owner_id = COALESCE(t.owner_id, d.owner_id)
+          FROM deals d
+         WHERE t.deal_id = d.id AND t.organization_id IS NULL
+        """
+    )
+    op.execute("ALTER TABLE tasks ALTER COLUMN organization_id SET NOT NULL")
+    op.execute(
+        "ALTER TABLE activities ADD COLUMN IF NOT EXISTS organization_id "
+        "INTEGER REFERENCES organizations (id) ON DELETE CASCADE"
+    )
+    op.execute(
+        """
+        UPDATE activities a
+           SET organization_id = d.organization_id
+          FROM deals d
+         WHERE a.deal_id = d.id AND a.organization_id IS NULL
+        """
+    )
+    op.execute(
+        "ALTER TABLE activities ALTER COLUMN organization_id SET NOT NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_org_open_due "
+        "ON tasks (organization_id, is_done, due_date)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_activities_org_id "
+        "ON activities (organization_id, id)"
+    )
+    op.execute(_notify_function("NEW.organization_id"))
+    op.execute("DROP TRIGGER IF EXISTS activities_notify_insert ON activities")
+    op.execute(
+        """
+        CREATE TRIGGER activities_notify_insert
+            AFTER INSERT ON activities
+            FOR EACH ROW EXECUTE FUNCTION notify_activity_insert()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        _notify_function(
+            "(SELECT organization_id FROM deals WHERE id = NEW.deal_id)"
+        )
+    )
+    op.execute("DROP INDEX IF EXISTS ix_activities_org_id")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_org_open_due")
+    op.execute("ALTER TABLE activities DROP COLUMN IF EXISTS organization_id")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS owner_id")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS organization_id")
@@ -0,0 +1,40 @@
+"""activities.payload as jsonb with GIN/expression indexes
+
+Revision ID: 0004
+Revises: 0003
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE activities ALTER COLUMN payload "
+        "TYPE jsonb USING payload::jsonb"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_activities_payload_gin "
+        "ON activities USING gin (payload jsonb_path_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_activities_org_type_to "
+        "ON activities (organization_id, type, (payload ->> 'to'))"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_activities_org_type_from "
+        "ON activities (organization_id, type, (payload ->> 'from'))"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_activities_org_type_from")
+    op.execute("DROP INDEX IF EXISTS ix_activities_org_type_to")
+    op.execute("DROP INDEX IF EXISTS ix_activities_payload_gin")
+    op.execute(
+        "ALTER TABLE activities ALTER COLUMN payload "
+        "TYPE json USING payload::json"
+    )
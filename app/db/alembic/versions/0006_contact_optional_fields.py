@@ -0,0 +1,25 @@
+"""contacts.email / phone are optional, as in the API
+
+Revision ID: 0006
+Revises: 0005
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE contacts ALTER COLUMN email DROP NOT NULL")
+    op.execute("ALTER TABLE contacts ALTER COLUMN phone DROP NOT NULL")
+
+
+def downgrade() -> None:
+    # contacts saved without them get empty strings back
+    for column in ("email", "phone"):
+        op.execute(
+            f"UPDATE contacts SET {column} = '' WHERE {column} IS NULL"
+        )
+        op.execute(f"ALTER TABLE contacts ALTER COLUMN {column} SET NOT NULL")
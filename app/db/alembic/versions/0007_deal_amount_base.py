@@ -0,0 +1,43 @@
+"""deals.amount_base in the base currency (fx_rates)
+
+Revision ID: 0007
+Revises: 0006
+"""
+from alembic import op
+from sqlalchemy import text
+from app.core.config import settings
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # fx_rates itself is a new table, created from the models
+    op.execute(
+        "ALTER TABLE deals ADD COLUMN IF NOT EXISTS "
+        "amount_base NUMERIC(12, 2)"
+    )
+    op.execute(
+        text(
+            "UPDATE deals SET amount_base = amount WHERE currency = :base"
+        ).bindparams(base=settings.FX_BASE_CURRENCY)
+    )
+    op.execute(
+        """
+        UPDATE deals d
+           SET amount_base = d.amount * (
+               SELECT r.rate FROM fx_rates r
+                WHERE r.currency = d.currency
+                  AND (r.organization_id = d.organization_id
+                       OR r.organization_id IS NULL)
+                ORDER BY r.organization_id IS NULL
+                LIMIT 1)
+         WHERE d.amount_base IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE deals DROP COLUMN IF EXISTS amount_base")
@@ -0,0 +1,70 @@
+"""per-contact deal count / open amount / last activity
+
+Revision ID: 0008
+Revises: 0007
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_deals_contact_id": "deals (contact_id)",
+    "ix_contacts_org_deals_count": (
+        "contacts (organization_id, deals_count, id)"
+    ),
+    "ix_contacts_org_open_amount": (
+        "contacts (organization_id, open_amount, id)"
+    ),
+    "ix_contacts_org_last_activity": (
+        "contacts (organization_id, last_activity_at DESC NULLS LAST, id DESC)"
+    ),
+}
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS "
+        "deals_count INTEGER NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS "
+        "open_amount NUMERIC(12, 2) NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        "ALTER TABLE contacts ADD COLUMN IF NOT EXISTS "
+        "last_activity_at TIMESTAMP WITH TIME ZONE"
+    )
+    op.execute(
+        """
+        UPDATE contacts c
+           SET deals_count = agg.deals_count,
+               open_amount = agg.open_amount,
+               last_activity_at = agg.last_activity_at
+          FROM (
+            SELECT d.contact_id,
+                   count(*) AS deals_count,
+                   COALESCE(sum(d.amount_base) FILTER (
+                       WHERE d.status IN ('new', 'in_progress')), 0)
+                       AS open_amount,
+                   (SELECT max(a.created_at) FROM activities a
+                     JOIN deals d2 ON d2.id = a.deal_id
+                    WHERE d2.contact_id = d.contact_id)
+                       AS last_activity_at
+              FROM deals d
+             GROUP BY d.contact_id
+          ) agg
+         WHERE c.id = agg.contact_id
+        """
+    )
+    for name, target in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    for column in ("last_activity_at", "open_amount", "deals_count"):
+        op.execute(f"ALTER TABLE contacts DROP COLUMN IF EXISTS {column}")
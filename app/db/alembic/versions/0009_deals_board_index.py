@@ -0,0 +1,22 @@
+"""deals by organization and stage for the board
+
+Revision ID: 0009
+Revises: 0008
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_deals_org_stage "
+        "ON deals (organization_id, stage, created_at, id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_deals_org_stage")
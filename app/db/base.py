@@ -1,19 +1,78 @@
 from datetime import datetime
+from typing import Any
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import DateTime
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from sqlalchemy import DateTime, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.sql import func
+from app.core import deadline
 from app.core.config import settings
 
-async_engine = create_async_engine(
-    settings.DATABASE_URL,
-    future=True,
-    echo=False,
-)
+
+def is_in_memory(url: str | URL) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def make_engine(url: str | URL, **kwargs: Any) -> AsyncEngine:
+    """
+    Async engine for `url`. Postgres is the production backend;
+    `sqlite+aiosqlite://` (in-memory) or `sqlite+aiosqlite:///file.db`
+    runs the whole app and test suite in-process.
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, future=True, echo=False, **kwargs)
+
+    if is_in_memory(url):
+        # Each connection would get its own empty database, so keep exactly
+        # one: the data lives as long as it does, and concurrent sessions
+        # (requests, background workers) queue for it instead of
+        # interleaving their transactions on a shared connection.
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+        kwargs.setdefault("pool_size", 1)
+        kwargs.setdefault("max_overflow", 0)
+    engine = create_async_engine(url, future=True, echo=False, **kwargs)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # let SQLAlchemy emit BEGIN itself (see _on_begin): the driver's
+        # implicit transactions break SAVEPOINT / begin_nested()
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        # ondelete="CASCADE" needs enforced foreign keys
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_request_deadline(session, transaction, connection):
+    # every session transaction opened while serving a request is bounded
+    # by the request deadline, so a runaway query is cancelled server-side
+    # and its pooled connection comes back
+    if connection.dialect.name != "postgresql":
+        return
+    timeout = deadline.statement_timeout_ms()
+    if timeout is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+
+async_engine = make_engine(settings.DATABASE_URL)
 AsyncSessionLocal = async_sessionmaker(
     async_engine, class_=AsyncSession, expire_on_commit=False
 )
@@ -0,0 +1,93 @@
+"""
+Schema migrations for Postgres databases, as Alembic revisions in
+`app/db/alembic/versions` (`alembic upgrade head` / `alembic downgrade`
+work as usual from the repository root).
+
+Tables new to the models are created from them by the revision
+environment; the revisions alter tables that already existed. Databases
+migrated by the former runner (`schema_migrations`) are stamped with the
+last revision they had applied before upgrading.
+"""
+from logging import getLogger
+from pathlib import Path
+from typing import List
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import Script, ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.db.base import Base
+
+
+logger = getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).with_name("alembic")
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    """Alembic settings without alembic.ini; runs on `connection`."""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.attributes["connection"] = connection
+    return config
+
+
+def _pending(connection: Connection) -> List[Script]:
+    current = MigrationContext.configure(connection).get_current_heads()
+    script = ScriptDirectory.from_config(alembic_config())
+    return list(reversed(list(script.iterate_revisions("heads", current))))
+
+
+def _adopt_legacy(connection: Connection):
+    """Stamp databases migrated by the former `schema_migrations` runner."""
+    tables = inspect(connection).get_table_names()
+    if "alembic_version" in tables or "schema_migrations" not in tables:
+        return
+    latest = connection.scalar(text("SELECT max(id) FROM schema_migrations"))
+    connection.commit()
+    if latest:
+        # legacy ids are "<revision>_<description>"
+        command.stamp(alembic_config(connection), latest.split("_", 1)[0])
+
+
+def _upgrade(connection: Connection):
+    command.upgrade(alembic_config(connection), "head")
+
+
+def _downgrade(connection: Connection, revision: str):
+    command.downgrade(alembic_config(connection), revision)
+
+
+async def pending(engine: AsyncEngine) -> List[Script]:
+    """Revisions not yet applied, oldest first."""
+    if engine.dialect.name != "postgresql":
+        return []
+    async with engine.connect() as conn:
+        return await conn.run_sync(_pending)
+
+
+async def upgrade(engine: AsyncEngine) -> List[str]:
+    """
+    `alembic upgrade head` (each revision in its own transaction); returns
+    the revisions applied. Non-Postgres databases only get `create_all`.
+    """
+    if engine.dialect.name != "postgresql":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return []
+    async with engine.connect() as conn:
+        await conn.run_sync(_adopt_legacy)
+        todo = [script.revision for script in await conn.run_sync(_pending)]
+        logger.info(f"applying revisions {todo}")
+        await conn.run_sync(_upgrade)
+        await conn.commit()
+    return todo
+
+
+async def downgrade(engine: AsyncEngine, revision: str):
+    """`alembic downgrade <revision>`."""
+    async with engine.connect() as conn:
+        await conn.run_sync(_downgrade, revision)
+        await conn.commit()
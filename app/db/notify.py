@@ -0,0 +1,43 @@
+from sqlalchemy import DDL, Table, event
+from app.core.config import settings
+
+# Postgres-only: publish every inserted activity on a NOTIFY channel.
+# Only ids are sent (NOTIFY payloads are capped at 8000 bytes); the
+# listener loads full rows itself, once per batch of notifications.
+ACTIVITY_NOTIFY_FUNCTION = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION notify_activity_insert() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify(
+            '{settings.ACTIVITY_STREAM_CHANNEL}',
+            json_build_object(
+                'id', NEW.id,
+                'deal_id', NEW.deal_id,
+                'organization_id', NEW.organization_id
+            )::text
+        );
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """
+)
+
+# asyncpg prepares every statement, so one statement per DDL
+ACTIVITY_NOTIFY_TRIGGER = [
+    DDL("DROP TRIGGER IF EXISTS activities_notify_insert ON activities"),
+    DDL(
+        """
+        CREATE TRIGGER activities_notify_insert
+            AFTER INSERT ON activities
+            FOR EACH ROW EXECUTE FUNCTION notify_activity_insert()
+        """
+    ),
+]
+
+
+def install_activity_notify(table: Table):
+    """Create the NOTIFY trigger whenever `create_all` creates the table."""
+    for ddl in (ACTIVITY_NOTIFY_FUNCTION, *ACTIVITY_NOTIFY_TRIGGER):
+        event.listen(
+            table, "after_create", ddl.execute_if(dialect="postgresql")
+        )
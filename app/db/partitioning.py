@@ -0,0 +1,204 @@
+"""
+Optional declarative partitioning of the append-only `activities` table.
+
+    range: PARTITION BY RANGE (created_at), one partition per month plus a
+           default partition; old months can be detached for archiving.
+    hash:  PARTITION BY HASH (organization_id), a fixed number of buckets.
+
+`convert` rebuilds an existing plain table as a partitioned one (the id
+sequence, foreign keys, indexes and the NOTIFY trigger are carried over);
+`maintain` pre-creates future monthly partitions and detaches old ones.
+Postgres only.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from logging import getLogger
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.core.config import settings
+from app.db.notify import ACTIVITY_NOTIFY_FUNCTION, ACTIVITY_NOTIFY_TRIGGER
+
+
+logger = getLogger(__name__)
+
+TABLE = "activities"
+DEFAULT_PARTITION = f"{TABLE}_default"
+MODES = ("range", "hash")
+
+
+@dataclass
+class MaintenanceReport:
+    created: List[str] = field(default_factory=list)
+    detached: List[str] = field(default_factory=list)
+
+
+def month_start(day: date, shift: int = 0) -> date:
+    """First day of the month `shift` months away from `day`."""
+    months = day.year * 12 + day.month - 1 + shift
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def month_partition(start: date) -> str:
+    return f"{TABLE}_y{start.year}m{start.month:02d}"
+
+
+async def _exec(conn: AsyncConnection, sql: str):
+    return await conn.execute(text(sql))
+
+
+async def current_mode(conn: AsyncConnection) -> str:
+    """'range', 'hash' or 'none' for the live `activities` table."""
+    q = await _exec(
+        conn,
+        # "char" comes back as bytes from asyncpg
+        "SELECT p.partstrat::text FROM pg_partitioned_table p "
+        f"JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = '{TABLE}'",
+    )
+    strategy = q.scalar()
+    return {"r": "range", "h": "hash"}.get(strategy, "none")
+
+
+async def _create_month(conn: AsyncConnection, start: date) -> str | None:
+    """
+    Create the partition for the month starting at `start` if missing.
+    Rows already sitting in the default partition for that month are moved
+    into it first, otherwise Postgres refuses the attach.
+    """
+    name = month_partition(start)
+    q = await _exec(conn, f"SELECT to_regclass('{name}')")
+    if q.scalar() is not None:
+        return None
+    lo, hi = start.isoformat(), month_start(start, 1).isoformat()
+    await _exec(
+        conn,
+        f"CREATE TABLE {name} "
+        f"(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+    )
+    await _exec(
+        conn,
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE created_at >= '{lo}' AND created_at < '{hi}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+    )
+    await _exec(
+        conn,
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lo}') TO ('{hi}')",
+    )
+    return name
+
+
+async def convert(
+    conn: AsyncConnection,
+    mode: str = settings.ACTIVITY_PARTITIONING,
+    hash_partitions: int = settings.ACTIVITY_HASH_PARTITIONS,
+) -> bool:
+    """
+    Rebuild `activities` as a partitioned table in one transaction.
+    Returns False when it already is partitioned.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown partitioning mode: {mode}")
+    if await current_mode(conn) != "none":
+        return False
+
+    old = f"{TABLE}_unpartitioned"
+    key = "created_at" if mode == "range" else "organization_id"
+    strategy = "RANGE" if mode == "range" else "HASH"
+    await _exec(conn, f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+    await _exec(conn, f"ALTER TABLE {TABLE} RENAME TO {old}")
+    await _exec(
+        conn,
+        f"CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS) "
+        f"PARTITION BY {strategy} ({key})",
+    )
+    # the partition key has to be part of the primary key
+    await _exec(conn, f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, {key})")
+
+    if mode == "range":
+        await _exec(
+            conn, f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"
+        )
+        q = await _exec(conn, f"SELECT min(created_at)::date FROM {old}")
+        first = month_start(q.scalar() or date.today())
+        last = month_start(
+            date.today(), settings.ACTIVITY_PARTITION_MONTHS_AHEAD
+        )
+        start = first
+        while start <= last:
+            await _create_month(conn, start)
+            start = month_start(start, 1)
+    else:
+        for i in range(hash_partitions):
+            await _exec(
+                conn,
+                f"CREATE TABLE {TABLE}_h{i:02d} PARTITION OF {TABLE} "
+                f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {i})",
+            )
+
+    await _exec(conn, f"INSERT INTO {TABLE} SELECT * FROM {old}")
+    await _exec(conn, f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    await _exec(conn, f"DROP TABLE {old}")
+
+    for statement in (
+        f"ALTER TABLE {TABLE} ADD FOREIGN KEY (deal_id) "
+        "REFERENCES deals (id) ON DELETE CASCADE",
+        f"ALTER TABLE {TABLE} ADD FOREIGN KEY (organization_id) "
+        "REFERENCES organizations (id) ON DELETE CASCADE",
+        f"ALTER TABLE {TABLE} ADD FOREIGN KEY (author_id) REFERENCES users (id)",
+        f"CREATE INDEX ix_activities_deal_id ON {TABLE} (deal_id)",
+        f"CREATE INDEX ix_activities_org_id ON {TABLE} (organization_id, id)",
+        f"CREATE INDEX ix_activities_created_at ON {TABLE} (created_at)",
+        f"CREATE INDEX ix_activities_payload_gin ON {TABLE} "
+        "USING gin (payload jsonb_path_ops)",
+        f"CREATE INDEX ix_activities_org_type_to ON {TABLE} "
+        "(organization_id, type, (payload ->> 'to'))",
+        f"CREATE INDEX ix_activities_org_type_from ON {TABLE} "
+        "(organization_id, type, (payload ->> 'from'))",
+        str(ACTIVITY_NOTIFY_FUNCTION.statement),
+        *(str(ddl.statement) for ddl in ACTIVITY_NOTIFY_TRIGGER),
+    ):
+        await _exec(conn, statement)
+    logger.info(f"{TABLE} converted to {mode} partitioning")
+    return True
+
+
+async def maintain(
+    conn: AsyncConnection,
+    months_ahead: int = settings.ACTIVITY_PARTITION_MONTHS_AHEAD,
+    retention_months: int = settings.ACTIVITY_PARTITION_RETENTION_MONTHS,
+    today: date | None = None,
+) -> MaintenanceReport:
+    """
+    Range mode: make sure partitions exist from the current month up to
+    `months_ahead`, and detach months older than `retention_months` (the
+    detached tables stay in place for archiving or `DROP TABLE`).
+    """
+    report = MaintenanceReport()
+    if await current_mode(conn) != "range":
+        return report
+    today = today or date.today()
+
+    for shift in range(months_ahead + 1):
+        name = await _create_month(conn, month_start(today, shift))
+        if name:
+            report.created.append(name)
+
+    if retention_months > 0:
+        cutoff = month_partition(month_start(today, -retention_months))
+        q = await _exec(
+            conn,
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            f"WHERE p.relname = '{TABLE}' ORDER BY c.relname",
+        )
+        for name in q.scalars().all():
+            # names sort chronologically: activities_yYYYYmMM
+            if name != DEFAULT_PARTITION and name < cutoff:
+                await _exec(
+                    conn, f"ALTER TABLE {TABLE} DETACH PARTITION {name}"
+                )
+                report.detached.append(name)
+    return report
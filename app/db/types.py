@@ -0,0 +1,35 @@
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import BigInteger, Numeric
+from sqlalchemy.types import TypeDecorator
+
+CENTS = Decimal("0.01")
+# largest value NUMERIC(12, 2) holds
+MONEY_MAX = Decimal("9999999999.99")
+
+
+class Money(TypeDecorator):
+    """
+    NUMERIC(12, 2) on Postgres. SQLite has no decimal type (NUMERIC
+    affinity stores floats), so there amounts are kept as integer cents:
+    sums and comparisons stay exact, and values read back as Decimal on
+    both backends.
+    """
+
+    impl = Numeric(12, 2)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(BigInteger())
+        return dialect.type_descriptor(Numeric(12, 2))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        cents = Decimal(str(value)) * 100
+        return int(cents.to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return (Decimal(value) / 100).quantize(CENTS)
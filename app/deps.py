@@ -1,9 +1,11 @@
-from typing import Annotated, TYPE_CHECKING
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, TYPE_CHECKING
 from fastapi import Depends, HTTPException, Header
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.base import get_db
 from app.core.security import decode_token
+from app.models.models import RoleEnum
 from app.repositories.org_member_repo import OrganizationMemberRepository
 from app.repositories.user_repo import UserRepository
 from app.repositories.org_repo import OrgRepository
@@ -13,12 +15,10 @@ if TYPE_CHECKING:
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(
+async def get_token_claims(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncSession = Depends(get_db),
-) -> "User":
-    """Get the current authenticated user based on the Authorization header."""
-    print(f"Token: {token}")
+) -> Dict[str, Any]:
+    """Decode the bearer access token (once per request)."""
     if not token:
         raise HTTPException(
             status_code=401, detail="Missing authorization header"
@@ -26,10 +26,19 @@ async def get_current_user(
 
     try:
         payload = decode_token(token)
-        user_id = payload.get("sub")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid auth header")
+    # refresh tokens are only accepted by /auth/refresh
+    if payload.get("typ", "access") != "access":
+        raise HTTPException(status_code=401, detail="Invalid auth header")
+    return payload
+
 
+async def get_current_user(
+    payload: Dict[str, Any] = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db),
+) -> "User":
+    """Get the current authenticated user based on the Authorization header."""
     sub = payload.get("sub")
     user = None
 
@@ -43,11 +52,37 @@ async def get_current_user(
     return user
 
 
+@dataclass(frozen=True)
+class CurrentOrg:
+    """The organization a request acts in, with the caller's role there."""
+
+    id: int
+    role: RoleEnum
+    user_id: int
+
+
+def _org_from_claims(
+    payload: Dict[str, Any], user: "User", org_id: int
+) -> CurrentOrg | None:
+    """
+    Membership embedded in the access token, if it is still current:
+    a bumped `membership_version` invalidates every embedded claim.
+    """
+    orgs = payload.get("orgs")
+    if not orgs or payload.get("mv") != user.membership_version:
+        return None
+    role = orgs.get(str(org_id))
+    if role is None:
+        return None
+    return CurrentOrg(id=org_id, role=RoleEnum(role), user_id=user.id)
+
+
 async def get_current_org(
     current_user: "User" = Depends(get_current_user),
+    payload: Dict[str, Any] = Depends(get_token_claims),
     x_org_id: int | None = Header(None, alias="X-Organization-Id"),
     session: AsyncSession = Depends(get_db),
-):
+) -> CurrentOrg:
     """Get the current organization based on X-Organization-Id header."""
 
     if not x_org_id:
@@ -55,16 +90,24 @@ async def get_current_org(
             status_code=400, detail="X-Organization-Id header required"
         )
 
-    org_repo = OrgRepository(session)
-    org = await org_repo.get(x_org_id)
-    if not org:
-        raise HTTPException(status_code=404, detail="Organization not found")
+    current = _org_from_claims(payload, current_user, x_org_id)
+    if current is not None:
+        return current
 
     mem_repo = OrganizationMemberRepository(session)
-    membership = await mem_repo.get_by_user_and_org(current_user.id, org.id)
+    membership = await mem_repo.get_by_user_and_org(current_user.id, x_org_id)
     if not membership:
+        # only the failure path needs to tell 404 from 403
+        if not await OrgRepository(session).exists(id=x_org_id):
+            raise HTTPException(
+                status_code=404, detail="Organization not found"
+            )
         raise HTTPException(
             status_code=403, detail="Not allowed in this organization"
         )
 
-    return org
+    return CurrentOrg(
+        id=membership.organization_id,
+        role=RoleEnum(membership.role),
+        user_id=current_user.id,
+    )
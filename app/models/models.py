@@ -4,14 +4,19 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Enum,
-    Numeric,
+    Index,
     JSON,
+    Numeric,
     String,
     UniqueConstraint,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, mapped_column, Mapped
 from app.db.base import Base
+from app.db.notify import install_activity_notify
+from app.db.types import Money
 import enum
 
 
@@ -53,6 +58,11 @@ class User(Base):
     email: Mapped[str] = mapped_column(unique=True, index=True)
     hashed_password: Mapped[str]
     name: Mapped[Optional[str]]
+    # bumped on every membership change; access tokens embedding
+    # memberships carry it as "mv" and are ignored once it moves on
+    membership_version: Mapped[int] = mapped_column(
+        default=0, server_default="0"
+    )
     organizations: Mapped[List["Organization"]] = relationship(
         "Organization", secondary="organization_members"
     )
@@ -88,27 +98,72 @@ class OrganizationMember(Base):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        # contact lists sorted by an aggregate within an organization
+        Index(
+            "ix_contacts_org_deals_count",
+            "organization_id",
+            "deals_count",
+            "id",
+        ),
+        Index(
+            "ix_contacts_org_open_amount",
+            "organization_id",
+            "open_amount",
+            "id",
+        ),
+        # SQLite indexes take no NULLS LAST
+        Index(
+            "ix_contacts_org_last_activity",
+            "organization_id",
+            text("last_activity_at DESC NULLS LAST"),
+            text("id DESC"),
+        ).ddl_if(dialect="postgresql"),
+    )
     organization_id: Mapped[int] = mapped_column(
         ForeignKey("organizations.id", ondelete="CASCADE")
     )
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     name: Mapped[str]
-    email: Mapped[str]
-    phone: Mapped[str]
+    email: Mapped[Optional[str]]
+    phone: Mapped[Optional[str]]
+    # maintained by DealService / ActivityService (ContactRepository):
+    # all deals, open (new / in progress) deals' amount_base, and the
+    # time of the latest activity on any of the contact's deals
+    deals_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    open_amount = mapped_column(Money(), default=0, server_default="0")
+    last_activity_at: Mapped[Optional[dt.datetime]] = mapped_column(
+        DateTime(timezone=True)
+    )
 
 
 class Deal(Base):
     __tablename__ = "deals"
+    __table_args__ = (
+        # the board / list partition an organization's deals by stage
+        Index(
+            "ix_deals_org_stage",
+            "organization_id",
+            "stage",
+            "created_at",
+            "id",
+        ),
+    )
     organization_id: Mapped[int] = mapped_column(
         ForeignKey("organizations.id", ondelete="CASCADE")
     )
-    contact_id: Mapped[int] = mapped_column(ForeignKey("contacts.id"))
+    contact_id: Mapped[int] = mapped_column(
+        ForeignKey("contacts.id"), index=True
+    )
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     title: Mapped[str]
-    amount = mapped_column(Numeric(12, 2), default=0)
+    amount = mapped_column(Money(), default=0)
     currency: Mapped[str] = mapped_column(
         String(3), default="USD"
     )  # "USD", "EUR", etc.
+    # amount in FX_BASE_CURRENCY at the current rate (see FxService);
+    # NULL while the deal's currency has no rate
+    amount_base = mapped_column(Money(), nullable=True)
     status: Mapped[enum.Enum] = mapped_column(
         Enum(DealStatus),
         default=DealStatus.new,
@@ -125,25 +180,199 @@ class Deal(Base):
     tasks: Mapped[List["Task"]] = relationship("Task", back_populates="deal")
 
 
+class FxRate(Base):
+    """
+    Value of one unit of `currency` in FX_BASE_CURRENCY. Rows without an
+    organization are shared defaults (`python -m app fx-rates`), an
+    organization's own rows override them. `version` is bumped on every
+    load, so workers notice changes with a single max() query.
+    """
+
+    __tablename__ = "fx_rates"
+    __table_args__ = (
+        Index(
+            "uq_fx_rates_shared",
+            "currency",
+            unique=True,
+            postgresql_where=text("organization_id IS NULL"),
+            sqlite_where=text("organization_id IS NULL"),
+        ),
+        Index(
+            "uq_fx_rates_org",
+            "organization_id",
+            "currency",
+            unique=True,
+            postgresql_where=text("organization_id IS NOT NULL"),
+            sqlite_where=text("organization_id IS NOT NULL"),
+        ),
+    )
+    organization_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE")
+    )
+    currency: Mapped[str] = mapped_column(String(3))
+    rate = mapped_column(Numeric(18, 8))
+    version: Mapped[int] = mapped_column(default=0, index=True)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True),
+        onupdate=func.now(),
+        server_default=func.now(),
+        default=func.now(),
+    )
+
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # reminder scan: open, not yet reminded tasks ordered by due date
+        Index(
+            "ix_tasks_is_done_due_date",
+            "is_done",
+            "due_date",
+            postgresql_where=text("reminded_at IS NULL"),
+        ),
+        # tenant-scoped task lists without joining deals
+        Index(
+            "ix_tasks_org_open_due", "organization_id", "is_done", "due_date"
+        ),
+    )
     deal: Mapped["Deal"] = relationship("Deal", back_populates="tasks")
     deal_id: Mapped[int] = mapped_column(
         ForeignKey("deals.id", ondelete="CASCADE"),
     )
+    # denormalized from the deal
+    organization_id: Mapped[int] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE")
+    )
+    owner_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
     title: Mapped[str]
     description: Mapped[str]
     due_date: Mapped[Optional[dt.datetime]] = mapped_column(
         DateTime(timezone=True),
     )
     is_done: Mapped[bool] = mapped_column(default=False)
+    reminded_at: Mapped[Optional[dt.datetime]] = mapped_column(
+        DateTime(timezone=True),
+    )
 
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        # org-wide feeds and stream replay: range scan on (org, id)
+        Index("ix_activities_org_id", "organization_id", "id"),
+        # archival scan: oldest rows first
+        Index("ix_activities_created_at", "created_at"),
+        # payload predicates (Postgres): containment via GIN, plus the
+        # status/stage transition keys used by timeline filters/analytics
+        Index(
+            "ix_activities_payload_gin",
+            "payload",
+            postgresql_using="gin",
+            postgresql_ops={"payload": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_activities_org_type_to",
+            "organization_id",
+            "type",
+            text("(payload ->> 'to')"),
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_activities_org_type_from",
+            "organization_id",
+            "type",
+            text("(payload ->> 'from')"),
+        ).ddl_if(dialect="postgresql"),
+    )
     deal_id: Mapped[int] = mapped_column(
         ForeignKey("deals.id", ondelete="CASCADE"),
+        index=True,
+    )
+    # denormalized from the deal
+    organization_id: Mapped[int] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE")
     )
     author_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
     type: Mapped[str]  # comment, status_changed, task_created, system
+    payload = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+
+
+install_activity_notify(Activity.__table__)  # type: ignore
+
+
+class ActivityArchive(Base):
+    """
+    Summary row left behind for activities moved to cold storage: one per
+    deal and month, pointing at the per-org, per-month archive file.
+    """
+
+    __tablename__ = "activity_archives"
+    __table_args__ = (
+        UniqueConstraint(
+            "deal_id", "period", name="uq_activity_archive_deal_period"
+        ),
+        Index("ix_activity_archives_deal_max_id", "deal_id", "max_id"),
+    )
+    organization_id: Mapped[int] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE")
+    )
+    deal_id: Mapped[int] = mapped_column(
+        ForeignKey("deals.id", ondelete="CASCADE")
+    )
+    period: Mapped[dt.date]  # first day of the archived month
+    path: Mapped[str]  # relative to ACTIVITY_ARCHIVE_DIR
+    row_count: Mapped[int] = mapped_column(default=0)
+    min_id: Mapped[int]
+    max_id: Mapped[int]
+
+
+class OutboxEvent(Base):
+    """
+    Transactional outbox: written in the same transaction as the activity
+    it describes, delivered to sinks by `app.workers.outbox`.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # only undelivered rows are ever scanned by the dispatcher
+        Index(
+            "ix_outbox_events_pending",
+            "available_at",
+            "id",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
+    topic: Mapped[str] = mapped_column(String(64))
     payload = mapped_column(JSON)
+    attempts: Mapped[int] = mapped_column(default=0)
+    last_error: Mapped[Optional[str]]
+    available_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), default=func.now()
+    )
+    processed_at: Mapped[Optional[dt.datetime]] = mapped_column(
+        DateTime(timezone=True)
+    )
+
+
+class RevokedToken(Base):
+    """Refresh token ids that were rotated away or revoked."""
+
+    __tablename__ = "revoked_tokens"
+    jti: Mapped[str] = mapped_column(String(32), unique=True)
+    # rows can be purged once the token itself has expired
+    expires_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+
+
+class RateLimitCounter(Base):
+    """Fixed-window attempt counters shared by all workers."""
+
+    __tablename__ = "rate_limit_counters"
+    __table_args__ = (
+        UniqueConstraint("key", "window_start", name="uq_rate_limit_window"),
+    )
+    key: Mapped[str] = mapped_column(String(320))
+    window_start: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), index=True
+    )
+    count: Mapped[int] = mapped_column(default=0)
@@ -1,64 +1,249 @@
-from sqlalchemy import Select, select
-from typing import Any, Optional, Sequence, Tuple, Type, TypeVar, Generic
+from dataclasses import dataclass
+from sqlalchemy import (
+    Row,
+    Select,
+    delete,
+    event,
+    func,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Generic,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 T = TypeVar("T")
+S = TypeVar("S")
+
+
+@dataclass(frozen=True)
+class Scope:
+    """
+    Rows a request may see: its organization and, for the member role,
+    only rows it owns (`owner_id`). Repositories built with a scope add
+    these predicates to every statement they issue.
+    """
+
+    org_id: int
+    owner_id: int | None = None
 
 
 class BaseRepository(Generic[T]):
     model: Type[T]
+    # column holding the owning user; None means rows are org-wide
+    owner_field: str | None = None
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, scope: Scope | None = None):
         self.session = session
+        self.scope = scope
+
+    def scope_conditions(self) -> list:
+        """Org / ownership predicates of `self.scope` for this model."""
+        if self.scope is None:
+            return []
+        conditions = []
+        if hasattr(self.model, "organization_id"):
+            conditions.append(
+                self.model.organization_id == self.scope.org_id  # type: ignore
+            )
+        if self.scope.owner_id is not None and self.owner_field:
+            conditions.append(
+                getattr(self.model, self.owner_field) == self.scope.owner_id
+            )
+        return conditions
+
+    def scoped(self, statement: S) -> S:
+        """Restrict a SELECT / UPDATE / DELETE to the repository scope."""
+        conditions = self.scope_conditions()
+        if not conditions:
+            return statement
+        return statement.where(*conditions)  # type: ignore
+
+    def select(self) -> Select[Tuple[T]]:
+        return self.scoped(select(self.model))
+
+    def in_scope(self, subject: T) -> bool:
+        """
+        Can an already loaded subject be returned without asking the
+        database? Subclasses whose scope is not a column of their own
+        (see ActivityRepository) return False for owner scopes.
+        """
+        if self.scope is None:
+            return True
+        org_id = getattr(subject, "organization_id", self.scope.org_id)
+        if org_id != self.scope.org_id:
+            return False
+        if self.scope.owner_id is not None and self.owner_field:
+            return getattr(subject, self.owner_field) == self.scope.owner_id
+        return True
+
+    # Per-session caches. The session lives for one request, so does the
+    # identity map (loaded rows) and `session.info` (ids known missing);
+    # repositories of the same session share both. Known misses are
+    # forgotten on every flush and transaction end (see below).
+
+    def _cached(self, id: int) -> Optional[T]:
+        subject = self.session.identity_map.get(identity_key(self.model, id))
+        if subject is None:
+            return None
+        state = inspect(subject)
+        if state.expired_attributes or state.deleted or state.was_deleted:
+            return None
+        return subject  # type: ignore
+
+    def _misses(self) -> set:
+        return self.session.info.setdefault("repository_misses", set())
+
+    def _miss_key(self, id: int) -> tuple:
+        return (self.model, id, self.scope)
 
     async def get(self, id: int) -> Optional[T]:
-        """Get a subject by its ID."""
-        q = await self.session.execute(select(self.model).filter_by(id=id))
-        return q.scalar_one_or_none()
+        """
+        Get a subject by its ID. Repeat lookups in the same session cost
+        no query: hits come from the identity map, misses are remembered.
+        """
+        subject = self._cached(id)
+        if subject is not None and self.in_scope(subject):
+            return subject
+        if self._miss_key(id) in self._misses():
+            return None
+        q = await self.session.execute(self.select().filter_by(id=id))
+        subject = q.scalar_one_or_none()
+        if subject is None:
+            self._misses().add(self._miss_key(id))
+        return subject
+
+    async def get_many(self, ids: Iterable[int]) -> Dict[int, T]:
+        """
+        Subjects by ID in a single `IN` query; missing ids are absent.
+        Ids already in the identity map (or known missing) are not queried.
+        """
+        found: Dict[int, T] = {}
+        wanted = set()
+        misses = self._misses()
+        for id in set(ids):
+            subject = self._cached(id)
+            if subject is not None and self.in_scope(subject):
+                found[id] = subject
+            elif self._miss_key(id) not in misses:
+                wanted.add(id)
+        if wanted:
+            q = await self.session.execute(
+                self.select().filter(self.model.id.in_(wanted))  # type: ignore
+            )
+            for subject in q.scalars():
+                found[subject.id] = subject  # type: ignore
+            misses.update(self._miss_key(id) for id in wanted - found.keys())
+        return found
 
-    async def list_all(self) -> Sequence[T]:
-        """List all subjects."""
-        q = await self.session.execute(select(self.model))
+    async def prefetch(self, ids: Iterable[int]) -> None:
+        """
+        Warm the session caches for `ids` with one query, typically the
+        foreign keys of rows loaded by another repository
+        (`ContactRepository(db).prefetch(d.contact_id for d in deals)`):
+        later `get` calls for them are then free. The identity map only
+        holds weak references, so the session keeps the loaded rows.
+        """
+        found = await self.get_many(ids)
+        self.session.info.setdefault("repository_prefetched", []).extend(
+            found.values()
+        )
+
+    async def list_all(
+        self, limit: int | None = None, offset: int = 0
+    ) -> Sequence[T]:
+        """List all subjects, optionally one page of them."""
+        q = await self.session.execute(
+            self.select().order_by(self.model.id)  # type: ignore
+            .offset(offset)
+            .limit(limit)
+        )
         return q.scalars().all()
 
     async def list_by(self, **filters: Any) -> Sequence[T]:
         """List subjects filtered by given criteria."""
-        q = await self.session.execute(select(self.model).filter_by(**filters))
+        q = await self.session.execute(self.select().filter_by(**filters))
         return q.scalars().all()
 
-    async def apply_filters(
-        self, **filters: Any
-    ) -> Optional[Select[Tuple[T]]]:
+    def apply_filters(self, **filters: Any) -> Select[Tuple[T]]:
         """Apply filters to a query."""
-        query = select(self.model)
+        query = self.select()
         for attr, value in filters.items():
             query = query.filter(getattr(self.model, attr) == value)
         return query
 
+    async def exists(self, *conditions: Any, **filters: Any) -> bool:
+        """
+        `SELECT EXISTS (...)`: nothing is loaded. Lookups by id are
+        answered from the session caches when possible.
+        """
+        if not conditions and "id" in filters:
+            subject = self._cached(filters["id"])
+            if subject is not None and self.in_scope(subject):
+                return all(
+                    getattr(subject, k) == v for k, v in filters.items()
+                )
+            if self._miss_key(filters["id"]) in self._misses():
+                return False
+        query = self.select().filter(*conditions).filter_by(**filters)
+        return bool(await self.session.scalar(select(query.exists())))
+
+    async def count(self, *conditions: Any, **filters: Any) -> int:
+        """`SELECT count(*)` of the matching subjects."""
+        query = self.scoped(
+            select(func.count()).select_from(self.model)  # type: ignore
+        )
+        query = query.filter(*conditions).filter_by(**filters)
+        return await self.session.scalar(query) or 0
+
+    async def project(
+        self, *columns: str, **filters: Any
+    ) -> Sequence[Row[Any]]:
+        """
+        Only the given columns of the matching subjects, as lightweight
+        rows (`row.id`, `row.title`) instead of ORM objects.
+        """
+        query = self.scoped(
+            select(*(getattr(self.model, c) for c in columns))
+        ).filter_by(**filters)
+        q = await self.session.execute(query)
+        return q.all()
+
+    # Writes are only added to the session: the unit of work flushes
+    # them together on commit (or autoflush before the next query).
+    # Callers that need generated values (ids) right away flush.
+
     async def create(self, subject: T) -> T:
         """Create a new subject."""
         self.session.add(subject)
-        await self.session.flush()
         return subject
 
     async def create_from_payload(self, **payload: Any) -> T:
         """Create a new subject from payload."""
         subject = self.model(**payload)  # type: ignore
-        self.session.add(subject)
-        await self.session.flush()
-        return subject
+        return await self.create(subject)
 
     async def delete(self, subject: T):
         """Delete a subject."""
         await self.session.delete(subject)
-        await self.session.flush()
 
     async def update(self, subject: T, **payload: Any) -> T:
         """Update a subject with given payload."""
         for key, value in payload.items():
             setattr(subject, key, value)
         self.session.add(subject)
-        await self.session.flush()
         return subject
 
     async def update_by_object(self, subject: T, **payload: Any) -> T:
@@ -66,5 +251,37 @@ class BaseRepository(Generic[T]):
         for key, value in payload.items():
             setattr(subject, key, value)
         self.session.add(subject)
-        await self.session.flush()
         return subject
+
+    async def update_where(self, id: int, **values: Any) -> Optional[T]:
+        """
+        `UPDATE ... WHERE id = :id AND <scope> RETURNING *` in one statement;
+        None when the row does not exist or is outside the scope.
+        """
+        q = await self.session.execute(
+            self.scoped(update(self.model).where(self.model.id == id))  # type: ignore
+            .values(**values)
+            .returning(self.model)
+            .execution_options(synchronize_session="fetch")
+        )
+        return q.scalar_one_or_none()
+
+    async def delete_where(self, id: int) -> Optional[T]:
+        """
+        `DELETE ... WHERE id = :id AND <scope> RETURNING *`; returns the
+        deleted row, or None when nothing in scope matched.
+        """
+        q = await self.session.execute(
+            self.scoped(delete(self.model).where(self.model.id == id))  # type: ignore
+            .returning(self.model)
+            .execution_options(synchronize_session="fetch")
+        )
+        return q.scalar_one_or_none()
+
+
+@event.listens_for(Session, "after_flush")
+@event.listens_for(Session, "after_transaction_end")
+def _forget_misses(session, *_):
+    # a flush may have inserted a remembered id; after a commit or
+    # rollback other transactions' rows become visible
+    session.info.pop("repository_misses", None)
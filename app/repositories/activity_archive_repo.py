@@ -0,0 +1,68 @@
+from datetime import date
+from typing import Sequence
+from sqlalchemy import select
+from app.models.models import ActivityArchive
+from app.repositories import BaseRepository
+from app.repositories.activity_repo import in_owned_deals
+
+
+class ActivityArchiveRepository(BaseRepository[ActivityArchive]):
+    model = ActivityArchive
+
+    def scope_conditions(self) -> list:
+        conditions = super().scope_conditions()
+        if self.scope is not None and self.scope.owner_id is not None:
+            conditions.append(in_owned_deals(self.model.deal_id, self.scope))
+        return conditions
+
+    def in_scope(self, subject) -> bool:
+        # deal ownership is not visible on the row itself: ask the database
+        return super().in_scope(subject) and (
+            self.scope is None or self.scope.owner_id is None
+        )
+
+    async def list_for_deal(
+        self, deal_id: int, org_id: int, before_id: int | None = None
+    ) -> Sequence[ActivityArchive]:
+        """Archive segments of a deal, newest first."""
+        conditions = [
+            self.model.deal_id == deal_id,
+            self.model.organization_id == org_id,
+        ]
+        if before_id is not None:
+            conditions.append(self.model.min_id < before_id)
+        q = await self.session.execute(
+            self.select()
+            .filter(*conditions)
+            .order_by(self.model.max_id.desc())
+        )
+        return q.scalars().all()
+
+    async def add_rows(
+        self,
+        organization_id: int,
+        deal_id: int,
+        period: date,
+        path: str,
+        ids: Sequence[int],
+    ) -> ActivityArchive:
+        """Create or extend the summary row of a deal's archived month."""
+        q = await self.session.execute(
+            select(self.model).filter_by(deal_id=deal_id, period=period)
+        )
+        segment = q.scalar_one_or_none()
+        if segment is None:
+            segment = ActivityArchive(
+                organization_id=organization_id,
+                deal_id=deal_id,
+                period=period,
+                path=path,
+                row_count=0,
+                min_id=min(ids),
+                max_id=max(ids),
+            )
+            self.session.add(segment)
+        segment.row_count += len(ids)
+        segment.min_id = min(segment.min_id, *ids)
+        segment.max_id = max(segment.max_id, *ids)
+        return segment
@@ -1,27 +1,223 @@
-from sqlalchemy import select
-from app.models.models import Activity
-from app.repositories import BaseRepository
+from datetime import datetime
+from typing import Mapping, Sequence
+from sqlalchemy import (
+    String,
+    delete,
+    literal_column,
+    select,
+    type_coerce,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from app.models.models import Activity, Deal
+from app.repositories import BaseRepository, Scope
+from app.repositories.outbox_repo import OutboxRepository
 
 
 class ActivityRepository(BaseRepository[Activity]):
     model = Activity
 
-    async def list_by_deal(self, deal_id: int):
-        """List activities by deal ID."""
+    def scope_conditions(self) -> list:
+        """Activities have no owner: a member sees those of own deals."""
+        conditions = super().scope_conditions()
+        if self.scope is not None and self.scope.owner_id is not None:
+            conditions.append(in_owned_deals(self.model.deal_id, self.scope))
+        return conditions
+
+    def in_scope(self, subject) -> bool:
+        # deal ownership is not visible on the row itself: ask the database
+        return super().in_scope(subject) and (
+            self.scope is None or self.scope.owner_id is None
+        )
+
+    async def page_by_deal(
+        self,
+        deal_id: int,
+        org_id: int,
+        before_id: int | None = None,
+        limit: int = 100,
+    ) -> Sequence[Activity]:
+        """
+        Up to `limit` activities of a deal below `before_id`, newest first.
+        The organization and "not older than the deal" predicates are
+        redundant as filters but let Postgres prune hash / range
+        partitions (the latter at execution time, once the deal's
+        created_at is known).
+        """
+        deal_created = (
+            select(Deal.created_at)
+            .where(Deal.id == deal_id)
+            .scalar_subquery()
+        )
+        conditions = [
+            self.model.deal_id == deal_id,
+            self.model.organization_id == org_id,
+            self.model.created_at >= deal_created,
+        ]
+        if before_id is not None:
+            conditions.append(self.model.id < before_id)
         q = await self.session.execute(
-            select(self.model).filter_by(deal_id=deal_id)
+            self.select()
+            .filter(*conditions)
+            .order_by(self.model.id.desc())
+            .limit(limit)
         )
         return q.scalars().all()
 
+    def payload_conditions(self, payload: Mapping[str, str]) -> list:
+        """
+        SQL predicates for `payload[key] == value`. On Postgres this is
+        one `payload @> {...}` containment test served by the GIN index;
+        other dialects compare the extracted text values.
+        """
+        if not payload:
+            return []
+        if self.session.bind.dialect.name == "postgresql":
+            return [type_coerce(self.model.payload, JSONB).contains(payload)]
+        return [payload_text(key) == value for key, value in payload.items()]
+
+    async def query(
+        self,
+        org_id: int,
+        *,
+        deal_id: int | None = None,
+        types: Sequence[str] | None = None,
+        payload: Mapping[str, str] | None = None,
+        before_id: int | None = None,
+        limit: int = 100,
+    ) -> Sequence[Activity]:
+        """
+        Organization activities filtered by deal, type and payload fields,
+        newest first, keyset-paged by `before_id`.
+        """
+        conditions = [self.model.organization_id == org_id]
+        if deal_id is not None:
+            conditions.append(self.model.deal_id == deal_id)
+        if types:
+            conditions.append(self.model.type.in_(types))
+        if before_id is not None:
+            conditions.append(self.model.id < before_id)
+        conditions.extend(self.payload_conditions(payload or {}))
+        q = await self.session.execute(
+            self.select()
+            .filter(*conditions)
+            .order_by(self.model.id.desc())
+            .limit(limit)
+        )
+        return q.scalars().all()
+
+    async def claim_older_than(
+        self, older_than: datetime, limit: int
+    ) -> Sequence[Activity]:
+        """Lock the oldest activities created before `older_than`."""
+        q = await self.session.execute(
+            select(self.model)
+            .filter(self.model.created_at < older_than)
+            .order_by(self.model.created_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return q.scalars().all()
+
+    async def delete_ids(self, ids: Sequence[int]):
+        """Delete activities by id in one statement."""
+        await self.session.execute(
+            delete(self.model).filter(self.model.id.in_(ids))
+        )
+
+    async def list_by_org_after(
+        self,
+        org_id: int,
+        after_id: int,
+        deal_id: int | None = None,
+        limit: int = 500,
+    ) -> Sequence[Activity]:
+        """Activities of an organization with id > `after_id`, oldest first."""
+        conditions = [
+            Activity.organization_id == org_id,
+            Activity.id > after_id,
+        ]
+        if deal_id is not None:
+            conditions.append(Activity.deal_id == deal_id)
+        q = await self.session.execute(
+            self.select()
+            .filter(*conditions)
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        return q.scalars().all()
+
+    async def create(self, subject: Activity) -> Activity:
+        """
+        Create an activity and its outbox event. The activity is flushed
+        right away: the event carries its id.
+        """
+        self.session.add(subject)
+        await self.session.flush()
+        OutboxRepository(self.session).enqueue(
+            f"activity.{subject.type}", activity_event(subject)
+        )
+        return subject
+
+    async def create_many(
+        self, activities: Sequence[Activity]
+    ) -> Sequence[Activity]:
+        """Insert many activities in one flush, then their outbox events."""
+        self.session.add_all(activities)
+        await self.session.flush()
+        outbox = OutboxRepository(self.session)
+        for act in activities:
+            outbox.enqueue(f"activity.{act.type}", activity_event(act))
+        return activities
+
     async def create_for(
         self,
         deal_id: int,
+        organization_id: int,
         author_id: int | None,
         payload: dict,
         type_: str = "comment",
     ):
         act = Activity(
-            deal_id=deal_id, author_id=author_id, type=type_, payload=payload
+            deal_id=deal_id,
+            organization_id=organization_id,
+            author_id=author_id,
+            type=type_,
+            payload=payload,
         )
         await self.create(act)
         return act
+
+
+def activity_event(activity: Activity) -> dict:
+    """Outbox payload describing a freshly flushed activity."""
+    return {
+        "activity_id": activity.id,
+        "deal_id": activity.deal_id,
+        "organization_id": activity.organization_id,
+        "author_id": activity.author_id,
+        "type": activity.type,
+        "payload": activity.payload,
+    }
+
+
+def in_owned_deals(deal_id_column, scope: Scope):
+    """`deal_id IN (deals owned by scope.owner_id in scope.org_id)`."""
+    return deal_id_column.in_(
+        select(Deal.id).filter(
+            Deal.organization_id == scope.org_id,
+            Deal.owner_id == scope.owner_id,
+        )
+    )
+
+
+def payload_text(key: str):
+    """
+    `payload ->> 'key'` with the key inlined rather than bound, so it
+    matches the expression indexes on (payload ->> 'to' / 'from').
+    """
+    if not key.isidentifier():
+        raise ValueError(f"Invalid payload key: {key!r}")
+    # ->> yields text: neither the result nor the compared value is JSON
+    return Activity.payload.op("->>", return_type=String())(
+        literal_column(f"'{key}'")
+    )
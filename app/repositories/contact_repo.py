@@ -1,19 +1,136 @@
-from sqlalchemy import select
-from app.models.models import Contact
+from decimal import Decimal
+from sqlalchemy import func, select, update
+from app.models.models import Contact, Deal, DealStatus
 from app.repositories import BaseRepository
 
+# deals counted into Contact.open_amount
+OPEN_STATUSES = (DealStatus.new, DealStatus.in_progress)
+# sortable aggregate columns of the contacts list
+SORT_COLUMNS = (
+    "created_at",
+    "name",
+    "deals_count",
+    "open_amount",
+    "last_activity_at",
+)
+
+
+def open_value(deal: Deal) -> Decimal:
+    """What a deal contributes to its contact's open_amount."""
+    if deal.status not in OPEN_STATUSES or deal.amount_base is None:
+        return Decimal(0)
+    return Decimal(deal.amount_base)
+
 
 class ContactRepository(BaseRepository[Contact]):
     model = Contact
+    owner_field = "owner_id"
+
+    def filter_conditions(
+        self,
+        org_id: int,
+        *_,
+        min_deals: int | None = None,
+        min_open_amount: Decimal | None = None,
+        active_since=None,
+        **filters,
+    ) -> list:
+        conditions = [self.model.organization_id == org_id]
+        conditions += [
+            getattr(self.model, key) == value for key, value in filters.items()
+        ]
+        if min_deals is not None:
+            conditions.append(self.model.deals_count >= min_deals)
+        if min_open_amount is not None:
+            conditions.append(self.model.open_amount >= min_open_amount)
+        if active_since is not None:
+            conditions.append(self.model.last_activity_at >= active_since)
+        return conditions
 
     async def list_by_org(
-        self, org_id: int, offset: int = 0, limit: int = 20, filters: dict = {}
+        self,
+        org_id: int,
+        offset: int = 0,
+        limit: int = 20,
+        filters: dict = {},
+        order_by: str = "created_at",
+        order: str = "desc",
     ):
-
+        # (organization_id, <aggregate>, id) indexes serve these orders;
+        # last_activity_at sorts never-active contacts last (desc) / first
+        if order_by not in SORT_COLUMNS:
+            order_by = "created_at"
+        col = getattr(self.model, order_by)
+        desc = order == "desc"
+        keys = [col.desc() if desc else col.asc()]
+        if order_by == "last_activity_at":
+            keys = [keys[0].nulls_last() if desc else keys[0].nulls_first()]
+        keys.append(self.model.id.desc() if desc else self.model.id.asc())
         q = await self.session.execute(
-            select(Contact)
-            .filter_by(organization_id=org_id, **filters)
+            self.select()
+            .filter(*self.filter_conditions(org_id, **filters))
+            .order_by(*keys)
             .offset(offset)
             .limit(limit)
         )
         return q.scalars().all()
+
+    async def apply_deal_change(
+        self,
+        contact_id: int,
+        deals: int = 0,
+        open_amount: Decimal = Decimal(0),
+        touched: bool = False,
+    ):
+        """
+        Adjust a contact's aggregates in place (`x = x + delta`), so
+        concurrent deal writes never lose an update. Not scoped: the
+        deal itself was already authorized, its contact may belong to
+        another owner.
+        """
+        values: dict = {}
+        if deals:
+            values["deals_count"] = self.model.deals_count + deals
+        if open_amount:
+            values["open_amount"] = self.model.open_amount + open_amount
+        if touched:
+            values["last_activity_at"] = func.now()
+        if not values:
+            return
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id == contact_id)
+            .values(**values)
+        )
+
+    async def touch_by_deal(self, deal_id: int):
+        """New activity on a deal: bump its contact's last_activity_at."""
+        await self.session.execute(
+            update(self.model)
+            .where(
+                self.model.id
+                == select(Deal.contact_id)
+                .where(Deal.id == deal_id)
+                .scalar_subquery()
+            )
+            .values(last_activity_at=func.now())
+        )
+
+    async def recompute_open_amounts(self, contact_ids):
+        """
+        Rebuild open_amount from the deals (after amount_base changed in
+        bulk, e.g. new FX rates). `contact_ids` may be a subquery.
+        """
+        open_sum = (
+            select(func.coalesce(func.sum(Deal.amount_base), 0))
+            .where(
+                Deal.contact_id == self.model.id,
+                Deal.status.in_(OPEN_STATUSES),
+            )
+            .scalar_subquery()
+        )
+        await self.session.execute(
+            update(self.model)
+            .where(self.model.id.in_(contact_ids))
+            .values(open_amount=open_sum)
+        )
@@ -1,13 +1,51 @@
-from typing import Sequence
-from sqlalchemy import select
-from app.models.models import Deal
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Sequence
+from sqlalchemy import and_, case, func, literal, or_, select
+from sqlalchemy.orm import aliased
+from app.models.models import Deal, DealStage
 from app.repositories import BaseRepository
 
+# orders of the board columns (non-null columns: keyset friendly)
+BOARD_ORDERS = ("created_at", "updated_at", "amount")
+
+
+def encode_board_cursor(
+    stage: str, order_by: str, order: str, value, deal_id: int
+) -> str:
+    """Opaque cursor: continue `stage` after (value, deal_id)."""
+    raw = json.dumps(
+        [stage, order_by, order, str(value), deal_id], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_board_cursor(cursor: str, order_by: str, order: str):
+    """(stage, value, deal_id); ValueError if malformed / another order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        stage, by, direction, value, deal_id = json.loads(raw)
+        stage = DealStage(stage).value
+        if (by, direction) != (order_by, order):
+            raise ValueError("cursor was issued for another order")
+        if order_by == "amount":
+            value = Decimal(value)
+        else:
+            value = datetime.fromisoformat(value)
+        return stage, value, int(deal_id)
+    except ValueError:
+        raise
+    except Exception as exc:
+        raise ValueError(f"malformed cursor: {exc}")
+
 
 class DealRepository(BaseRepository[Deal]):
     model = Deal
+    owner_field = "owner_id"
 
-    async def list_by_org(
+    def filter_conditions(
         self,
         org_id: int,
         *_,
@@ -16,12 +54,8 @@ class DealRepository(BaseRepository[Deal]):
         min_amount: float | None = None,
         max_amount: float | None = None,
         owner_id: int | None = None,
-        offset: int = 0,
-        limit: int = 20,
-        order_by: str = "created_at",
-        order: str = "desc",
-    ) -> Sequence[Deal]:
-        # collect all conditions and apply them in one filter() call
+    ) -> list:
+        """Predicates of the deals list filters, shared with its count."""
         conditions = [self.model.organization_id == org_id]
         if status:
             conditions.append(self.model.status.in_(status))
@@ -33,8 +67,21 @@ class DealRepository(BaseRepository[Deal]):
             conditions.append(self.model.amount <= max_amount)
         if owner_id is not None:
             conditions.append(self.model.owner_id == owner_id)
+        return conditions
 
-        q = select(self.model).filter(*conditions)
+    async def list_by_org(
+        self,
+        org_id: int,
+        *_,
+        offset: int = 0,
+        limit: int = 20,
+        order_by: str = "created_at",
+        order: str = "desc",
+        **filters,
+    ) -> Sequence[Deal]:
+        # collect all conditions and apply them in one filter() call
+        conditions = self.filter_conditions(org_id, **filters)
+        q = self.select().filter(*conditions)
 
         # order_by handling (simple, not SQL injection safe if uncontrolled)
         col = getattr(self.model, order_by, None)
@@ -45,9 +92,120 @@ class DealRepository(BaseRepository[Deal]):
         r = await self.session.execute(q)
         return r.scalars().all()
 
+    async def count_by_org(self, org_id: int, **filters) -> int:
+        """Total number of deals matching the `list_by_org` filters."""
+        return await self.count(*self.filter_conditions(org_id, **filters))
+
     async def list_by_contact(self, contact_id: int):
         """List deals by contact ID."""
         q = await self.session.execute(
-            select(self.model).filter_by(contact_id=contact_id)
+            self.select().filter_by(contact_id=contact_id)
         )
         return q.scalars().all()
+
+    async def board(
+        self,
+        org_id: int,
+        *_,
+        limit: int = 10,
+        order_by: str = "created_at",
+        order: str = "desc",
+        cursors: Dict[str, tuple] | None = None,
+        **filters,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Kanban board in one statement: per stage the first `limit` deals
+        in (order_by, id) order plus the stage's deal count and
+        amount_base total, via window functions partitioned by stage.
+        `cursors` ({stage: (value, id)}) continue those stages after the
+        given deal and restrict the board to them; totals always cover
+        the whole stage.
+        """
+        col = getattr(self.model, order_by)
+        desc = order == "desc"
+        cursors = cursors or {}
+        conditions = self.filter_conditions(org_id, **filters)
+        if cursors:
+            conditions.append(self.model.stage.in_(list(cursors)))
+
+        # rows at or before a stage's cursor are ranked after the rest
+        # (skip = 1), so ROW_NUMBER() counts only the rows still to show
+        after = [
+            and_(
+                self.model.stage == stage,
+                or_(
+                    col < value if desc else col > value,
+                    and_(
+                        col == value,
+                        self.model.id < deal_id
+                        if desc
+                        else self.model.id > deal_id,
+                    ),
+                ),
+            )
+            for stage, (value, deal_id) in cursors.items()
+        ]
+        keys = [
+            col.desc() if desc else col.asc(),
+            self.model.id.desc() if desc else self.model.id.asc(),
+        ]
+        if after:
+            skip = case((or_(*after), 0), else_=1)
+            keys.insert(0, skip)
+        else:
+            skip = literal(0)
+        partition = dict(partition_by=self.model.stage)
+        ranked = self.scoped(
+            select(
+                self.model,
+                skip.label("skip"),
+                func.row_number()
+                .over(**partition, order_by=keys)
+                .label("rn"),
+                func.count().over(**partition).label("stage_count"),
+                func.sum(self.model.amount_base)
+                .over(**partition)
+                .label("stage_amount"),
+            ).filter(*conditions)
+        ).subquery()
+        deal = aliased(self.model, ranked)
+        q = await self.session.execute(
+            select(
+                deal,
+                ranked.c.skip,
+                ranked.c.stage_count,
+                ranked.c.stage_amount,
+            )
+            # one row more than shown tells whether a stage goes on;
+            # rn = 1 keeps the totals of a stage with nothing left to show
+            .where(
+                or_(
+                    and_(ranked.c.skip == 0, ranked.c.rn <= limit + 1),
+                    ranked.c.rn == 1,
+                )
+            )
+            .order_by(ranked.c.stage, ranked.c.rn)
+        )
+
+        columns: Dict[str, Dict[str, Any]] = {
+            stage.value: {
+                "stage": stage,
+                "total": 0,
+                "total_amount": Decimal("0.00"),
+                "items": [],
+                "has_more": False,
+            }
+            for stage in DealStage
+            if not cursors or stage.value in cursors
+        }
+        for row, skipped, count, amount in q.all():
+            column = columns[DealStage(row.stage).value]
+            column["total"] = count
+            column["total_amount"] = amount or Decimal("0.00")
+            if skipped:
+                continue
+            if len(column["items"]) < limit:
+                column["items"].append(row)
+            else:
+                column["has_more"] = True
+        return columns
@@ -0,0 +1,136 @@
+from decimal import Decimal
+from typing import Dict, Mapping, Optional
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app.db.types import MONEY_MAX
+from app.models.models import Deal, FxRate
+from app.repositories import BaseRepository
+
+# pg_advisory_xact_lock key serializing rate loads ("fxrt")
+FX_RATES_LOCK_KEY = 0x66787274
+
+
+class FxRateRepository(BaseRepository[FxRate]):
+    model = FxRate
+
+    async def version(self) -> int:
+        q = await self.session.execute(
+            select(func.coalesce(func.max(self.model.version), 0))
+        )
+        return q.scalar_one()
+
+    async def load_all(self) -> Dict[Optional[int], Dict[str, Decimal]]:
+        """All rates, grouped by organization (None = shared)."""
+        q = await self.session.execute(
+            select(
+                self.model.organization_id,
+                self.model.currency,
+                self.model.rate,
+            )
+        )
+        rates: Dict[Optional[int], Dict[str, Decimal]] = {}
+        for org_id, currency, rate in q.all():
+            rates.setdefault(org_id, {})[currency] = Decimal(rate)
+        return rates
+
+    async def upsert(
+        self, rates: Mapping[str, Decimal], org_id: int | None = None
+    ) -> int:
+        """
+        Insert or replace `rates` under a new table version. Loads are
+        serialized by an advisory lock held until commit, so two of them
+        never read the same max(version); SQLite has a single writer.
+        """
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(FX_RATES_LOCK_KEY))
+            )
+        version = await self.version() + 1
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        if org_id is None:
+            target = dict(
+                index_elements=["currency"],
+                index_where=text("organization_id IS NULL"),
+            )
+        else:
+            target = dict(
+                index_elements=["organization_id", "currency"],
+                index_where=text("organization_id IS NOT NULL"),
+            )
+        stmt = insert(self.model).values(
+            [
+                {
+                    "organization_id": org_id,
+                    "currency": currency,
+                    "rate": rate,
+                    "version": version,
+                }
+                for currency, rate in rates.items()
+            ]
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                **target,
+                set_={
+                    "rate": stmt.excluded.rate,
+                    "version": stmt.excluded.version,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        return version
+
+    def effective_rate(self):
+        """
+        Correlated subquery: rate of the outer deal's currency, the
+        organization's own row winning over the shared one.
+        """
+        return (
+            select(self.model.rate)
+            .where(
+                self.model.currency == Deal.currency,
+                (self.model.organization_id == Deal.organization_id)
+                | self.model.organization_id.is_(None),
+            )
+            .order_by(self.model.organization_id.is_(None))
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    async def renormalize_deals(
+        self, currencies, org_id: int | None = None
+    ) -> int:
+        """
+        Recompute `Deal.amount_base` in SQL for deals in `currencies`,
+        rounded to cents like `FxRateCache.to_base`. Raises ValueError,
+        changing nothing, when a result would not fit NUMERIC(12, 2).
+        """
+        converted = Deal.amount * self.effective_rate()
+        limit = MONEY_MAX
+        if self.session.bind.dialect.name == "sqlite":
+            # Money keeps integer cents there
+            converted, limit = func.round(converted), limit * 100
+        else:
+            converted = func.round(converted, 2)
+        conditions = [Deal.currency.in_(list(currencies))]
+        if org_id is not None:
+            conditions.append(Deal.organization_id == org_id)
+
+        overflowing = await self.session.scalar(
+            select(func.count())
+            .select_from(Deal)
+            .where(*conditions, func.abs(converted) > limit)
+        )
+        if overflowing:
+            raise ValueError(
+                f"{overflowing} deal amounts would exceed {MONEY_MAX} "
+                "in the base currency"
+            )
+        q = await self.session.execute(
+            update(Deal)
+            .where(*conditions)
+            .values(amount_base=converted)
+            .execution_options(synchronize_session=False)
+        )
+        return q.rowcount
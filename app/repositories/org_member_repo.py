@@ -14,3 +14,13 @@ class OrganizationMemberRepository(BaseRepository[OrganizationMember]):
             )
         )
         return q.scalar_one_or_none()
+
+    async def list_by_user(self, user_id: int, limit: int | None = None):
+        """List memberships of a user, oldest first."""
+        q = await self.session.execute(
+            select(self.model)
+            .filter_by(user_id=user_id)
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        return q.scalars().all()
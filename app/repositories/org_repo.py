@@ -1,7 +1,7 @@
 from typing import Optional, Sequence
 
 from sqlalchemy import select
-from app.models.models import Organization, OrganizationMember
+from app.models.models import Organization, OrganizationMember, User
 from app.repositories import BaseRepository
 from app.repositories.org_member_repo import OrganizationMemberRepository
 
@@ -16,6 +16,10 @@ class OrgRepository(BaseRepository[Organization]):
         await OrganizationMemberRepository(self.session).create_from_payload(
             organization_id=org_id, user_id=user_id, role=role
         )
+        # invalidate memberships embedded in the user's access tokens
+        user = await self.session.get(User, user_id)
+        if user is not None:
+            user.membership_version += 1
 
     async def get_member(
         self, user_id: int, org_id: int
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from sqlalchemy import select, update
+from app.models.models import OutboxEvent
+from app.repositories import BaseRepository
+
+
+class OutboxRepository(BaseRepository[OutboxEvent]):
+    model = OutboxEvent
+
+    def enqueue(self, topic: str, payload: dict) -> OutboxEvent:
+        """
+        Add an event to the session without flushing: it is written
+        together with the caller's own rows, in the caller's transaction.
+        """
+        event = OutboxEvent(topic=topic, payload=payload)
+        self.session.add(event)
+        return event
+
+    async def claim_batch(
+        self, limit: int, lease: float
+    ) -> Sequence[OutboxEvent]:
+        """
+        Claim up to `limit` pending events, oldest first, by pushing their
+        `available_at` `lease` seconds ahead. Commit right after: the row
+        locks (SKIP LOCKED, so dispatchers never wait on each other) only
+        last for the claim, the lease keeps other dispatchers off the rows
+        while they are delivered, and a crashed dispatcher's rows come
+        back on their own once it runs out.
+        """
+        now = datetime.now(timezone.utc)
+        q = await self.session.execute(
+            select(self.model)
+            .filter(
+                self.model.processed_at.is_(None),
+                self.model.available_at <= now,
+            )
+            .order_by(self.model.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        events = q.scalars().all()
+        if events:
+            leased_until = now + timedelta(seconds=lease)
+            await self.session.execute(
+                update(self.model)
+                .filter(self.model.id.in_([e.id for e in events]))
+                .values(available_at=leased_until)
+                .execution_options(synchronize_session=False)
+            )
+        return events
+
+    async def mark_processed(self, ids: Sequence[int]):
+        """Mark events as delivered."""
+        await self.session.execute(
+            update(self.model)
+            .filter(self.model.id.in_(ids))
+            .values(processed_at=datetime.now(timezone.utc))
+        )
+
+    async def mark_failed(
+        self, events: Sequence[OutboxEvent], error: str, max_backoff: float
+    ):
+        """
+        Schedule a retry with exponential backoff. `events` are the rows
+        returned by `claim_batch`, usually from an earlier session.
+        """
+        now = datetime.now(timezone.utc)
+        await self.session.execute(
+            update(self.model),
+            [
+                {
+                    "id": event.id,
+                    "attempts": event.attempts + 1,
+                    "last_error": error[:1000],
+                    "available_at": now
+                    + timedelta(
+                        seconds=min(2 ** (event.attempts + 1), max_backoff)
+                    ),
+                }
+                for event in events
+            ],
+        )
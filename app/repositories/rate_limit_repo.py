@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.models import RateLimitCounter
+from app.repositories import BaseRepository
+
+
+class RateLimitRepository(BaseRepository[RateLimitCounter]):
+    model = RateLimitCounter
+
+    async def hit(self, key: str, window_start: datetime) -> int:
+        """Increment the counter of `key` in a window; returns the count."""
+        dialect = self.session.bind.dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(self.model).values(
+            key=key, window_start=window_start, count=1
+        )
+        q = await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key", "window_start"],
+                set_={"count": self.model.count + 1},
+            ).returning(self.model.count)
+        )
+        return q.scalar_one()
+
+    async def purge_before(self, window_start: datetime, limit: int) -> int:
+        """
+        Drop up to `limit` counters of windows that started before
+        `window_start`. Returns how many rows were deleted.
+        """
+        finished = (
+            select(self.model.id)
+            .filter(self.model.window_start < window_start)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        q = await self.session.execute(
+            delete(self.model).filter(self.model.id.in_(finished))
+        )
+        return q.rowcount
@@ -0,0 +1,46 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.models import RevokedToken
+from app.repositories import BaseRepository
+
+
+class RevokedTokenRepository(BaseRepository[RevokedToken]):
+    model = RevokedToken
+
+    async def revoke(self, jti: str, expires_at: datetime) -> bool:
+        """
+        Record `jti` as revoked. Returns False if it already was, which
+        makes rotation race-free across workers: only one caller wins.
+        """
+        dialect = self.session.bind.dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        q = await self.session.execute(
+            insert(self.model)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=["jti"])
+            .returning(self.model.id)
+        )
+        return q.scalar_one_or_none() is not None
+
+    async def is_revoked(self, jti: str) -> bool:
+        q = await self.session.execute(
+            select(self.model.id).filter_by(jti=jti)
+        )
+        return q.scalar_one_or_none() is not None
+
+    async def purge_expired(self, now: datetime, limit: int) -> int:
+        """
+        Drop up to `limit` revocations of tokens that have expired anyway.
+        Returns how many rows were deleted.
+        """
+        expired = (
+            select(self.model.id)
+            .filter(self.model.expires_at < now)
+            .limit(limit)
+            .scalar_subquery()
+        )
+        q = await self.session.execute(
+            delete(self.model).filter(self.model.id.in_(expired))
+        )
+        return q.rowcount
@@ -1,17 +1,18 @@
 from datetime import datetime
 from typing import Sequence
-from sqlalchemy import select
-from app.models.models import Deal, Task
+from sqlalchemy import select, update
+from app.models.models import Task
 from app.repositories import BaseRepository
 
 
 class TaskRepository(BaseRepository[Task]):
     model = Task
+    owner_field = "owner_id"
 
     async def list_by_deal(self, deal_id: int):
         """List tasks by deal ID."""
         q = await self.session.execute(
-            select(self.model).filter_by(deal_id=deal_id)
+            self.select().filter_by(deal_id=deal_id)
         )
         return q.scalars().all()
 
@@ -19,12 +20,15 @@ class TaskRepository(BaseRepository[Task]):
         self,
         *,
         org_id: int,
-        only_open: bool = True,
+        deal_id: int | None = None,
+        only_open: bool | None = True,
         due_before: datetime | None = None,
         due_after: datetime | None = None,
     ) -> Sequence[Task]:
         """List tasks by organization ID."""
-        ffilters = [Deal.organization_id == org_id]
+        ffilters = [Task.organization_id == org_id]
+        if deal_id is not None:
+            ffilters.append(Task.deal_id == deal_id)
         if only_open:
             ffilters.append(Task.is_done.is_(False))
         if due_before is not None:
@@ -32,6 +36,32 @@ class TaskRepository(BaseRepository[Task]):
         if due_after is not None:
             ffilters.append(Task.due_date >= due_after)
         q = await self.session.execute(
-            select(Task).join(Deal, Task.deal_id == Deal.id).filter(*ffilters)
+            self.select().filter(*ffilters)
         )
         return q.scalars().all()
+
+    async def claim_due(
+        self, due_before: datetime, limit: int
+    ) -> Sequence[Task]:
+        """
+        Lock up to `limit` open, not yet reminded tasks due before
+        `due_before`, earliest first (range scan on ix_tasks_is_done_due_date).
+        """
+        q = await self.session.execute(
+            select(Task)
+            .filter(
+                Task.is_done.is_(False),
+                Task.reminded_at.is_(None),
+                Task.due_date <= due_before,
+            )
+            .order_by(Task.due_date)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return q.scalars().all()
+
+    async def mark_reminded(self, ids: Sequence[int], at: datetime):
+        """Set `reminded_at` for the given tasks in one statement."""
+        await self.session.execute(
+            update(Task).filter(Task.id.in_(ids)).values(reminded_at=at)
+        )
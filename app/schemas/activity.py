@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional
 from datetime import datetime
 
 
@@ -18,3 +18,27 @@ class ActivityOut(BaseModel):
 
     class ConfigDict:
         from_attributes: bool = True
+
+
+class ActivityPageParams(BaseModel):
+    # keyset paging backwards through the timeline:
+    # pass the smallest id of the previous page as `before_id`
+    before_id: Optional[int] = None
+    limit: int = Field(100, ge=1, le=500)
+
+
+class ActivityQueryParams(BaseModel):
+    # FastAPI hands query models their values by field name (`from_`)
+    model_config = ConfigDict(populate_by_name=True)
+
+    deal_id: Optional[int] = None
+    type: Optional[List[str]] = None
+    # payload fields of status_changed / stage_changed activities
+    to: Optional[str] = None
+    from_: Optional[str] = Field(None, alias="from")
+    before_id: Optional[int] = None
+    limit: int = Field(100, ge=1, le=500)
+
+    def payload_filters(self) -> dict:
+        filters = {"to": self.to, "from": self.from_}
+        return {k: v for k, v in filters.items() if v is not None}
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from decimal import Decimal
+from pydantic import BaseModel, EmailStr, Field
+from typing import Annotated, Literal, Optional
 from datetime import datetime
 
 from app.schemas import PageParams
@@ -7,8 +8,8 @@ from app.schemas import PageParams
 
 class ContactCreate(BaseModel):
     name: str
-    email: Optional[EmailStr]
-    phone: Optional[str]
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
 
 
 class ContactOut(BaseModel):
@@ -19,6 +20,12 @@ class ContactOut(BaseModel):
     owner_id: int
     organization_id: int
     created_at: datetime
+    deals_count: int = 0
+    # open (new / in progress) deals, in the base currency
+    open_amount: Annotated[
+        Decimal, Field(max_digits=12, decimal_places=2)
+    ] = Decimal(0)
+    last_activity_at: Optional[datetime] = None
 
     class ConfigDict:
         from_attributes = True
@@ -28,3 +35,10 @@ class ContactQueryParams(PageParams):
 
     search: Optional[str] = None
     owner_id: Optional[int] = None
+    min_deals: Optional[int] = None
+    min_open_amount: Optional[Decimal] = None
+    active_since: Optional[datetime] = None
+    order_by: Literal[
+        "created_at", "name", "deals_count", "open_amount", "last_activity_at"
+    ] = "created_at"
+    order: Literal["asc", "desc"] = "desc"
@@ -1,6 +1,6 @@
 from decimal import Decimal
-from pydantic import BaseModel, Field
-from typing import Annotated, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, List, Literal, Optional
 from datetime import datetime
 from app.models.models import DealStatus, DealStage
 from app.schemas import PageParams
@@ -31,6 +31,9 @@ class DealOut(BaseModel):
         Decimal, Field(max_digits=12, decimal_places=2)
     ]
     currency: str
+    amount_base: Optional[
+        Annotated[Decimal, Field(max_digits=12, decimal_places=2)]
+    ] = None
     status: DealStatus
     stage: DealStage
     contact_id: int
@@ -43,17 +46,58 @@ class DealOut(BaseModel):
         from_attributes = True
 
 
+class DealParty(BaseModel):
+    """Contact or owner of a deal, as shown in deal lists."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+
+
+class DealListItem(DealOut):
+    contact: Optional[DealParty] = None
+    owner: Optional[DealParty] = None
+
+
 class DealsListOut(BaseModel):
-    items: List[DealOut]
+    items: List[DealListItem]
     total: int
 
 
 class DealFilterQuery(PageParams):
-    status: Optional[List[str]]
-    stage: Optional[str]
-    customer_name: Optional[str]
-    min_amount: Optional[float]
-    max_amount: Optional[float]
-    owner_id: Optional[int]
+    status: Optional[List[str]] = None
+    stage: Optional[str] = None
+    customer_name: Optional[str] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    owner_id: Optional[int] = None
     order_by: str = "created_at"
     order: str = "desc"
+
+
+class DealBoardQuery(BaseModel):
+    limit: int = Field(10, ge=1, le=100)
+    order_by: Literal["created_at", "updated_at", "amount"] = "created_at"
+    order: Literal["asc", "desc"] = "desc"
+    status: Optional[List[str]] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    owner_id: Optional[int] = None
+    # `next_cursor` of the columns to load more of (only those return)
+    cursor: Optional[List[str]] = None
+
+
+class DealBoardColumn(BaseModel):
+    stage: DealStage
+    total: int
+    # amount_base total of the stage, in the base currency; a sum of
+    # NUMERIC(12, 2) amounts, so no bound on its digits
+    total_amount: Annotated[Decimal, Field(decimal_places=2)]
+    items: List[DealOut]
+    next_cursor: Optional[str] = None
+
+
+class DealBoardOut(BaseModel):
+    currency: str
+    columns: List[DealBoardColumn]
@@ -0,0 +1,17 @@
+from decimal import Decimal
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict
+
+CurrencyCode = Annotated[str, Field(pattern="^[A-Z]{3}$")]
+Rate = Annotated[Decimal, Field(gt=0, max_digits=18, decimal_places=8)]
+
+
+class FxRatesIn(BaseModel):
+    # value of one unit of each currency in the base currency
+    rates: Dict[CurrencyCode, Rate]
+
+
+class FxRatesOut(BaseModel):
+    base_currency: str
+    version: int | None
+    rates: Dict[str, Decimal]
@@ -0,0 +1,178 @@
+import asyncio
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+from app.core.config import settings
+from app.models.models import Activity
+from app.repositories.activity_archive_repo import ActivityArchiveRepository
+from app.repositories.activity_repo import ActivityRepository
+
+
+class ActivityArchiveStore:
+    """
+    Cold storage layout: `<root>/org_<id>/<YYYY-MM>.ndjson.gz`, one file
+    per organization and month shared by its deals' archive segments.
+    Each archiving run appends one gzip member, so files are only ever
+    appended to; readers transparently decode all members and keep the
+    requested deal's records.
+    """
+
+    def __init__(self, root: str | Path = settings.ACTIVITY_ARCHIVE_DIR):
+        self.root = Path(root)
+
+    @staticmethod
+    def relative_path(org_id: int, period: date) -> str:
+        return f"org_{org_id}/{period:%Y-%m}.ndjson.gz"
+
+    def _append(self, relative: str, records: Iterable[Dict[str, Any]]):
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(
+            json.dumps(r, default=str, ensure_ascii=False) + "\n"
+            for r in records
+        ).encode()
+        with path.open("ab") as fh:
+            fh.write(gzip.compress(data))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _read(
+        self, relative: str, deal_id: int, before_id: int | None = None
+    ) -> List[Dict[str, Any]]:
+        path = self.root / relative
+        if not path.exists():
+            return []
+        records = []
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                record = json.loads(line)
+                if record["deal_id"] != deal_id:
+                    continue
+                if before_id is None or record["id"] < before_id:
+                    records.append(record)
+        return records
+
+    async def append(self, relative: str, records: List[Dict[str, Any]]):
+        await asyncio.to_thread(self._append, relative, records)
+
+    async def read(
+        self, relative: str, deal_id: int, before_id: int | None = None
+    ):
+        return await asyncio.to_thread(
+            self._read, relative, deal_id, before_id
+        )
+
+
+def activity_record(activity: Activity) -> Dict[str, Any]:
+    return {
+        "id": activity.id,
+        "deal_id": activity.deal_id,
+        "organization_id": activity.organization_id,
+        "author_id": activity.author_id,
+        "type": activity.type,
+        "payload": activity.payload,
+        "created_at": activity.created_at.isoformat(),
+    }
+
+
+async def archive_activities(
+    activity_repo: ActivityRepository,
+    archive_repo: ActivityArchiveRepository,
+    store: ActivityArchiveStore,
+    older_than: datetime,
+    limit: int,
+) -> int:
+    """
+    Move up to `limit` activities created before `older_than` to cold
+    storage, in the caller's transaction. Files are written before the
+    rows are deleted: a failed commit can leave duplicates in the archive
+    (readers dedupe by id) but never loses rows.
+    """
+    rows = await activity_repo.claim_older_than(older_than, limit)
+    if not rows:
+        return 0
+
+    by_file: Dict[tuple, List[Activity]] = defaultdict(list)
+    for row in rows:
+        period = row.created_at.date().replace(day=1)
+        by_file[row.organization_id, period].append(row)
+
+    for (org_id, period), activities in by_file.items():
+        relative = store.relative_path(org_id, period)
+        await store.append(relative, [activity_record(a) for a in activities])
+        by_deal: Dict[int, List[int]] = defaultdict(list)
+        for activity in activities:
+            by_deal[activity.deal_id].append(activity.id)
+        for deal_id, ids in by_deal.items():
+            await archive_repo.add_rows(
+                organization_id=org_id,
+                deal_id=deal_id,
+                period=period,
+                path=relative,
+                ids=ids,
+            )
+
+    await activity_repo.delete_ids([row.id for row in rows])
+    return len(rows)
+
+
+class ActivityTimelineService:
+    """Deal timeline over the hot table plus archived segments."""
+
+    def __init__(
+        self,
+        activity_repo: ActivityRepository,
+        archive_repo: ActivityArchiveRepository,
+        store: ActivityArchiveStore | None = None,
+    ):
+        self.activity_repo = activity_repo
+        self.archive_repo = archive_repo
+        self.store = store or ActivityArchiveStore()
+
+    async def page(
+        self,
+        deal_id: int,
+        org_id: int,
+        before_id: int | None = None,
+        limit: int = 100,
+    ) -> Sequence[Any]:
+        """
+        The `limit` activities preceding `before_id` (latest ones when
+        omitted), oldest first. Archived segments are only read when the
+        hot table runs out, i.e. when a client pages past the hot window.
+        """
+        hot = await self.activity_repo.page_by_deal(
+            deal_id, org_id, before_id=before_id, limit=limit
+        )
+        items: List[Any] = list(hot)
+        missing = limit - len(items)
+        if missing > 0:
+            cursor = min((a.id for a in hot), default=before_id)
+            items.extend(
+                await self._archived(deal_id, org_id, cursor, missing)
+            )
+        return sorted(
+            items,
+            key=lambda a: a["id"] if isinstance(a, dict) else a.id,
+        )
+
+    async def _archived(
+        self, deal_id: int, org_id: int, before_id: int | None, limit: int
+    ) -> List[Dict[str, Any]]:
+        found: Dict[int, Dict[str, Any]] = {}
+        # newest first by max_id: once `limit` records are found, every
+        # remaining segment only holds older ones
+        segments = await self.archive_repo.list_for_deal(
+            deal_id, org_id, before_id=before_id
+        )
+        for path in dict.fromkeys(segment.path for segment in segments):
+            for record in await self.store.read(path, deal_id, before_id):
+                found[record["id"]] = record
+            if len(found) >= limit:
+                break
+        newest = sorted(found, reverse=True)[:limit]
+        return [found[i] for i in newest]
@@ -1,7 +1,8 @@
-from fastapi import HTTPException
 from app.repositories.activity_repo import ActivityRepository
+from app.repositories.contact_repo import ContactRepository
 from app.repositories.deal_repo import DealRepository
 from app.schemas.activity import ActivityCreate  # ожидаем существование
+from app.services.permission_service import Permissions
 
 
 class ActivityService:
@@ -9,21 +10,19 @@ class ActivityService:
         self.repo = repo
 
     async def create(
-        self, user, deal_id, payload: ActivityCreate
+        self, user, perms: Permissions, deal_id: int, payload: ActivityCreate
     ):
         # Простая бизнес логика: участники могут создавать активности
-        # только для своих сделок/задач
-        if getattr(user, "role", "member") == "member":
-            # Проверка deal
-            deal_repo = DealRepository(self.repo.session)
-            deal = await deal_repo.get(deal_id)
-            if not deal or deal.owner_id != user.id:
-                raise HTTPException(
-                    403,
-                    "members can create activity only for their own deals",
-                )
+        # только для своих сделок (чужая сделка организации — 403)
+        deal_repo = DealRepository(self.repo.session, perms.scope)
+        if not await deal_repo.exists(id=deal_id):
+            await perms.deny(self.repo.session, deal_id)
 
-        return await self.repo.create_from_payload(
+        activity = await self.repo.create_from_payload(
+            deal_id=deal_id,
+            organization_id=perms.org_id,
             author_id=user.id,
             **payload.model_dump(),
         )
+        await ContactRepository(self.repo.session).touch_by_deal(deal_id)
+        return activity
@@ -1,27 +1,61 @@
-from sqlalchemy import select, func
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import Numeric, case, literal, select, func, type_coerce
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.models import Deal, DealStatus
+from app.db.types import Money
+from app.models.models import Activity, Deal, DealStatus
+from app.repositories.activity_repo import payload_text
+from app.services.fx_service import FxService
 
 
 class AnalyticsService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def deals_summary(self, org_id: int):
-        # count, sum, won, lost, in_progress
+    def count_where(self, condition):
+        """`count(*) FILTER (WHERE ...)`, or a CASE sum where unsupported."""
+        if self.session.bind.dialect.name == "postgresql":
+            return func.count().filter(condition)
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    def in_currency(self, base_amount, rate: Decimal):
+        """SQL: an amount in the base currency converted at `rate`."""
+        # typed explicitly: coerced to Money it would be bound as cents
+        rate = literal(rate, Numeric(18, 8))
+        if self.session.bind.dialect.name == "sqlite":
+            # Money is integer cents there
+            converted = func.round(base_amount / rate)
+        else:
+            converted = func.round(base_amount / rate, 2)
+        return type_coerce(converted, Money())
+
+    async def deals_summary(self, org_id: int, currency: str | None = None):
+        # count, sum, won, lost, in_progress; amounts are summed from
+        # Deal.amount_base and converted once, in SQL
+        fx = FxService(self.session)
+        currency = (currency or fx.base).upper()
+        rate = await fx.rate(org_id, currency)
+        if rate is None:
+            raise HTTPException(
+                status_code=400, detail=f"No FX rate for {currency}"
+            )
         q = await self.session.execute(
             select(
                 func.count(Deal.id),
-                func.sum(Deal.amount),
-                func.count().filter(Deal.status == DealStatus.won),
-                func.count().filter(Deal.status == DealStatus.lost),
-                func.count().filter(Deal.status == DealStatus.in_progress),
+                self.in_currency(func.sum(Deal.amount_base), rate),
+                self.count_where(Deal.status == DealStatus.won),
+                self.count_where(Deal.status == DealStatus.lost),
+                self.count_where(Deal.status == DealStatus.in_progress),
+                self.count_where(Deal.amount_base.is_(None)),
             ).filter(Deal.organization_id == org_id)
         )
-        total, total_amount, won, lost, in_progress = q.one()
+        total, total_amount, won, lost, in_progress, unconverted = q.one()
         return {
             "total_deals": total or 0,
             "total_amount": float(total_amount or 0),
+            "currency": currency,
+            # deals in currencies without a rate, left out of the total
+            "unconverted_deals": unconverted or 0,
             "won": won or 0,
             "lost": lost or 0,
             "in_progress": in_progress or 0,
@@ -44,3 +78,25 @@ class AnalyticsService:
                 for stage, count in rows
             ]
         }
+
+    async def status_transitions(self, org_id: int, to: str | None = None):
+        # status_changed activities grouped by (from, to) in SQL
+        to_col = payload_text("to")
+        from_col = payload_text("from")
+        conditions = [
+            Activity.organization_id == org_id,
+            Activity.type == "status_changed",
+        ]
+        if to is not None:
+            conditions.append(to_col == to)
+        q = await self.session.execute(
+            select(from_col, to_col, func.count(Activity.id))
+            .filter(*conditions)
+            .group_by(from_col, to_col)
+        )
+        return {
+            "transitions": [
+                {"from": from_, "to": to_, "count": count}
+                for from_, to_, count in q.all()
+            ]
+        }
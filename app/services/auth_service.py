@@ -1,12 +1,24 @@
+import asyncio
+import math
+from datetime import datetime, timezone
+import jwt
 from fastapi import HTTPException
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import RoleEnum
 from app.repositories.user_repo import UserRepository
 from app.repositories.org_repo import OrgRepository
+from app.repositories.org_member_repo import OrganizationMemberRepository
+from app.repositories.rate_limit_repo import RateLimitRepository
+from app.repositories.revoked_token_repo import RevokedTokenRepository
+from app.core.config import settings
+from app.core.rate_limit import login_limiter
+from app.core.revocation import revocation_cache
 from app.core.security import (
     PasswordHasher,
     TokenService,
 )
+from app.uow import UnitOfWork
 
 
 class AuthService:
@@ -14,29 +26,52 @@ class AuthService:
         self.db = db
         self.user_repo = UserRepository(db)
         self.org_repo = OrgRepository(db)
+        self.revoked_repo = RevokedTokenRepository(db)
         self.tokens = TokenService()
         self.hasher = PasswordHasher()
 
+    async def _access_token(self, user_id: int) -> str:
+        """
+        Access token for `user_id`; with TOKEN_EMBED_MEMBERSHIPS it carries
+        the user's org_id -> role map unless there are too many orgs.
+        """
+        if not settings.TOKEN_EMBED_MEMBERSHIPS:
+            return self.tokens.create_access_token(user_id)
+        user = await self.user_repo.get(user_id)
+        memberships = await OrganizationMemberRepository(
+            self.db
+        ).list_by_user(user_id, limit=settings.TOKEN_MEMBERSHIPS_MAX + 1)
+        if user is None or len(memberships) > settings.TOKEN_MEMBERSHIPS_MAX:
+            return self.tokens.create_access_token(user_id)
+        return self.tokens.create_access_token(
+            user_id,
+            orgs={
+                m.organization_id: RoleEnum(m.role).value
+                for m in memberships
+            },
+            membership_version=user.membership_version,
+        )
+
     async def register(
         self, email: str, password: str, name: str, organization_name: str
     ):
-        existing = await self.user_repo.get_by_email(email)
-        if existing:
+        if await self.user_repo.exists(email=email):
             raise HTTPException(
                 status_code=409, detail="Email already registered"
             )
 
-        password_hash = self.hasher.hash(password)
+        # bcrypt is CPU-bound: keep it off the event loop
+        password_hash = await asyncio.to_thread(self.hasher.hash, password)
         user = await self.user_repo.create_from_payload(
             email=email, hashed_password=password_hash, name=name
         )
 
         org = await self.org_repo.create_from_payload(name=organization_name)
+        # one INSERT round for both: the membership needs their ids
+        await self.db.flush()
         await self.org_repo.add_member(org.id, user.id, role=RoleEnum.owner)
 
-        await self.db.commit()
-
-        access = self.tokens.create_access_token(user.id)
+        access = await self._access_token(user.id)
         refresh = self.tokens.create_refresh_token(user.id)
         return {
             "access": access,
@@ -51,12 +86,101 @@ class AuthService:
         password: str,
     ):
         user = await self.user_repo.get_by_email(email)
-        user = authenticate_user(user, password, self.hasher)
+        user = await asyncio.to_thread(
+            authenticate_user, user, password, self.hasher
+        )
 
-        access = self.tokens.create_access_token(user.id)
+        access = await self._access_token(user.id)
         refresh = self.tokens.create_refresh_token(user.id)
         return {"access": access, "refresh": refresh, "user_id": user.id}
 
+    async def refresh(self, refresh_token: str):
+        """
+        Rotate a refresh token: revoke its jti and issue a new pair.
+        No password hashing and, for never-revoked tokens, no lookup:
+        the only query is the revocation insert itself.
+        """
+        try:
+            claims = self.tokens.decode(refresh_token)
+        except jwt.exceptions.PyJWTError:
+            raise HTTPException(
+                status_code=401, detail="Invalid refresh token"
+            )
+        jti = claims.get("jti")
+        if claims.get("typ") != "refresh" or not jti:
+            raise HTTPException(
+                status_code=401, detail="Invalid refresh token"
+            )
+
+        revoked = revocation_cache.maybe_revoked(jti)
+        if revoked is None:
+            revoked = await self.revoked_repo.is_revoked(jti)
+        if revoked or not await self.revoked_repo.revoke(
+            jti, datetime.fromtimestamp(claims["exp"], timezone.utc)
+        ):
+            revocation_cache.add(jti)
+            raise HTTPException(
+                status_code=401, detail="Refresh token has been revoked"
+            )
+        # only once our revocation row is committed: a rolled back
+        # rotation must leave the token usable
+        event.listen(
+            self.db.sync_session,
+            "after_commit",
+            lambda session: revocation_cache.add(jti),
+            once=True,
+        )
+
+        user_id = int(claims["sub"])
+        access = await self._access_token(user_id)
+        refresh = self.tokens.create_refresh_token(user_id)
+        return {"access": access, "refresh": refresh, "user_id": user_id}
+
+
+async def enforce_login_rate_limit(db: AsyncSession, ip: str, email: str):
+    """
+    Reject a login attempt with 429 before any user lookup or bcrypt work.
+    The in-process buckets are checked first; the shared Postgres counter
+    (LOGIN_RATE_SHARED) makes the limits hold across workers.
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+    retry_after = login_limiter.check(ip, email)
+    if not retry_after and settings.LOGIN_RATE_SHARED:
+        retry_after = await _shared_retry_after(db, ip, email.lower())
+        if retry_after:
+            login_limiter.rejected_shared += 1
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+async def _shared_retry_after(db: AsyncSession, ip: str, email: str):
+    window = settings.LOGIN_RATE_SHARED_WINDOW_SECONDS
+    now = datetime.now(timezone.utc).timestamp()
+    start = now - now % window
+    limits = {
+        f"login:ip:{ip}": settings.LOGIN_RATE_PER_IP_PER_MINUTE * window / 60
+        + settings.LOGIN_RATE_PER_IP_BURST,
+        f"login:email:{email}": settings.LOGIN_RATE_PER_EMAIL_PER_MINUTE
+        * window
+        / 60
+        + settings.LOGIN_RATE_PER_EMAIL_BURST,
+    }
+    repo = RateLimitRepository(db)
+    window_start = datetime.fromtimestamp(start, timezone.utc)
+    exceeded = False
+    # a unit of its own: the attempt counts even when the login then
+    # fails, which rolls back everything else of the request
+    async with UnitOfWork(db).begin():
+        for key, limit in limits.items():
+            if await repo.hit(key, window_start) > limit:
+                exceeded = True
+    return start + window - now if exceeded else 0.0
+
 
 def authenticate_user(user, password: str, hasher: PasswordHasher):
     if not user:
@@ -22,9 +22,9 @@ class ContactService:
         return await self.contact_repo.create(c)
 
     async def delete(self, contact: Contact, deal_repo: DealRepository):
-        # can't delete if deals exist
-        deals = await deal_repo.list_by_contact(contact.id)
-        if deals:
+        # can't delete if deals exist; asked of the deals table itself,
+        # the denormalized deals_count is only for sorting
+        if await deal_repo.exists(contact_id=contact.id):
             raise HTTPException(
                 status_code=409,
                 detail="Contact has deals and cannot be deleted",
@@ -1,9 +1,12 @@
 from decimal import Decimal
 from fastapi import HTTPException
 from datetime import datetime
+from typing import Optional
 from app.repositories.deal_repo import DealRepository
 from app.repositories.activity_repo import ActivityRepository
-from app.repositories.contact_repo import ContactRepository
+from app.repositories.contact_repo import ContactRepository, open_value
+from app.repositories.outbox_repo import OutboxRepository
+from app.services.fx_service import FxService
 from app.models.models import Deal, DealStatus, DealStage, RoleEnum
 from app.schemas.deal import DealPatch
 
@@ -18,11 +21,13 @@ class DealService:
         self.deal_repo = deal_repo
         self.activity_repo = activity_repo
         self.contact_repo = contact_repo
+        self.fx = FxService(deal_repo.session)
 
     async def create_deal(self, org_id: int, owner_id: int, payload) -> Deal:
-        # Ensure contact exists and belongs to org
-        contact = await self.contact_repo.get(payload.contact_id)
-        if not contact or contact.organization_id != org_id:
+        # Ensure contact exists in the organization (contact_repo scope)
+        if not await self.contact_repo.exists(
+            id=payload.contact_id, organization_id=org_id
+        ):
             raise HTTPException(
                 status_code=404, detail="Contact not found in organization"
             )
@@ -34,44 +39,63 @@ class DealService:
             title=payload.title,
             amount=payload.amount,
             currency=payload.currency,
+            amount_base=await self.fx.to_base(
+                org_id, payload.amount, payload.currency
+            ),
             status=DealStatus.new,
             stage=DealStage.qualification,
         )
         await self.deal_repo.create(deal)
+        # the deal_created activity needs the deal's id
+        await self.deal_repo.session.flush()
         # create activity: deal_created
         await self.activity_repo.create_for(
             deal.id,
+            organization_id=org_id,
             author_id=owner_id,
             type_="deal_created",
             payload={"title": deal.title},
         )
+        await self.contact_repo.apply_deal_change(
+            deal.contact_id,
+            deals=1,
+            open_amount=open_value(deal),
+            touched=True,
+        )
         return deal
 
     async def patch_deal(
-        self, current_user, membership, deal: Deal, patch: DealPatch
-    ):
+        self, current_user, membership, deal_id: int, patch: DealPatch
+    ) -> Optional[Deal]:
+        """
+        The deal is read and written only through the request-scoped
+        repository, the write being one `UPDATE ... WHERE <scope>
+        RETURNING`. None when nothing in scope matched (not ours, gone,
+        or changed hands meanwhile): the caller tells 403 from 404.
+        """
+        deal = await self.deal_repo.get(deal_id)
+        if deal is None:
+            return None
         # membership.role is enum or str (owner/admin/manager/member)
         role = membership.role if hasattr(membership, "role") else membership
-
-        # member can update only own deals
-        if role == RoleEnum.member:
-            if deal.owner_id != current_user.id:
-                raise HTTPException(
-                    status_code=403,
-                    detail="members can update only their own deals",
-                )
+        values: dict = {}
+        events: list[tuple[str, dict]] = []
 
         # Update amount/title first if provided (affects won rule)
         if patch.amount is not None:
-            deal.amount = patch.amount
+            values["amount"] = patch.amount
+            values["amount_base"] = await self.fx.to_base(
+                deal.organization_id, patch.amount, deal.currency
+            )
         if patch.title is not None:
-            deal.title = patch.title
+            values["title"] = patch.title
+        amount = values.get("amount", deal.amount)
 
         # Status change rule: cannot set won if amount <= 0
         if patch.status is not None:
             new_status = patch.status
             if new_status == DealStatus.won and (
-                deal.amount is None or Decimal(deal.amount) <= Decimal(0)
+                amount is None or Decimal(amount) <= Decimal(0)
             ):
                 raise HTTPException(
                     status_code=400,
@@ -79,17 +103,16 @@ class DealService:
                 )
             old_status = deal.status
             if old_status != new_status:
-                deal.status = new_status
-                await self.deal_repo.update(deal)
-                await self.activity_repo.create_for(
-                    deal.id,
-                    author_id=current_user.id,
-                    type_="status_changed",
-                    payload={
-                        "from": old_status.value,
-                        "to": new_status.value,
-                        "at": datetime.now().isoformat(),
-                    },
+                values["status"] = new_status
+                events.append(
+                    (
+                        "status_changed",
+                        {
+                            "from": old_status.value,
+                            "to": new_status.value,
+                            "at": datetime.now().isoformat(),
+                        },
+                    )
                 )
 
         # Stage change: forbid rollback for non-admin/owner
@@ -107,36 +130,58 @@ class DealService:
                     detail="Stage rollback forbidden for your role",
                 )
             if new_index > curr_index:
-                old_stage = deal.stage
-                deal.stage = new_stage
-                await self.deal_repo.update(deal)
-                await self.activity_repo.create_for(
-                    deal.id,
-                    author_id=current_user.id,
-                    type_="stage_changed",
-                    payload={
-                        "from": old_stage.value,
-                        "to": new_stage.value,
-                        "at": datetime.now().isoformat(),
-                    },
+                values["stage"] = new_stage
+                events.append(
+                    (
+                        "stage_changed",
+                        {
+                            "from": deal.stage.value,
+                            "to": new_stage.value,
+                            "at": datetime.now().isoformat(),
+                        },
+                    )
                 )
 
-        # Persist non-status/stage changes (title/amount already set)
-        await self.deal_repo.update(deal)
-        return deal
-
-    async def delete_deal(self, current_user, membership, deal: Deal):
-        role = membership.role if hasattr(membership, "role") else membership
-        if role == RoleEnum.member and deal.owner_id != current_user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="members can delete only their own deals",
+        if not values:
+            return deal
+        old_open = open_value(deal)
+        updated = await self.deal_repo.update_where(deal.id, **values)
+        if updated is None:
+            return None
+        await self.contact_repo.apply_deal_change(
+            updated.contact_id,
+            open_amount=open_value(updated) - old_open,
+            touched=bool(events),
+        )
+        for type_, payload in events:
+            await self.activity_repo.create_for(
+                updated.id,
+                organization_id=updated.organization_id,
+                author_id=current_user.id,
+                type_=type_,
+                payload=payload,
             )
-        # Deleting deal: could add checks if tasks exist etc.
-        await self.deal_repo.delete(deal)
-        await self.activity_repo.create_for(
-            deal.id,
-            author_id=current_user.id,
-            type_="deal_deleted",
-            payload={},
+        return updated
+
+    async def delete_deal(self, current_user, deal_id: int) -> Optional[Deal]:
+        """
+        One `DELETE ... WHERE <scope> RETURNING`: members can only hit
+        their own deals, None when nothing in scope matched. Activities
+        cascade with the deal, so the deletion is announced through the
+        outbox rather than as an activity row.
+        """
+        deal = await self.deal_repo.delete_where(deal_id)
+        if deal is None:
+            return None
+        await self.contact_repo.apply_deal_change(
+            deal.contact_id, deals=-1, open_amount=-open_value(deal)
         )
+        OutboxRepository(self.deal_repo.session).enqueue(
+            "deal.deleted",
+            {
+                "deal_id": deal.id,
+                "organization_id": deal.organization_id,
+                "author_id": current_user.id,
+            },
+        )
+        return deal
@@ -0,0 +1,109 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Mapping
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.fx import FxRateCache, fx_rates
+from app.models.models import Deal
+from app.repositories.contact_repo import ContactRepository
+from app.repositories.fx_rate_repo import FxRateRepository
+
+
+class FxService:
+    """
+    Currency conversion to the reporting (base) currency. Rates are read
+    from the process-wide `fx_rates` cache, refreshed from the database
+    only when the table version moved on.
+    """
+
+    def __init__(self, session: AsyncSession, cache: FxRateCache = fx_rates):
+        self.session = session
+        self.repo = FxRateRepository(session)
+        self.cache = cache
+
+    @property
+    def base(self) -> str:
+        return self.cache.base
+
+    async def refresh(self) -> FxRateCache:
+        if self.cache.needs_check():
+            version = await self.repo.version()
+            if version != self.cache.version:
+                self.cache.replace(await self.repo.load_all(), version)
+            else:
+                self.cache.checked()
+        return self.cache
+
+    async def rate(self, org_id: int, currency: str) -> Decimal | None:
+        return (await self.refresh()).rate(org_id, currency)
+
+    async def to_base(
+        self, org_id: int, amount: Decimal | None, currency: str
+    ) -> Decimal | None:
+        return (await self.refresh()).to_base(org_id, amount, currency)
+
+    async def rates(self, org_id: int) -> Dict[str, Decimal]:
+        return (await self.refresh()).rates(org_id)
+
+    async def load(
+        self, rates: Mapping[str, Decimal], org_id: int | None = None
+    ) -> tuple[int, int]:
+        """
+        Store rates (an organization's own, or shared when `org_id` is
+        None) and re-normalize affected deals. Returns (version, deals).
+        """
+        if self.base in rates:
+            raise HTTPException(
+                status_code=400,
+                detail=f"{self.base} is the base currency, its rate is 1",
+            )
+        if not rates:
+            return await self.repo.version(), 0
+        version = await self.repo.upsert(rates, org_id)
+        try:
+            deals = await self.repo.renormalize_deals(rates.keys(), org_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        affected = select(Deal.contact_id).where(
+            Deal.currency.in_(list(rates))
+        )
+        if org_id is not None:
+            affected = affected.where(Deal.organization_id == org_id)
+        await ContactRepository(self.session).recompute_open_amounts(affected)
+        # a reload before our commit would still see the old version
+        event.listen(
+            self.session.sync_session,
+            "after_commit",
+            lambda session: self.cache.invalidate(),
+            once=True,
+        )
+        return version, deals
+
+
+def read_rates_file(path: str | Path) -> Dict[str, Decimal]:
+    """
+    Rates from a JSON object (`{"EUR": "1.08"}`) or a CSV file with
+    `currency,rate` rows (a header row is skipped).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".json":
+        items = json.loads(path.read_text()).items()
+    else:
+        with path.open(newline="") as f:
+            items = [row[:2] for row in csv.reader(f) if row]
+    rates = {}
+    for currency, rate in items:
+        currency = currency.strip().upper()
+        try:
+            value = Decimal(str(rate).strip())
+        except InvalidOperation:
+            if not rates and currency == "CURRENCY":
+                continue  # header
+            raise ValueError(f"bad rate for {currency}: {rate!r}")
+        if len(currency) != 3 or value <= 0:
+            raise ValueError(f"bad rate for {currency}: {rate!r}")
+        rates[currency] = value
+    return rates
@@ -1,11 +1,12 @@
 from fastapi import HTTPException, status
 from fastapi.params import Depends
-from typing import Annotated, Iterable
+from typing import Annotated, Iterable, NoReturn
 
 from sqlalchemy import select
-from app.deps import get_current_org, get_current_user
-from app.models.models import Organization, OrganizationMember, RoleEnum, User
-from app.repositories.org_member_repo import OrganizationMemberRepository
+from app.deps import CurrentOrg, get_current_org
+from app.models.models import Deal, RoleEnum
+from app.repositories import Scope
+from app.repositories.deal_repo import DealRepository
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -33,47 +34,38 @@ def _role_value(role: RoleEnum | str) -> int:
 
 class RoleChecker:
     """
-    FastAPI dependency callable.
+    FastAPI dependency callable. Authorizes from the caller's role in the
+    current organization (`get_current_org`), which comes from the access
+    token's embedded memberships or a single membership lookup.
 
     Usage examples:
         # allowed roles list (exact match on string) # type: ignore
-      - Depends(RoleChecker(session, ["owner"]))
+      - Depends(RoleChecker(["owner"]))
         # same as above
-      - Depends(RoleChecker(session, [RoleEnum.admin]))
+      - Depends(RoleChecker([RoleEnum.admin]))
         # minimum role: manager OR higher (admin, owner)
-      - Depends(RoleChecker(session, RoleEnum.manager))
+      - Depends(RoleChecker(RoleEnum.manager))
         # same as above
-      - Depends(RoleChecker(session, "manager"))
+      - Depends(RoleChecker("manager"))
     """
 
     def __init__(
         self,
-        session: AsyncSession,
         allowed_roles: RoleEnum | str | Iterable[str],
     ):
         self.allowed_roles = allowed_roles
-        self.session = session
 
     async def __call__(
         self,
-        user: Annotated[User, Depends(get_current_user)],
-        org: Annotated[Organization, Depends(get_current_org)],
+        org: Annotated[CurrentOrg, Depends(get_current_org)],
     ):
-        repo = OrganizationMemberRepository(self.session)
-        org_mem = await repo.get_by_user_and_org(user.id, org.id)
-
-        if org_mem is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Organization member not found",
-            )
-
         # If allowed_roles is an iterable (list/tuple/set),
         # treat it as explicit allowed role names
         if isinstance(self.allowed_roles, Iterable) and not isinstance(
             self.allowed_roles, (str, RoleEnum)
         ):
-            if str(org_mem.role) in self.allowed_roles:
+            allowed = {_role_to_enum(r) for r in self.allowed_roles}
+            if org.role in allowed:
                 return True
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,9 +84,9 @@ class RoleChecker:
                 detail="Invalid role specification for RoleChecker",
             )
 
-        if ROLE_PRIORITY.get(
-            org_mem.role, -1  # type: ignore
-        ) >= ROLE_PRIORITY.get(min_role, -1):
+        if ROLE_PRIORITY.get(org.role, -1) >= ROLE_PRIORITY.get(
+            min_role, -1
+        ):
             return True
 
         raise HTTPException(
@@ -103,41 +95,111 @@ class RoleChecker:
         )
 
 
-async def has_minimum_role(
-    session: AsyncSession,
-    user_id: int,
-    org_id: int,
+def has_minimum_role(
+    membership: CurrentOrg,
     required_role: RoleEnum | str,
 ) -> bool:
     """
-    Returns True if the user's role is >= required_role in the hierarchy:
+    Returns True if the member's role is >= required_role in the hierarchy:
       member < manager < admin < owner
+    Evaluated from the request's already loaded membership: no query.
     """
-    q = await session.execute(
-        select(OrganizationMember).filter_by(
-            user_id=user_id, organization_id=org_id
-        )
-    )
-    member = q.scalar_one_or_none()
-    if not member:
-        return False
     try:
         return ROLE_PRIORITY.get(
-            member.role, -1  # type: ignore
+            membership.role, -1
         ) >= _role_value(required_role)
     except ValueError:
         return False
 
 
-async def is_owner(session: AsyncSession, user_id: int, org_id: int) -> bool:
-    return await has_minimum_role(session, user_id, org_id, RoleEnum.owner)
+def is_owner(membership: CurrentOrg) -> bool:
+    return has_minimum_role(membership, RoleEnum.owner)
 
 
-async def is_admin(session: AsyncSession, user_id: int, org_id: int) -> bool:
+def is_admin(membership: CurrentOrg) -> bool:
     # admin or owner
-    return await has_minimum_role(session, user_id, org_id, RoleEnum.admin)
+    return has_minimum_role(membership, RoleEnum.admin)
 
 
-async def is_manager(session: AsyncSession, user_id: int, org_id: int) -> bool:
+def is_manager(membership: CurrentOrg) -> bool:
     # manager or admin or owner
-    return await has_minimum_role(session, user_id, org_id, RoleEnum.manager)
+    return has_minimum_role(membership, RoleEnum.manager)
+
+
+class Permissions:
+    """
+    Permission checks for one request, evaluated from its membership
+    (`get_current_org`). Members may modify only what they own; managers
+    and above may modify anything in the organization.
+    """
+
+    def __init__(self, membership: CurrentOrg):
+        self.membership = membership
+        self.user_id = membership.user_id
+        self.org_id = membership.id
+
+    def at_least(self, role: RoleEnum | str) -> bool:
+        return has_minimum_role(self.membership, role)
+
+    @property
+    def is_owner(self) -> bool:
+        return is_owner(self.membership)
+
+    @property
+    def is_admin(self) -> bool:
+        return is_admin(self.membership)
+
+    @property
+    def is_manager(self) -> bool:
+        return is_manager(self.membership)
+
+    @property
+    def owns_only(self) -> bool:
+        """True when writes are limited to the caller's own rows."""
+        return self.membership.role == RoleEnum.member
+
+    @property
+    def scope(self) -> Scope:
+        """Repository scope: the org, plus own rows only for members."""
+        return Scope(
+            org_id=self.org_id,
+            owner_id=self.user_id if self.owns_only else None,
+        )
+
+    def can_modify(self, deal: Deal) -> bool:
+        return deal.organization_id == self.org_id and (
+            not self.owns_only or deal.owner_id == self.user_id
+        )
+
+    async def modifiable_deal_ids(
+        self, session: AsyncSession, deal_ids: Iterable[int]
+    ) -> set[int]:
+        """Which of `deal_ids` may this user modify? One query."""
+        ids = set(deal_ids)
+        if not ids:
+            return set()
+        conditions = [Deal.id.in_(ids), Deal.organization_id == self.org_id]
+        if self.owns_only:
+            conditions.append(Deal.owner_id == self.user_id)
+        q = await session.execute(select(Deal.id).filter(*conditions))
+        return set(q.scalars().all())
+
+    async def deny(self, session: AsyncSession, deal_id: int) -> NoReturn:
+        """
+        Nothing in `scope` matched `deal_id`: one org-wide exists() tells
+        a colleague's deal (403) from a missing one (404).
+        """
+        org_deals = DealRepository(session, Scope(self.org_id))
+        if await org_deals.exists(id=deal_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="members can modify only their own deals",
+            )
+        raise HTTPException(status_code=404, detail="Deal not found")
+
+
+async def get_permissions(
+    org: Annotated[CurrentOrg, Depends(get_current_org)],
+) -> Permissions:
+    """FastAPI dependency: permissions of the current request."""
+    return Permissions(org)
@@ -1,6 +1,6 @@
 from datetime import date
 from fastapi import HTTPException
-from app.models.models import Deal, User
+from app.models.models import User
 from app.repositories.task_repo import TaskRepository
 from app.repositories.deal_repo import DealRepository
 from app.schemas.task import TaskCreate
@@ -18,10 +18,11 @@ class TaskService:
                 status_code=400, detail="due_date cannot be in the past"
             )
 
-        deal: Deal | None = await self.deal_repo.get(payload.deal_id)
-        if not deal or deal.organization_id != org_id:
+        if not await self.deal_repo.exists(
+            id=payload.deal_id, organization_id=org_id
+        ):
             raise HTTPException(status_code=404, detail="Deal not found")
 
         return await self.task_repo.create_from_payload(
-            user_id=user.id, org_id=org_id, **payload.model_dump()
+            owner_id=user.id, organization_id=org_id, **payload.model_dump()
         )
@@ -1,16 +1,59 @@
 from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.base import get_db
 
 
 class UnitOfWork:
+    """
+    One transaction per request. Repositories only add their writes to
+    the shared session; `begin` flushes them all with the commit when
+    the block succeeds and rolls everything back otherwise, so an
+    endpoint never leaves partial writes behind.
+    """
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
-        @asynccontextmanager
-        async def begin(self):
-            try:
-                async with self.session.begin():
-                    yield self
-            except Exception:
-                await self.session.rollback()
-                raise
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator["UnitOfWork"]:
+        # Not `session.begin()`: auth dependencies have usually read
+        # through this session already, which autobegan the transaction.
+        try:
+            yield self
+            await self.session.commit()
+        except BaseException:
+            await self.session.rollback()
+            raise
+
+    async def flush(self):
+        """
+        Send the pending writes now, in one flush. Endpoints returning a
+        row they created need its generated columns (id, created_at)
+        before the response is serialized, ahead of the commit.
+        """
+        await self.session.flush()
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator["UnitOfWork"]:
+        """
+        SAVEPOINT for one step of a batch: an error inside rolls back
+        only that step, the outer transaction carries on.
+        """
+        async with self.session.begin_nested():
+            yield self
+
+
+async def get_uow(
+    session: AsyncSession = Depends(get_db),
+) -> AsyncIterator[UnitOfWork]:
+    """
+    FastAPI dependency for mutation endpoints, declared with
+    `Depends(get_uow, scope="function")`: the commit then runs right after
+    the endpoint returns and before the response is sent, so a failed
+    commit is reported as an error instead of after a 2xx.
+    """
+    uow = UnitOfWork(session)
+    async with uow.begin():
+        yield uow
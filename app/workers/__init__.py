@@ -0,0 +1,81 @@
+import asyncio
+from abc import ABC, abstractmethod
+from logging import getLogger
+from typing import Protocol
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = getLogger(__name__)
+
+
+class BackgroundWorker(Protocol):
+    """Anything the app lifespan can start and stop."""
+
+    name: str
+
+    def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
+
+
+async def try_advisory_xact_lock(session: AsyncSession, key: int) -> bool:
+    """
+    Take a Postgres advisory lock for the rest of the session's transaction
+    without waiting; False when another transaction holds it. Other
+    databases run a single worker and always get the lock.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return True
+    q = await session.execute(select(func.pg_try_advisory_xact_lock(key)))
+    return bool(q.scalar())
+
+
+class PeriodicWorker(ABC):
+    """
+    Base class for in-process background loops started from the app
+    lifespan. Subclasses implement `run_once`, returning how many items
+    were processed; a full batch makes the loop run again immediately
+    instead of sleeping for `interval`.
+    """
+
+    name: str = "worker"
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @abstractmethod
+    async def run_once(self) -> int:
+        """Process one batch; returns how many items were handled."""
+
+    async def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception(f"{self.name}: iteration failed")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._stop.clear()
+        self._task = asyncio.create_task(self.run_forever(), name=self.name)
+
+    async def join(self):
+        """Wait until the loop exits (after `stop`)."""
+        if self._task is not None:
+            await self._task
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
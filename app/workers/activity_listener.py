@@ -0,0 +1,218 @@
+import asyncio
+import json
+from logging import getLogger
+from typing import Any, Dict, List
+import asyncpg
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.models.models import Activity, Deal
+from app.schemas.activity import ActivityOut
+
+
+logger = getLogger(__name__)
+
+
+class Subscription:
+    """
+    One SSE client: an organization and, optionally, a single deal. With
+    `owner_id` (the member role) only events of deals that user owns at
+    the time of the event are delivered.
+    """
+
+    def __init__(
+        self,
+        org_id: int,
+        deal_id: int | None,
+        maxsize: int,
+        owner_id: int | None = None,
+    ):
+        self.org_id = org_id
+        self.deal_id = deal_id
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def matches(self, event: Dict[str, Any], deal_owner_id: int) -> bool:
+        if self.owner_id is not None and deal_owner_id != self.owner_id:
+            return False
+        return self.deal_id is None or event["deal_id"] == self.deal_id
+
+    def push(self, event: Dict[str, Any]):
+        if self.closed:
+            return
+        if self.queue.full():
+            # too slow: end the stream, the client resumes from
+            # Last-Event-ID and catches up from the database
+            self.close()
+            return
+        self.queue.put_nowait(event)
+
+    def close(self):
+        """Wake the consumer with an end-of-stream marker (`None`)."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+def asyncpg_dsn(url: str) -> str:
+    """SQLAlchemy `postgresql+asyncpg://` URL -> plain libpq DSN."""
+    return (
+        make_url(url)
+        .set(drivername="postgresql")
+        .render_as_string(hide_password=False)
+    )
+
+
+class ActivityBroadcaster:
+    """
+    Holds one `LISTEN` connection per worker process and fans activity
+    inserts out to every SSE subscriber of the matching organization.
+    Notifications carry ids only; full rows are loaded in one query per
+    batch of notifications, not once per subscriber.
+    """
+
+    name = "activity-broadcaster"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        dsn: str,
+        channel: str = settings.ACTIVITY_STREAM_CHANNEL,
+        queue_size: int = settings.ACTIVITY_STREAM_QUEUE_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.dsn = dsn
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subs: Dict[int, set[Subscription]] = {}
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.listening = False
+        self.notifications = 0
+        self.delivered = 0
+        self.reconnects = 0
+
+    def subscribe(
+        self,
+        org_id: int,
+        deal_id: int | None = None,
+        owner_id: int | None = None,
+    ):
+        sub = Subscription(org_id, deal_id, self.queue_size, owner_id)
+        self._subs.setdefault(org_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subs.get(sub.org_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.org_id]
+
+    def _on_notify(self, conn, pid, channel, payload: str):
+        self.notifications += 1
+        note = json.loads(payload)
+        if note.get("organization_id") in self._subs:
+            self._pending.append(note)
+            self._wakeup.set()
+
+    async def _load(self, notes: List[Dict[str, Any]]):
+        org_by_id = {note["id"]: note["organization_id"] for note in notes}
+        async with self.session_factory() as session:
+            # the deal's current owner, for member subscriptions
+            q = await session.execute(
+                select(Activity, Deal.owner_id)
+                .join(Deal, Deal.id == Activity.deal_id)
+                .filter(Activity.id.in_(org_by_id))
+                .order_by(Activity.id)
+            )
+            rows = q.all()
+        for row, owner_id in rows:
+            event = ActivityOut.model_validate(
+                row, from_attributes=True
+            ).model_dump(mode="json")
+            for sub in list(self._subs.get(org_by_id[row.id], ())):
+                if sub.matches(event, owner_id):
+                    sub.push(event)
+                    self.delivered += 1
+
+    async def _fanout(self):
+        while not self._stop.is_set():
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            notes, self._pending = self._pending, []
+            if not notes:
+                continue
+            try:
+                await self._load(notes)
+            except Exception:
+                logger.exception("activity stream: failed to load rows")
+
+    async def _listen(self):
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                conn = await asyncpg.connect(self.dsn)
+            except Exception as e:
+                logger.warning(f"activity stream: connect failed: {e!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 1.0
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _: lost.set())
+            await conn.add_listener(self.channel, self._on_notify)
+            self.listening = True
+            try:
+                stop = asyncio.create_task(self._stop.wait())
+                dropped = asyncio.create_task(lost.wait())
+                await asyncio.wait(
+                    {stop, dropped}, return_when=asyncio.FIRST_COMPLETED
+                )
+                stop.cancel()
+                dropped.cancel()
+            finally:
+                self.listening = False
+                # notifications may have been missed: make every client
+                # reconnect and replay from its Last-Event-ID
+                self._close_all()
+                if not conn.is_closed():
+                    await conn.close()
+            if not self._stop.is_set():
+                self.reconnects += 1
+
+    def _close_all(self):
+        for subs in self._subs.values():
+            for sub in subs:
+                sub.close()
+
+    def start(self):
+        self._stop.clear()
+        self._tasks = [
+            asyncio.create_task(self._listen(), name=f"{self.name}-listen"),
+            asyncio.create_task(self._fanout(), name=f"{self.name}-fanout"),
+        ]
+
+    async def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self.listening,
+            "subscribers": sum(len(s) for s in self._subs.values()),
+            "notifications": self.notifications,
+            "delivered": self.delivered,
+            "reconnects": self.reconnects,
+        }
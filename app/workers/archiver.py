@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.repositories.activity_archive_repo import ActivityArchiveRepository
+from app.repositories.activity_repo import ActivityRepository
+from app.services.activity_archive_service import (
+    ActivityArchiveStore,
+    archive_activities,
+)
+from app.workers import PeriodicWorker, try_advisory_xact_lock
+
+
+# pg advisory lock key shared by all activity archivers ("arch")
+ARCHIVE_LOCK_KEY = 0x61726368
+
+
+class ActivityArchiver(PeriodicWorker):
+    """
+    Moves activities older than `after` to gzip NDJSON cold storage.
+    Runs are serialized by a transaction-level advisory lock: two
+    archivers appending to the same file would interleave their members.
+    """
+
+    name = "activity-archiver"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        store: ActivityArchiveStore | None = None,
+        after: timedelta = timedelta(
+            days=settings.ACTIVITY_ARCHIVE_AFTER_DAYS
+        ),
+        batch_size: int = settings.ACTIVITY_ARCHIVE_BATCH_SIZE,
+        interval: float = settings.ACTIVITY_ARCHIVE_INTERVAL,
+    ):
+        super().__init__(interval=interval, batch_size=batch_size)
+        self.session_factory = session_factory
+        self.store = store or ActivityArchiveStore()
+        self.after = after
+        self.archived = 0
+        self.skipped_locked = 0
+
+    async def run_once(self) -> int:
+        older_than = datetime.now(timezone.utc) - self.after
+        async with self.session_factory() as session:
+            async with session.begin():
+                if not await try_advisory_xact_lock(session, ARCHIVE_LOCK_KEY):
+                    self.skipped_locked += 1
+                    return 0
+                moved = await archive_activities(
+                    ActivityRepository(session),
+                    ActivityArchiveRepository(session),
+                    self.store,
+                    older_than,
+                    self.batch_size,
+                )
+        self.archived += moved
+        return moved
+
+    def stats(self):
+        return {
+            "archived": self.archived,
+            "skipped_locked": self.skipped_locked,
+            "after_days": self.after.days,
+            "root": str(self.store.root),
+        }
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Dict, List, Protocol, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.models.models import OutboxEvent
+from app.repositories.outbox_repo import OutboxRepository
+from app.workers import PeriodicWorker
+
+
+logger = getLogger(__name__)
+
+
+class OutboxSink(Protocol):
+    name: str
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        """Deliver a batch of events; raise to have the batch retried."""
+
+
+class InMemorySink:
+    """
+    Fan out events to in-process subscribers (one queue each). A queue
+    without room for a batch is disconnected, never the batch failed: it
+    gets an end-of-stream marker (`None`) and is dropped, so one slow
+    consumer cannot hold up delivery to everyone else.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._subscribers: set[asyncio.Queue] = set()
+        self.disconnected = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        # one slot kept free for the end-of-stream marker
+        queue: asyncio.Queue = asyncio.Queue(
+            maxsize=self.maxsize + 1 if self.maxsize else 0
+        )
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _disconnect(self, queue: asyncio.Queue):
+        self.unsubscribe(queue)
+        self.disconnected += 1
+        logger.warning(
+            f"memory sink: dropped a slow subscriber ({queue.qsize()} "
+            "events behind)"
+        )
+        queue.put_nowait(None)
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        for queue in list(self._subscribers):
+            if self.maxsize and self.maxsize - queue.qsize() < len(events):
+                self._disconnect(queue)
+                continue
+            for event in events:
+                queue.put_nowait(event)
+
+
+class NDJSONFileSink:
+    """Append events as newline-delimited JSON."""
+
+    name = "ndjson"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def _write(self, lines: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(lines)
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        lines = "".join(
+            json.dumps(event, default=str, ensure_ascii=False) + "\n"
+            for event in events
+        )
+        await asyncio.to_thread(self._write, lines)
+
+
+class WebhookSink:
+    """POST each batch as `{"events": [...]}`; non-2xx means retry."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        import httpx  # only webhook deployments pay for the import
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            r = await client.post(
+                self.url,
+                content=json.dumps({"events": events}, default=str),
+                headers={"Content-Type": "application/json"},
+            )
+            r.raise_for_status()
+
+
+def serialize_event(event: OutboxEvent) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "topic": event.topic,
+        "created_at": event.created_at.isoformat(),
+        "attempts": event.attempts,
+        **(event.payload or {}),
+    }
+
+
+class OutboxDispatcher(PeriodicWorker):
+    """
+    Claims pending outbox rows in batches (`FOR UPDATE SKIP LOCKED` plus
+    a lease on `available_at`, so several workers can run side by side)
+    and hands them to every sink. Claiming, delivery and marking are
+    separate steps: no transaction or row lock is held while sinks run.
+    Rows are marked processed only after all sinks succeeded, which makes
+    delivery at-least-once: consumers must tolerate duplicates by `id`.
+    """
+
+    name = "outbox-dispatcher"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sinks: Sequence[OutboxSink],
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        interval: float = settings.OUTBOX_POLL_INTERVAL,
+        max_backoff: float = settings.OUTBOX_MAX_BACKOFF,
+        lease: float = settings.OUTBOX_LEASE_SECONDS,
+    ):
+        super().__init__(interval=interval, batch_size=batch_size)
+        self.session_factory = session_factory
+        self.sinks = list(sinks)
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self._started_at = time.monotonic()
+        self.delivered = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+        self.last_lag_seconds = 0.0
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> None:
+        for sink in self.sinks:
+            await sink.deliver(events)
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as session:
+            async with session.begin():
+                rows = await OutboxRepository(session).claim_batch(
+                    self.batch_size, self.lease
+                )
+        if not rows:
+            return 0
+        started = time.monotonic()
+        events = [serialize_event(row) for row in rows]
+        try:
+            await self.deliver(events)
+        except Exception as e:
+            logger.warning(f"outbox delivery failed: {e!r}")
+            self.failed += len(rows)
+            async with self.session_factory() as session:
+                async with session.begin():
+                    await OutboxRepository(session).mark_failed(
+                        rows, repr(e), self.max_backoff
+                    )
+            return 0
+        async with self.session_factory() as session:
+            async with session.begin():
+                await OutboxRepository(session).mark_processed(
+                    [row.id for row in rows]
+                )
+        self._record(rows, time.monotonic() - started)
+        return len(rows)
+
+    def _record(self, rows: Sequence[OutboxEvent], seconds: float):
+        self.batches += 1
+        self.delivered += len(rows)
+        self.last_batch_size = len(rows)
+        self.last_batch_seconds = seconds
+        oldest = min(row.created_at for row in rows)
+        self.last_lag_seconds = max(
+            0.0, time.time() - oldest.timestamp()
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self._started_at
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_seconds": round(self.last_batch_seconds, 6),
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "events_per_second": (
+                round(self.delivered / uptime, 3) if uptime else 0.0
+            ),
+            "sinks": [sink.name for sink in self.sinks],
+        }
+
+
+# process-wide in-memory sink, for in-process subscribers
+memory_sink = InMemorySink()
+
+
+def build_sinks(memory: InMemorySink = memory_sink) -> List[OutboxSink]:
+    """Sinks enabled by `Settings`; the in-memory one is always on."""
+    sinks: List[OutboxSink] = [memory]
+    if settings.OUTBOX_NDJSON_PATH:
+        sinks.append(NDJSONFileSink(settings.OUTBOX_NDJSON_PATH))
+    if settings.OUTBOX_WEBHOOK_URL:
+        sinks.append(
+            WebhookSink(
+                settings.OUTBOX_WEBHOOK_URL,
+                timeout=settings.OUTBOX_WEBHOOK_TIMEOUT,
+            )
+        )
+    return sinks
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.repositories.rate_limit_repo import RateLimitRepository
+from app.workers import PeriodicWorker
+
+
+class RateLimitPurger(PeriodicWorker):
+    """
+    Deletes shared login counters (`rate_limit_counters`) of windows that
+    are over: nothing reads them again, and every window of every IP and
+    email adds rows.
+    """
+
+    name = "rate-limit-purger"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        window: float = settings.LOGIN_RATE_SHARED_WINDOW_SECONDS,
+        batch_size: int = settings.LOGIN_RATE_PURGE_BATCH_SIZE,
+        interval: float = settings.LOGIN_RATE_PURGE_INTERVAL,
+    ):
+        super().__init__(interval=interval, batch_size=batch_size)
+        self.session_factory = session_factory
+        self.window = window
+        self.purged = 0
+
+    async def run_once(self) -> int:
+        # the window that started more than one window ago has ended
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.window)
+        async with self.session_factory() as session:
+            async with session.begin():
+                purged = await RateLimitRepository(session).purge_before(
+                    cutoff, self.batch_size
+                )
+        self.purged += purged
+        return purged
+
+    def stats(self):
+        return {"purged": self.purged}
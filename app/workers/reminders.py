@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.models.models import Activity
+from app.repositories.activity_repo import ActivityRepository
+from app.repositories.task_repo import TaskRepository
+from app.workers import PeriodicWorker, try_advisory_xact_lock
+
+
+logger = getLogger(__name__)
+
+# pg advisory lock key shared by all reminder schedulers ("task")
+REMINDER_LOCK_KEY = 0x7461736B
+
+
+class TaskReminderScheduler(PeriodicWorker):
+    """
+    Emits a `task_due` activity (and through it an outbox event) for every
+    open task coming due within `lead`. Each tick is one transaction that
+    holds a transaction-level advisory lock, so with several workers only
+    one scans at a time; `reminded_at` is set in the same transaction as
+    the activity insert, so each reminder fires exactly once.
+    """
+
+    name = "task-reminders"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = settings.TASK_REMINDER_BATCH_SIZE,
+        interval: float = settings.TASK_REMINDER_INTERVAL,
+        lead: timedelta = timedelta(
+            minutes=settings.TASK_REMINDER_LEAD_MINUTES
+        ),
+    ):
+        super().__init__(interval=interval, batch_size=batch_size)
+        self.session_factory = session_factory
+        self.lead = lead
+        self.reminded = 0
+        self.skipped_locked = 0
+
+    async def run_once(self) -> int:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            async with session.begin():
+                locked = await try_advisory_xact_lock(
+                    session, REMINDER_LOCK_KEY
+                )
+                if not locked:
+                    self.skipped_locked += 1
+                    return 0
+                task_repo = TaskRepository(session)
+                tasks = await task_repo.claim_due(
+                    now + self.lead, self.batch_size
+                )
+                if not tasks:
+                    return 0
+                await ActivityRepository(session).create_many(
+                    [
+                        Activity(
+                            deal_id=task.deal_id,
+                            organization_id=task.organization_id,
+                            author_id=None,
+                            type="task_due",
+                            payload={
+                                "task_id": task.id,
+                                "title": task.title,
+                                "due_date": task.due_date.isoformat(),
+                            },
+                        )
+                        for task in tasks
+                    ]
+                )
+                await task_repo.mark_reminded([t.id for t in tasks], now)
+        self.reminded += len(tasks)
+        return len(tasks)
+
+    def stats(self):
+        return {
+            "reminded": self.reminded,
+            "skipped_locked": self.skipped_locked,
+            "lead_minutes": self.lead.total_seconds() / 60,
+        }
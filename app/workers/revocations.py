@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.repositories.revoked_token_repo import RevokedTokenRepository
+from app.workers import PeriodicWorker
+
+
+class RevocationPurger(PeriodicWorker):
+    """
+    Deletes `revoked_tokens` rows of refresh tokens past their expiry:
+    such tokens fail signature validation anyway, the row only kept the
+    table (and every rotation's unique insert) growing.
+    """
+
+    name = "revocation-purger"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int = settings.REVOCATION_PURGE_BATCH_SIZE,
+        interval: float = settings.REVOCATION_PURGE_INTERVAL,
+    ):
+        super().__init__(interval=interval, batch_size=batch_size)
+        self.session_factory = session_factory
+        self.purged = 0
+
+    async def run_once(self) -> int:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            async with session.begin():
+                purged = await RevokedTokenRepository(session).purge_expired(
+                    now, self.batch_size
+                )
+        self.purged += purged
+        return purged
+
+    def stats(self):
+        return {"purged": self.purged}
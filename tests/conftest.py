@@ -1,76 +1,239 @@
-import asyncio
+import hashlib
+import os
 from typing import AsyncGenerator
 import pytest
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
-    async_sessionmaker,
+    AsyncConnection,
+    AsyncEngine,
     create_async_engine,
     AsyncSession,
+    async_sessionmaker,
 )
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.dialects import postgresql
 from httpx import AsyncClient, ASGITransport
 
 from app import app
-from app.db.base import Base, get_db
+from app.db.base import Base, get_db, make_engine
 from app.core.config import settings
 
 # -----------------------------
 #  TEST DATABASE
 # -----------------------------
-TEST_DATABASE_URL = settings.TEST_DATABASE_URL
+# The schema is built once into a template database named after a hash
+# of the models; every test process (pytest-xdist worker) then gets its
+# own database cloned from it with CREATE DATABASE ... TEMPLATE, which
+# takes milliseconds instead of a create_all per run.
+# TEST_DATABASE_URL=sqlite+aiosqlite:// runs the suite in-process instead:
+# each worker creates its own in-memory schema.
+TEST_DATABASE_URL = make_url(settings.TEST_DATABASE_URL)
+# serializes template creation between workers
+TEMPLATE_LOCK_KEY = 0x7465_6D70
 
-test_engine = create_async_engine(
-    TEST_DATABASE_URL,
-    future=True,
-    echo=False,
-)
 
-TestSessionLocal = async_sessionmaker(
-    test_engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
-)
+def schema_fingerprint() -> str:
+    ddl = "".join(
+        str(CreateTable(table).compile(dialect=postgresql.dialect()))
+        for table in Base.metadata.sorted_tables
+    )
+    return hashlib.sha1(ddl.encode()).hexdigest()[:10]
 
 
-# -----------------------------
-#  event loop
-# -----------------------------
-@pytest.fixture(scope="session")
-def event_loop():
-    loop = asyncio.get_event_loop()
-    yield loop
+def admin_engine() -> AsyncEngine:
+    # CREATE / DROP DATABASE cannot run inside a transaction
+    return create_async_engine(
+        TEST_DATABASE_URL.set(database="postgres"),
+        isolation_level="AUTOCOMMIT",
+    )
+
+
+async def database_exists(conn: AsyncConnection, name: str) -> bool:
+    q = await conn.execute(
+        text("SELECT 1 FROM pg_database WHERE datname = :name"),
+        {"name": name},
+    )
+    return q.scalar() is not None
+
+
+async def ensure_template(name: str):
+    admin = admin_engine()
+    try:
+        async with admin.connect() as conn:
+            await conn.execute(
+                text("SELECT pg_advisory_lock(:key)"),
+                {"key": TEMPLATE_LOCK_KEY},
+            )
+            try:
+                if await database_exists(conn, name):
+                    return
+                await conn.execute(text(f'CREATE DATABASE "{name}"'))
+                engine = create_async_engine(
+                    TEST_DATABASE_URL.set(database=name)
+                )
+                try:
+                    async with engine.begin() as tpl:
+                        await tpl.run_sync(Base.metadata.create_all)
+                finally:
+                    # a template must have no open connections to be cloned
+                    await engine.dispose()
+            finally:
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": TEMPLATE_LOCK_KEY},
+                )
+    finally:
+        await admin.dispose()
+
+
+async def clone_database(template: str, name: str):
+    admin = admin_engine()
+    try:
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+            await conn.execute(
+                text(f'CREATE DATABASE "{name}" TEMPLATE "{template}"')
+            )
+    finally:
+        await admin.dispose()
+
+
+async def drop_database(name: str):
+    admin = admin_engine()
+    try:
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+    finally:
+        await admin.dispose()
 
 
-# -----------------------------
-#  Setup DB (drop/create)
-# -----------------------------
 @pytest.fixture(scope="session")
-async def test_db_setup_sessionmaker():
-    # assert if we use TEST_DB URL for 100%
-    # some other asserts...
-    # async_engine = create_async_engine(...)
+async def test_engine() -> AsyncGenerator[AsyncEngine, None]:
+    if TEST_DATABASE_URL.get_backend_name() == "sqlite":
+        engine = make_engine(TEST_DATABASE_URL)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine
+        await engine.dispose()
+        return
 
-    # always drop and create test db tables between tests session
-    async with test_engine.begin() as conn:
+    base = TEST_DATABASE_URL.database
+    template = f"{base}_tpl_{schema_fingerprint()}"
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    name = f"{base}_{worker}"
 
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
-    return TestSessionLocal
+    await ensure_template(template)
+    await clone_database(template, name)
+    engine = make_engine(TEST_DATABASE_URL.set(database=name))
+    yield engine
+    await engine.dispose()
+    await drop_database(name)
+
+
+@pytest.fixture
+async def scratch_engine() -> AsyncGenerator[AsyncEngine, None]:
+    """An empty Postgres database of its own, for migration tests."""
+    if TEST_DATABASE_URL.get_backend_name() == "sqlite":
+        pytest.skip("migrations only run against Postgres")
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    name = f"{TEST_DATABASE_URL.database}_scratch_{worker}"
+    admin = admin_engine()
+    try:
+        async with admin.connect() as conn:
+            await conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+            await conn.execute(text(f'CREATE DATABASE "{name}"'))
+    finally:
+        await admin.dispose()
+    engine = make_engine(TEST_DATABASE_URL.set(database=name))
+    yield engine
+    await engine.dispose()
+    await drop_database(name)
+
+
+# -----------------------------
+#  per-test transaction
+# -----------------------------
+@pytest.fixture
+async def connection(
+    test_engine: AsyncEngine,
+) -> AsyncGenerator[AsyncConnection, None]:
+    """One outer transaction per test, rolled back at the end."""
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            yield conn
+        finally:
+            await trans.rollback()
 
 
 @pytest.fixture
 async def session(
-    test_db_setup_sessionmaker,
+    connection: AsyncConnection,
 ) -> AsyncGenerator[AsyncSession, None]:
-    async with test_db_setup_sessionmaker() as session:
+    # commits inside the app only release savepoints of the outer
+    # transaction, so nothing a test writes outlives it
+    async with AsyncSession(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ) as session:
         yield session
 
 
+@pytest.fixture
+def statements(session):
+    """SQL statements the test session sends, in order."""
+    sent: list = []
+
+    def record(conn, cursor, statement, params, context, executemany):
+        sent.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def session_factory(connection: AsyncConnection) -> async_sessionmaker:
+    """For workers, which open their own sessions: same outer transaction."""
+    return async_sessionmaker(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+@pytest.fixture(autouse=True)
+def fx_rates_cache():
+    """
+    The process-wide FX cache outlives the test transaction: drop what a
+    test loaded so the next one re-reads its own (rolled back) table.
+    """
+    from app.core.fx import fx_rates
+
+    yield fx_rates
+    fx_rates.invalidate()
+
+
 # -----------------------------
 #  test client
 # -----------------------------
 @pytest.fixture()
-async def client():
-    async with AsyncClient(
-        transport=ASGITransport(app=app),
-        base_url="http://test",
-    ) as ac:
-        yield ac
+async def client(session_factory: async_sessionmaker):
+    # a fresh session per request, as in the app: nothing cached in one
+    # request's identity map or session.info leaks into the next
+    async def override_get_db():
+        async with session_factory() as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test",
+        ) as ac:
+            yield ac
+    finally:
+        app.dependency_overrides.pop(get_db, None)
@@ -0,0 +1,83 @@
+"""API shortcuts shared by the flow tests."""
+from app.core.security import TokenService
+
+
+async def register(client, email: str, org: str = "Acme") -> dict:
+    """Register a user with its own organization; auth + org headers."""
+    r = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Pass12345",
+            "name": email.split("@")[0],
+            "organization_name": org,
+        },
+    )
+    assert r.status_code == 200, r.text
+    access = r.json()["access_token"]
+    headers = {"Authorization": f"Bearer {access}"}
+    # org ids come from sequences, which a rolled back test does not reset
+    r = await client.get("/api/v1/organizations/me", headers=headers)
+    headers["X-Organization-Id"] = str(r.json()[0]["id"])
+    return headers
+
+
+def user_id(headers: dict) -> int:
+    token = headers["Authorization"].split()[1]
+    return int(TokenService().decode(token)["sub"])
+
+
+def org_id(headers: dict) -> int:
+    return int(headers["X-Organization-Id"])
+
+
+async def add_member(
+    client, session, owner_headers: dict, email: str, role: str = "member"
+) -> dict:
+    """A new user joining the owner's organization with `role`."""
+    from app.repositories.org_repo import OrgRepository
+
+    headers = await register(client, email, org=f"{email} own")
+    await OrgRepository(session).add_member(
+        org_id(owner_headers), user_id(headers), role=role
+    )
+    await session.commit()
+    return {**headers, "X-Organization-Id": owner_headers["X-Organization-Id"]}
+
+
+async def create_contact(client, headers: dict, name: str, **fields):
+    r = await client.post(
+        "/api/v1/contacts", json={"name": name, **fields}, headers=headers
+    )
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+async def create_deal(
+    client,
+    headers: dict,
+    title: str = "Deal",
+    contact_id: int | None = None,
+    **fields,
+):
+    """A deal owned by the caller, for a new contact unless given one."""
+    if contact_id is None:
+        contact = await create_contact(client, headers, f"{title} contact")
+        contact_id = contact["id"]
+    r = await client.post(
+        "/api/v1/deals",
+        json={"contact_id": contact_id, "title": title, **fields},
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+async def comment(client, headers: dict, deal_id: int, text: str) -> dict:
+    r = await client.post(
+        f"/api/v1/deals/{deal_id}/activities",
+        json={"type": "comment", "payload": {"text": text}},
+        headers=headers,
+    )
+    assert r.status_code == 201, r.text
+    return r.json()
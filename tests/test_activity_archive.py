@@ -0,0 +1,151 @@
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import text, update
+from app.models.models import Activity, Deal
+from app.repositories.activity_archive_repo import ActivityArchiveRepository
+from app.repositories.activity_repo import ActivityRepository
+from app.services.activity_archive_service import (
+    ActivityArchiveStore,
+    ActivityTimelineService,
+)
+from app.workers.archiver import ARCHIVE_LOCK_KEY, ActivityArchiver
+from tests.helpers import comment, create_deal, org_id, register
+
+
+def _record(id_, deal_id=1):
+    return {
+        "id": id_,
+        "deal_id": deal_id,
+        "organization_id": 1,
+        "author_id": None,
+        "type": "comment",
+        "payload": {},
+        "created_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+async def test_store_appends_gzip_members(tmp_path):
+    store = ActivityArchiveStore(tmp_path)
+    path = store.relative_path(1, date(2024, 1, 1))
+    assert path == "org_1/2024-01.ndjson.gz"
+
+    await store.append(path, [_record(1), _record(2)])
+    await store.append(path, [_record(3)])
+    assert [r["id"] for r in await store.read(path, deal_id=1)] == [1, 2, 3]
+    assert [r["id"] for r in await store.read(path, 1, before_id=3)] == [1, 2]
+
+
+async def test_store_reads_only_the_deal_from_org_files(tmp_path):
+    store = ActivityArchiveStore(tmp_path)
+    path = store.relative_path(1, date(2024, 1, 1))
+    await store.append(path, [_record(1), _record(2, deal_id=2)])
+    assert [r["id"] for r in await store.read(path, deal_id=1)] == [1]
+
+
+class _HotRepo:
+    def __init__(self, ids):
+        self.rows = [SimpleNamespace(id=i) for i in ids]
+
+    async def page_by_deal(self, deal_id, org_id, before_id=None, limit=100):
+        rows = [r for r in self.rows if before_id is None or r.id < before_id]
+        return sorted(rows, key=lambda r: -r.id)[:limit]
+
+
+class _ArchiveRepo:
+    def __init__(self, path):
+        self.segments = [SimpleNamespace(path=path)]
+
+    async def list_for_deal(self, deal_id, org_id, before_id=None):
+        return self.segments
+
+
+async def test_timeline_merges_archive_past_hot_window(tmp_path):
+    store = ActivityArchiveStore(tmp_path)
+    path = store.relative_path(1, date(2024, 1, 1))
+    await store.append(path, [_record(i) for i in (1, 2, 3)])
+    svc = ActivityTimelineService(_HotRepo([4, 5]), _ArchiveRepo(path), store)
+
+    def ids(items):
+        return [i["id"] if isinstance(i, dict) else i.id for i in items]
+
+    assert ids(await svc.page(1, org_id=1, limit=2)) == [4, 5]
+    assert ids(await svc.page(1, org_id=1, limit=4)) == [2, 3, 4, 5]
+    assert ids(await svc.page(1, org_id=1, before_id=4, limit=2)) == [2, 3]
+
+
+@pytest.fixture
+async def aged_deal(client, session):
+    """A deal with a month old history and one fresh comment."""
+    headers = await register(client, "archive@example.com")
+    deal = await create_deal(client, headers, "Archived")
+    for i in range(2):
+        await comment(client, headers, deal["id"], f"old {i}")
+    month_ago = datetime.now(timezone.utc) - timedelta(days=30)
+    await session.execute(
+        update(Deal).filter_by(id=deal["id"]).values(created_at=month_ago)
+    )
+    q = await session.execute(
+        update(Activity)
+        .filter_by(deal_id=deal["id"])
+        .values(created_at=month_ago)
+        .returning(Activity.id)
+    )
+    old = sorted(q.scalars().all())
+    await session.commit()
+    hot = [(await comment(client, headers, deal["id"], "new"))["id"]]
+    return org_id(headers), deal["id"], old, hot
+
+
+async def test_archive_then_page_round_trip(
+    session, session_factory, aged_deal, tmp_path
+):
+    org, deal_id, old, hot = aged_deal
+    store = ActivityArchiveStore(tmp_path)
+    archiver = ActivityArchiver(
+        session_factory, store=store, after=timedelta(days=1)
+    )
+    assert await archiver.run_once() == len(old)
+
+    period = (datetime.now(timezone.utc) - timedelta(days=30)).date()
+    path = store.relative_path(org, period.replace(day=1))
+    assert list(tmp_path.glob("org_*/*.ndjson.gz")) == [tmp_path / path]
+
+    svc = ActivityTimelineService(
+        ActivityRepository(session),
+        ActivityArchiveRepository(session),
+        store,
+    )
+
+    def ids(items):
+        return [i["id"] if isinstance(i, dict) else i.id for i in items]
+
+    assert ids(await svc.page(deal_id, org, limit=1)) == hot
+    assert ids(await svc.page(deal_id, org, limit=10)) == old + hot
+    assert ids(await svc.page(deal_id, org, limit=2)) == old[-1:] + hot
+    assert ids(await svc.page(deal_id, org, before_id=old[-1], limit=1)) == [
+        old[-2]
+    ]
+    # nothing left in the hot table to archive
+    assert await archiver.run_once() == 0
+
+
+async def test_archiver_runs_are_serialized(
+    test_engine, session_factory, aged_deal, tmp_path
+):
+    if test_engine.dialect.name != "postgresql":
+        pytest.skip("advisory locks are Postgres only")
+    archiver = ActivityArchiver(
+        session_factory,
+        store=ActivityArchiveStore(tmp_path),
+        after=timedelta(days=1),
+    )
+    async with test_engine.connect() as other:
+        async with other.begin():
+            await other.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"),
+                {"key": ARCHIVE_LOCK_KEY},
+            )
+            assert await archiver.run_once() == 0
+    assert archiver.stats()["skipped_locked"] == 1
+    assert await archiver.run_once() == len(aged_deal[2])
@@ -0,0 +1,109 @@
+import pytest
+from app.repositories.activity_repo import ActivityRepository, payload_text
+from tests.helpers import comment, create_deal, org_id, register
+
+
+async def _set_status(client, headers, deal_id: int, status: str):
+    r = await client.patch(
+        f"/api/v1/deals/{deal_id}",
+        json={"status": status, "stage": None, "title": None, "amount": None},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+
+
+@pytest.fixture
+async def history(client):
+    """new -> in_progress -> won, new -> lost, and a comment."""
+    headers = await register(client, "history@example.com")
+    won = await create_deal(client, headers, "Won", amount=100)
+    lost = await create_deal(client, headers, "Lost", amount=50)
+    await _set_status(client, headers, won["id"], "in_progress")
+    await _set_status(client, headers, won["id"], "won")
+    await _set_status(client, headers, lost["id"], "lost")
+    # a comment whose payload happens to carry a "to" key as well
+    note = await comment(client, headers, won["id"], "done")
+    r = await client.post(
+        f"/api/v1/deals/{won['id']}/activities",
+        json={"type": "comment", "payload": {"text": "x", "to": "won"}},
+        headers=headers,
+    )
+    return headers, won, lost, note, r.json()
+
+
+async def test_activities_filter_by_type_and_payload(client, history):
+    headers, won, lost, note, tagged = history
+
+    async def query(**params):
+        r = await client.get(
+            "/api/v1/activities", params=params, headers=headers
+        )
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    changed = await query(type="status_changed", to="won")
+    assert [(r["deal_id"], r["payload"]["from"]) for r in changed] == [
+        (won["id"], "in_progress")
+    ]
+    rows = await query(type="status_changed", **{"from": "new"})
+    assert [r["payload"]["to"] for r in rows] == ["lost", "in_progress"]
+    # payload filters are containment: any activity type with to=won
+    rows = await query(to="won")
+    assert [r["id"] for r in rows] == [tagged["id"], changed[0]["id"]]
+    rows = await query(type="comment", deal_id=won["id"])
+    assert [r["id"] for r in rows] == [tagged["id"], note["id"]]
+    rows = await query(type=["comment", "status_changed"], limit=2)
+    assert [r["id"] for r in rows] == [tagged["id"], note["id"]]
+    older = await query(before_id=rows[-1]["id"], type="comment")
+    assert older == []
+
+
+async def test_repository_payload_containment(session, history):
+    headers, won, lost, note, tagged = history
+    repo = ActivityRepository(session)
+    rows = await repo.query(
+        org_id(headers), payload={"from": "in_progress", "to": "won"}
+    )
+    assert [r.type for r in rows] == ["status_changed"]
+    assert await repo.query(
+        org_id(headers), payload={"from": "won", "to": "won"}
+    ) == []
+    rows = await repo.query(org_id(headers), payload={"text": "done"})
+    assert [r.id for r in rows] == [note["id"]]
+
+
+def test_payload_keys_must_be_identifiers():
+    assert "->>" in str(payload_text("to"))
+    for key in ("to'; DROP TABLE activities; --", "a b", "", "1st"):
+        with pytest.raises(ValueError):
+            payload_text(key)
+
+
+async def test_status_transitions_are_counted_by_from_and_to(
+    client, history
+):
+    headers = history[0]
+    other = await register(client, "other-history@example.com", org="B")
+    deal = await create_deal(client, other, "Elsewhere", amount=1)
+    await _set_status(client, other, deal["id"], "lost")
+
+    r = await client.get(
+        "/api/v1/analytics/deals/status-transitions", headers=headers
+    )
+    assert r.status_code == 200
+    transitions = sorted(
+        (t["from"], t["to"], t["count"]) for t in r.json()["transitions"]
+    )
+    assert transitions == [
+        ("in_progress", "won", 1),
+        ("new", "in_progress", 1),
+        ("new", "lost", 1),
+    ]
+    r = await client.get(
+        "/api/v1/analytics/deals/status-transitions",
+        params={"to": "lost"},
+        headers=headers,
+    )
+    assert r.json()["transitions"] == [
+        {"from": "new", "to": "lost", "count": 1}
+    ]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import pytest
+from app import app
+from app.workers.activity_listener import ActivityBroadcaster
+from tests.helpers import add_member, comment, create_deal, org_id, register
+
+
+@pytest.fixture
+def broadcaster(session_factory):
+    # no LISTEN connection: tests feed notifications to `_load` directly
+    broadcaster = ActivityBroadcaster(session_factory, dsn="")
+    broadcaster.listening = True
+    app.state.activity_broadcaster = broadcaster
+    yield broadcaster
+    del app.state.activity_broadcaster
+
+
+def _events(body: str) -> list:
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+async def _connected(broadcaster, subscribers=1):
+    while broadcaster.stats()["subscribers"] < subscribers:
+        await asyncio.sleep(0.01)
+    # let the handler finish with the shared test session
+    await asyncio.sleep(0.05)
+
+
+async def _drain_and_close(broadcaster):
+    # `close` drops whatever the client has not read yet
+    for subs in broadcaster._subs.values():
+        for sub in subs:
+            while not sub.queue.empty():
+                await asyncio.sleep(0.01)
+    broadcaster._close_all()
+
+
+def _notes(headers, *activities):
+    return [
+        {"id": a["id"], "organization_id": org_id(headers)}
+        for a in activities
+    ]
+
+
+async def test_stream_checks_deal_ownership_per_event(
+    client, session, broadcaster
+):
+    owner = await register(client, "sse-owner@example.com")
+    member = await add_member(
+        client, session, owner, "sse-member@example.com"
+    )
+    theirs = await create_deal(client, owner, "Theirs")
+
+    stream = asyncio.create_task(
+        client.get("/api/v1/activities/stream", headers=member)
+    )
+    await _connected(broadcaster)
+    # created after the member connected: still streamed to them
+    mine = await create_deal(client, member, "Mine")
+    hidden = await comment(client, owner, theirs["id"], "not for members")
+    shown = await comment(client, member, mine["id"], "mine")
+    await broadcaster._load(_notes(owner, hidden, shown))
+    await _drain_and_close(broadcaster)
+
+    r = await stream
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert [e["id"] for e in _events(r.text)] == [shown["id"]]
+    assert broadcaster.stats()["subscribers"] == 0
+
+
+async def test_broadcaster_fans_out_by_org_and_deal(
+    client, session, broadcaster
+):
+    acme = await register(client, "fan-acme@example.com")
+    other = await register(client, "fan-other@example.com", org="Other")
+    first = await create_deal(client, acme, "First")
+    second = await create_deal(client, acme, "Second")
+    events = [
+        await comment(client, acme, first["id"], "1"),
+        await comment(client, acme, second["id"], "2"),
+    ]
+
+    everything = broadcaster.subscribe(org_id(acme))
+    one_deal = broadcaster.subscribe(org_id(acme), deal_id=second["id"])
+    elsewhere = broadcaster.subscribe(org_id(other))
+    await broadcaster._load(_notes(acme, *events))
+
+    assert [everything.queue.get_nowait()["id"] for _ in events] == [
+        e["id"] for e in events
+    ]
+    assert one_deal.queue.get_nowait()["id"] == events[1]["id"]
+    assert one_deal.queue.empty() and elsewhere.queue.empty()
+    assert broadcaster.stats()["delivered"] == 3
+
+
+async def test_stream_replays_after_last_event_id(
+    client, session, broadcaster
+):
+    headers = await register(client, "replay@example.com")
+    deal = await create_deal(client, headers, "Replay")
+    events = [
+        await comment(client, headers, deal["id"], str(n)) for n in range(3)
+    ]
+
+    stream = asyncio.create_task(
+        client.get(
+            "/api/v1/activities/stream",
+            headers={**headers, "Last-Event-ID": str(events[0]["id"])},
+        )
+    )
+    await _connected(broadcaster)
+    # a live duplicate of a replayed row is not sent twice
+    await broadcaster._load(_notes(headers, events[2]))
+    await _drain_and_close(broadcaster)
+    r = await stream
+    replayed = _events(r.text)
+    assert [e["id"] for e in replayed] == [e["id"] for e in events[1:]]
+    assert replayed[0]["payload"] == {"text": "1"}
+
+
+async def test_stream_unavailable_without_listener(client):
+    headers = await register(client, "nolisten@example.com")
+    r = await client.get("/api/v1/activities/stream", headers=headers)
+    assert r.status_code == 503
@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.core.admission import (
+    SHARED_BUCKET,
+    AdmissionController,
+    AdmissionMiddleware,
+)
+from app.core.security import TokenService
+
+
+def _headers(org: str, **token) -> dict:
+    """X-Organization-Id plus a bearer token (`orgs=` embeds members)."""
+    access = TokenService().create_access_token(subject=1, **token)
+    return {"X-Organization-Id": org, "Authorization": f"Bearer {access}"}
+
+
+async def test_admission_queues_then_rejects_per_org():
+    ctl = AdmissionController(
+        org_capacity=4,
+        max_waiters=1,
+        max_wait=0.05,
+        route_weights={"/api/v1/analytics": 4, "/api/v1/activities/stream": 0},
+        route_capacity={},
+    )
+    heavy = await ctl.acquire("1", "/api/v1/analytics/deals/summary")
+    assert heavy == ("/api/v1/analytics", 4)
+    # the org budget is used up: one request waits, the next is refused
+    waiting = asyncio.ensure_future(ctl.acquire("1", "/api/v1/deals"))
+    await asyncio.sleep(0)
+    assert await ctl.acquire("1", "/api/v1/deals") is None
+    # other organizations and unweighted routes are unaffected
+    assert await ctl.acquire("2", "/api/v1/deals") == ("default", 1)
+    stream = await ctl.acquire("1", "/api/v1/activities/stream")
+    assert stream == ("/api/v1/activities/stream", 0)
+    ctl.release("1", *heavy)
+    assert await waiting == ("default", 1)
+    assert ctl.stats()["rejected_org"] == 1
+
+
+@pytest.fixture
+async def gated():
+    """
+    AdmissionMiddleware (one unit per organization, one waiter) in front
+    of an app whose /slow requests hold their unit until the gate opens.
+    """
+    gate = asyncio.Event()
+    started = asyncio.Queue()
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            started.put_nowait(scope["path"])
+            await gate.wait()
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": []}
+        )
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    controller = AdmissionController(
+        org_capacity=1,
+        max_waiters=1,
+        max_wait=5,
+        route_weights={},
+        route_capacity={},
+    )
+    middleware = AdmissionMiddleware(app, controller=controller)
+    async with AsyncClient(
+        transport=ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        yield client, controller, gate, started
+        gate.set()
+
+
+async def _until_queued(controller: AdmissionController, org: str):
+    while not controller.stats()["busiest_orgs"].get(org, {}).get("queued"):
+        await asyncio.sleep(0)
+
+
+async def test_full_queue_answers_429(gated):
+    client, controller, gate, started = gated
+    org = _headers("1")
+    running = asyncio.ensure_future(client.get("/slow", headers=org))
+    await started.get()
+    queued = asyncio.ensure_future(client.get("/fast", headers=org))
+    await _until_queued(controller, "1")
+
+    r = await client.get("/fast", headers=org)
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "5"
+    assert r.json() == {
+        "detail": "Too many concurrent requests for this organization"
+    }
+
+    gate.set()
+    assert (await running).status_code == 200
+    assert (await queued).status_code == 200
+    assert controller.stats()["rejected_org"] == 1
+    # both released: idle organizations are forgotten
+    assert controller.stats()["active_orgs"] == 0
+
+
+async def test_busy_org_does_not_hold_up_others(gated):
+    client, controller, gate, started = gated
+    busy = _headers("1")
+    running = asyncio.ensure_future(client.get("/slow", headers=busy))
+    await started.get()
+    queued = asyncio.ensure_future(client.get("/fast", headers=busy))
+    await _until_queued(controller, "1")
+    assert (await client.get("/fast", headers=busy)).status_code == 429
+
+    # another organization and requests without one go straight through
+    r = await client.get("/fast", headers=_headers("2"))
+    assert r.status_code == 200
+    assert (await client.get("/fast")).status_code == 200
+    assert not queued.done()
+
+    gate.set()
+    assert (await running).status_code == 200
+    assert (await queued).status_code == 200
+    assert controller.stats()["rejected_org"] == 1
+
+
+def test_unauthenticated_traffic_is_charged_to_the_shared_bucket():
+    def bucket(headers: dict):
+        return AdmissionMiddleware.bucket(
+            [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        )
+
+    assert bucket(_headers("7")) == "7"
+    assert bucket(_headers("7", orgs={7: "member"})) == "7"
+    # not a member according to the token itself
+    assert bucket(_headers("8", orgs={7: "member"})) == SHARED_BUCKET
+    assert bucket({"X-Organization-Id": "7"}) == SHARED_BUCKET
+    forged = {**_headers("7"), "Authorization": "Bearer not-a-token"}
+    assert bucket(forged) == SHARED_BUCKET
+    refresh = TokenService().create_refresh_token(1)
+    forged["Authorization"] = f"Bearer {refresh}"
+    assert bucket(forged) == SHARED_BUCKET
+    assert bucket({"Authorization": _headers("7")["Authorization"]}) is None
+
+
+async def test_forged_org_headers_do_not_spend_the_tenant_budget(gated):
+    client, controller, gate, started = gated
+    running = asyncio.ensure_future(
+        client.get("/slow", headers={"X-Organization-Id": "1"})
+    )
+    await started.get()
+    # the shared bucket is busy; the real tenant is not
+    r = await client.get("/fast", headers=_headers("1"))
+    assert r.status_code == 200
+    assert controller.stats()["busiest_orgs"] == {
+        SHARED_BUCKET: {"in_use": 1, "queued": 0}
+    }
+    gate.set()
+    assert (await running).status_code == 200
@@ -0,0 +1,76 @@
+from decimal import Decimal
+from app.models.models import DealStage
+from app.schemas.deal import DealBoardColumn
+from tests.helpers import create_contact, create_deal, register
+
+
+async def test_board_groups_and_pages_deals_by_stage(client):
+    headers = await register(client, "board@example.com", "Board")
+    contact = await create_contact(client, headers, "Kanban")
+    ids = []
+    for amount in (10, 20, 30, 40):
+        deal = await create_deal(
+            client, headers, "d", contact_id=contact["id"], amount=amount
+        )
+        ids.append(deal["id"])
+    r = await client.patch(
+        f"/api/v1/deals/{ids[0]}",
+        json={
+            "stage": "proposal",
+            "status": None,
+            "title": None,
+            "amount": None,
+        },
+        headers=headers,
+    )
+    assert r.status_code == 200
+
+    params = {"limit": 2, "order_by": "amount"}
+    r = await client.get(
+        "/api/v1/deals/board", params=params, headers=headers
+    )
+    assert r.status_code == 200
+    columns = {c["stage"]: c for c in r.json()["columns"]}
+    assert list(columns) == [stage.value for stage in DealStage]
+    first = columns["qualification"]
+    assert (first["total"], first["total_amount"]) == (3, "90.00")
+    assert [d["amount"] for d in first["items"]] == ["40.00", "30.00"]
+    assert columns["proposal"]["total"] == 1
+    assert columns["proposal"]["next_cursor"] is None
+    assert columns["closed"] == {
+        "stage": "closed",
+        "total": 0,
+        "total_amount": "0.00",
+        "items": [],
+        "next_cursor": None,
+    }
+
+    r = await client.get(
+        "/api/v1/deals/board",
+        params={**params, "cursor": first["next_cursor"]},
+        headers=headers,
+    )
+    (more,) = r.json()["columns"]
+    assert more["stage"] == "qualification" and more["total"] == 3
+    assert [d["amount"] for d in more["items"]] == ["20.00"]
+    assert more["next_cursor"] is None
+
+    r = await client.get(
+        "/api/v1/deals/board",
+        params={"cursor": first["next_cursor"]},
+        headers=headers,
+    )
+    assert r.status_code == 400
+
+
+def test_board_total_is_not_bounded_like_a_single_amount():
+    # far more than NUMERIC(12, 2) holds: a stage's sum of many deals
+    column = DealBoardColumn(
+        stage="qualification",
+        total=10**6,
+        total_amount=Decimal("123456789012345678.90"),
+        items=[],
+    )
+    assert column.model_dump(mode="json")["total_amount"] == (
+        "123456789012345678.90"
+    )
@@ -0,0 +1,50 @@
+from tests.helpers import create_contact, create_deal, register
+
+
+async def test_contacts_ranked_by_open_pipeline(client):
+    headers = await register(client, "pipeline@example.com", "Pipeline")
+    contacts = {
+        name: (await create_contact(client, headers, name))["id"]
+        for name in ("small", "big", "idle")
+    }
+    for name, amount in (("small", 10), ("big", 500), ("big", 70)):
+        deal = await create_deal(
+            client, headers, "deal", contact_id=contacts[name], amount=amount
+        )
+    # a lost deal leaves the open pipeline
+    r = await client.patch(
+        f"/api/v1/deals/{deal['id']}",
+        json={"status": "lost", "stage": None, "title": None, "amount": None},
+        headers=headers,
+    )
+    assert r.status_code == 200
+
+    r = await client.get(
+        "/api/v1/contacts",
+        params={"order_by": "open_amount", "min_deals": 1},
+        headers=headers,
+    )
+    ranked = [
+        (c["name"], c["deals_count"], c["open_amount"]) for c in r.json()
+    ]
+    assert ranked == [("big", 2, "500.00"), ("small", 1, "10.00")]
+    assert r.json()[0]["last_activity_at"] is not None
+
+    r = await client.delete(
+        f"/api/v1/contacts/{contacts['big']}", headers=headers
+    )
+    assert r.status_code == 409
+    r = await client.delete(
+        f"/api/v1/contacts/{contacts['idle']}", headers=headers
+    )
+    assert r.status_code == 204
+
+
+async def test_contact_email_and_phone_are_optional(client):
+    headers = await register(client, "optional@example.com", "Optional")
+    contact = await create_contact(client, headers, "Nameless")
+    assert (contact["email"], contact["phone"]) == (None, None)
+    contact = await create_contact(
+        client, headers, "Null", email=None, phone=None
+    )
+    assert (contact["email"], contact["phone"]) == (None, None)
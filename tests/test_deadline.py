@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.core import deadline
+
+STATEMENT_TIMEOUT = text(
+    "SELECT setting::int FROM pg_settings WHERE name = 'statement_timeout'"
+)
+
+
+async def test_deadline_cancels_slow_requests():
+    seen = {}
+
+    async def slow_app(scope, receive, send):
+        seen["timeout_ms"] = deadline.statement_timeout_ms()
+        await asyncio.sleep(5)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.sleep(10)
+
+    middleware = deadline.DeadlineMiddleware(
+        slow_app, default=30, routes={"/stream": 0}, maximum=60
+    )
+    scope = {
+        "type": "http",
+        "path": "/api/v1/deals",
+        "headers": [(b"x-request-timeout", b"0.05")],
+    }
+    assert middleware.timeout_for({**scope, "path": "/stream"}) == 0
+    await middleware(scope, receive, send)
+    assert 0 < seen["timeout_ms"] <= 50
+    assert sent[0]["status"] == 504
+    assert deadline.remaining() is None
+
+
+@pytest.fixture
+def pg_sessions(test_engine):
+    """Sessions on their own connections: SET LOCAL must really commit."""
+    if test_engine.dialect.name != "postgresql":
+        pytest.skip("statement_timeout is Postgres only")
+    return async_sessionmaker(test_engine, expire_on_commit=False)
+
+
+def _app(**routes) -> AsyncClient:
+    app = FastAPI()
+    deadline.install(app)
+    for path, endpoint in routes.items():
+        app.get(f"/{path}")(endpoint)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://t")
+
+
+async def test_slow_endpoint_answers_504():
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def fast():
+        return {"left": deadline.remaining()}
+
+    before = deadline.stats()["timed_out"]
+    async with _app(slow=slow, fast=fast) as client:
+        r = await client.get("/slow", headers={"X-Request-Timeout": "0.05"})
+        assert r.status_code == 504
+        assert r.json() == {"detail": "Request deadline exceeded"}
+        r = await client.get("/fast", headers={"X-Request-Timeout": "2"})
+        assert r.status_code == 200 and 0 < r.json()["left"] <= 2
+    assert deadline.stats()["timed_out"] == before + 1
+
+
+async def test_sessions_set_local_statement_timeout(pg_sessions):
+    async def timeout():
+        async with pg_sessions() as session:
+            return {"ms": (await session.execute(STATEMENT_TIMEOUT)).scalar()}
+
+    async with _app(timeout=timeout) as client:
+        r = await client.get("/timeout", headers={"X-Request-Timeout": "3"})
+    assert 2000 < r.json()["ms"] <= 3000
+
+    # SET LOCAL ended with the request's transaction: pooled
+    # connections carry no timeout outside a request
+    async with pg_sessions() as session:
+        assert (await session.execute(STATEMENT_TIMEOUT)).scalar() == 0
+
+
+async def test_cancelled_statement_answers_504(pg_sessions):
+    async def sleepy():
+        async with pg_sessions() as session:
+            # what the request deadline does, but shorter than the
+            # middleware's own timer so Postgres cancels first
+            await session.execute(text("SET LOCAL statement_timeout = 10"))
+            await session.execute(text("SELECT pg_sleep(1)"))
+
+    before = deadline.stats()["statement_timeouts"]
+    async with _app(sleepy=sleepy) as client:
+        r = await client.get("/sleepy")
+    assert r.status_code == 504
+    assert r.json() == {"detail": "Request deadline exceeded"}
+    assert deadline.stats()["statement_timeouts"] == before + 1
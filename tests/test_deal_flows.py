@@ -14,10 +14,10 @@ async def test_create_and_update_deal(client, session):
     tokens = r.json()
     access = tokens["access_token"]
 
-    headers = {
-        "Authorization": f"Bearer {access}",
-        "X-Organization-Id": "1",
-    }
+    headers = {"Authorization": f"Bearer {access}"}
+    # the org id is not 1 once other tests used the sequence
+    r = await ac.get("/api/v1/organizations/me", headers=headers)
+    headers["X-Organization-Id"] = str(r.json()[0]["id"])
 
     # create contact
     r = await ac.post(
@@ -0,0 +1,130 @@
+from tests.helpers import add_member, comment, create_deal, register
+
+PATCH = {"status": None, "stage": None, "title": "renamed", "amount": None}
+
+
+async def test_members_get_403_on_other_members_deals(client, session):
+    owner = await register(client, "perm-owner@example.com")
+    member = await add_member(
+        client, session, owner, "perm-member@example.com"
+    )
+    theirs = await create_deal(client, owner, "Theirs")
+    mine = await create_deal(client, member, "Mine")
+    url = f"/api/v1/deals/{theirs['id']}"
+
+    r = await client.patch(url, json=PATCH, headers=member)
+    assert r.status_code == 403
+    r = await client.delete(url, headers=member)
+    assert r.status_code == 403
+    r = await client.post(
+        f"{url}/activities",
+        json={"type": "comment", "payload": {"text": "x"}},
+        headers=member,
+    )
+    assert r.status_code == 403
+
+    r = await client.patch(
+        f"/api/v1/deals/{mine['id']}", json=PATCH, headers=member
+    )
+    assert r.status_code == 200 and r.json()["title"] == "renamed"
+    await comment(client, member, mine["id"], "own deal")
+    r = await client.delete(f"/api/v1/deals/{mine['id']}", headers=member)
+    assert r.status_code == 204
+
+    # gone, or in another organization: 404 either way
+    r = await client.patch(
+        f"/api/v1/deals/{mine['id']}", json=PATCH, headers=member
+    )
+    assert r.status_code == 404
+    stranger = await register(client, "perm-stranger@example.com", "S")
+    r = await client.delete(url, headers=stranger)
+    assert r.status_code == 404
+
+
+async def test_managers_modify_any_deal_of_the_org(client, session):
+    owner = await register(client, "mgr-owner@example.com")
+    manager = await add_member(
+        client, session, owner, "mgr@example.com", role="manager"
+    )
+    deal = await create_deal(client, owner, "Owners")
+    url = f"/api/v1/deals/{deal['id']}"
+    r = await client.patch(url, json=PATCH, headers=manager)
+    assert r.status_code == 200
+    await comment(client, manager, deal["id"], "manager note")
+    r = await client.delete(url, headers=manager)
+    assert r.status_code == 204
+
+
+async def test_members_use_org_contacts_but_read_only_own_deals(
+    client, session
+):
+    owner = await register(client, "scope-owner@example.com")
+    member = await add_member(
+        client, session, owner, "scope-member@example.com"
+    )
+    theirs = await create_deal(client, owner, "Theirs")
+
+    # the owner's contact is fine for the member's own deal
+    r = await client.post(
+        "/api/v1/deals",
+        json={"contact_id": theirs["contact_id"], "title": "Shared"},
+        headers=member,
+    )
+    assert r.status_code == 201 and r.json()["owner_id"] != theirs["owner_id"]
+    stranger = await register(client, "scope-stranger@example.com", "S")
+    elsewhere = await create_deal(client, stranger, "Elsewhere")
+    r = await client.post(
+        "/api/v1/deals",
+        json={"contact_id": elsewhere["contact_id"], "title": "No"},
+        headers=member,
+    )
+    assert r.status_code == 404
+
+    r = await client.get(f"/api/v1/deals/{theirs['id']}", headers=member)
+    assert r.status_code == 404
+    r = await client.get(f"/api/v1/deals/{theirs['id']}", headers=owner)
+    assert r.status_code == 200
+
+
+async def test_deleting_a_deal_publishes_an_outbox_event(client, session):
+    from sqlalchemy import select
+    from app.models.models import Activity, OutboxEvent
+
+    owner = await register(client, "gone@example.com")
+    deal = await create_deal(client, owner, "Gone")
+    await comment(client, owner, deal["id"], "bye")
+    r = await client.delete(f"/api/v1/deals/{deal['id']}", headers=owner)
+    assert r.status_code == 204
+
+    q = await session.execute(
+        select(Activity.id).filter_by(deal_id=deal["id"])
+    )
+    assert q.all() == []
+    q = await session.execute(
+        select(OutboxEvent.payload).filter_by(topic="deal.deleted")
+    )
+    (payload,) = q.scalars().all()
+    assert payload["deal_id"] == deal["id"]
+
+
+async def test_modifiable_deal_ids_by_org_and_owner(client, session):
+    owner = await register(client, "batch-owner@example.com")
+    member = await add_member(
+        client, session, owner, "batch-member@example.com"
+    )
+    theirs = await create_deal(client, owner, "Theirs")
+    mine = await create_deal(client, member, "Mine")
+    stranger = await register(client, "batch-stranger@example.com", "S")
+    elsewhere = await create_deal(client, stranger, "Elsewhere")
+    ids = [theirs["id"], mine["id"], elsewhere["id"], elsewhere["id"] + 99]
+
+    async def modifiable(headers):
+        r = await client.get(
+            "/api/v1/deals/modifiable", params={"ids": ids}, headers=headers
+        )
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    assert await modifiable(member) == [mine["id"]]
+    assert await modifiable(owner) == sorted([theirs["id"], mine["id"]])
+    assert await modifiable(stranger) == [elsewhere["id"]]
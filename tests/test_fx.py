@@ -0,0 +1,109 @@
+import asyncio
+from decimal import Decimal
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.models import FxRate
+from app.repositories.fx_rate_repo import FxRateRepository
+from tests.helpers import create_deal, register
+
+
+async def test_summary_converts_amounts_to_requested_currency(client):
+    headers = await register(client, "fx@example.com", "FX")
+    deals = {
+        currency: await create_deal(
+            client,
+            headers,
+            f"{currency} deal",
+            amount=amount,
+            currency=currency,
+        )
+        for amount, currency in ((100, "USD"), (200, "EUR"), (50, "XYZ"))
+    }
+    assert deals["USD"]["amount_base"] == "100.00"
+    assert deals["EUR"]["amount_base"] is None  # no rate yet
+
+    r = await client.put(
+        "/api/v1/fx-rates",
+        json={"rates": {"EUR": "1.5"}},
+        headers=headers,
+    )
+    assert r.status_code == 200
+    r = await client.get(
+        f"/api/v1/deals/{deals['EUR']['id']}", headers=headers
+    )
+    assert r.json()["amount_base"] == "300.00"
+
+    r = await client.get("/api/v1/analytics/deals/summary", headers=headers)
+    summary = r.json()
+    assert summary["total_amount"] == 400.0
+    assert summary["currency"] == "USD"
+    assert summary["unconverted_deals"] == 1
+    r = await client.get(
+        "/api/v1/analytics/deals/summary",
+        params={"currency": "eur"},
+        headers=headers,
+    )
+    assert r.json()["total_amount"] == 266.67
+    r = await client.get(
+        "/api/v1/analytics/deals/summary",
+        params={"currency": "GBP"},
+        headers=headers,
+    )
+    assert r.status_code == 400
+
+
+async def test_renormalized_amounts_round_to_cents_and_fit(client):
+    headers = await register(client, "fx-round@example.com", "FX")
+    deal = await create_deal(
+        client, headers, "Odd", amount="10.01", currency="EUR"
+    )
+    rates = "/api/v1/fx-rates"
+    r = await client.put(
+        rates, json={"rates": {"EUR": "1.3333"}}, headers=headers
+    )
+    assert r.status_code == 200
+    r = await client.get(f"/api/v1/deals/{deal['id']}", headers=headers)
+    assert r.json()["amount_base"] == "13.35"  # 13.346333
+
+    big = await create_deal(
+        client, headers, "Big", amount="9000000000", currency="JPY"
+    )
+    r = await client.put(rates, json={"rates": {"JPY": "2"}}, headers=headers)
+    assert r.status_code == 400
+    assert "1 deal amounts would exceed" in r.json()["detail"]
+    # nothing was loaded
+    r = await client.get(f"/api/v1/deals/{big['id']}", headers=headers)
+    assert r.json()["amount_base"] is None
+    r = await client.get(rates, headers=headers)
+    assert "JPY" not in r.json()["rates"]
+
+
+@pytest.fixture
+def pg_factory(test_engine):
+    """Sessions on their own connections: locks are really contended."""
+    if test_engine.dialect.name != "postgresql":
+        pytest.skip("advisory locks are Postgres only")
+    return async_sessionmaker(test_engine, expire_on_commit=False)
+
+
+async def test_concurrent_loads_take_distinct_versions(pg_factory):
+    async with pg_factory() as first, pg_factory() as second:
+        try:
+            version = await FxRateRepository(first).upsert(
+                {"EUR": Decimal("1.1")}
+            )
+            later = asyncio.ensure_future(
+                FxRateRepository(second).upsert({"GBP": Decimal("1.3")})
+            )
+            await asyncio.sleep(0.2)
+            # the second load waits for the first one's lock
+            assert not later.done()
+            await first.commit()
+            assert await later == version + 1
+            await second.commit()
+        finally:
+            await first.execute(
+                delete(FxRate).filter(FxRate.currency.in_(["EUR", "GBP"]))
+            )
+            await first.commit()
@@ -0,0 +1,152 @@
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.db.migrations import downgrade, pending, upgrade
+from app.models.models import (
+    Activity,
+    Contact,
+    Deal,
+    Organization,
+    Task,
+    User,
+)
+
+
+async def _seed(engine):
+    """Two organizations, each with a deal, a task and an activity."""
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    deals = []
+    async with factory() as session:
+        async with session.begin():
+            for name in ("First", "Second"):
+                org = Organization(name=name)
+                user = User(email=f"{name}@example.com", hashed_password="x")
+                session.add_all([org, user])
+                await session.flush()
+                contact = Contact(
+                    organization_id=org.id, owner_id=user.id, name=name
+                )
+                session.add(contact)
+                await session.flush()
+                deal = Deal(
+                    organization_id=org.id,
+                    contact_id=contact.id,
+                    owner_id=user.id,
+                    title=name,
+                )
+                session.add(deal)
+                await session.flush()
+                session.add_all(
+                    [
+                        Task(
+                            deal_id=deal.id,
+                            organization_id=org.id,
+                            title=name,
+                            description="",
+                            due_date=datetime.now(timezone.utc),
+                        ),
+                        Activity(
+                            deal_id=deal.id,
+                            organization_id=org.id,
+                            type="comment",
+                            payload={"text": name},
+                        ),
+                    ]
+                )
+                deals.append(deal)
+    return {d.id: (d.organization_id, d.owner_id) for d in deals}
+
+
+async def test_denormalization_backfills_organization_and_owner(
+    scratch_engine,
+):
+    revisions = [f"{n:04d}" for n in range(1, 10)]
+    assert await upgrade(scratch_engine) == revisions
+    deals = await _seed(scratch_engine)
+
+    # back to before 0002: the columns are gone
+    await downgrade(scratch_engine, "0001")
+    async with scratch_engine.connect() as conn:
+        q = await conn.execute(
+            text(
+                "SELECT count(*) FROM information_schema.columns "
+                "WHERE column_name = 'organization_id' "
+                "AND table_name IN ('tasks', 'activities')"
+            )
+        )
+        assert q.scalar() == 0
+    assert [s.revision for s in await pending(scratch_engine)] == (
+        revisions[1:]
+    )
+
+    assert await upgrade(scratch_engine) == revisions[1:]
+
+    async with scratch_engine.connect() as conn:
+        q = await conn.execute(
+            text("SELECT deal_id, organization_id, owner_id FROM tasks")
+        )
+        assert {r.deal_id: (r.organization_id, r.owner_id) for r in q} == (
+            deals
+        )
+        q = await conn.execute(
+            text("SELECT deal_id, organization_id FROM activities")
+        )
+        assert {r.deal_id: r.organization_id for r in q} == {
+            deal_id: org_id for deal_id, (org_id, _) in deals.items()
+        }
+        q = await conn.execute(
+            text(
+                "SELECT table_name FROM information_schema.columns "
+                "WHERE column_name = 'organization_id' "
+                "AND table_name IN ('tasks', 'activities') "
+                "AND is_nullable = 'NO'"
+            )
+        )
+        assert sorted(q.scalars().all()) == ["activities", "tasks"]
+    # nothing left to apply the second time round
+    assert await upgrade(scratch_engine) == []
+
+
+async def test_amount_base_backfill_binds_the_base_currency(scratch_engine):
+    await upgrade(scratch_engine)
+    deals = sorted(await _seed(scratch_engine))
+    async with scratch_engine.begin() as conn:
+        for statement, params in (
+            ("UPDATE deals SET amount = 100, amount_base = NULL", {}),
+            (
+                "UPDATE deals SET currency = 'EUR' WHERE id = :id",
+                {"id": deals[1]},
+            ),
+            (
+                "INSERT INTO fx_rates (currency, rate, version) "
+                "VALUES ('EUR', 1.5, 1)",
+                {},
+            ),
+        ):
+            await conn.execute(text(statement), params)
+
+    await downgrade(scratch_engine, "0006")
+    assert (await upgrade(scratch_engine))[0] == "0007"
+    async with scratch_engine.connect() as conn:
+        q = await conn.execute(
+            text("SELECT id, amount_base FROM deals ORDER BY id")
+        )
+        assert [(r.id, float(r.amount_base)) for r in q] == [
+            (deals[0], 100.0),
+            (deals[1], 150.0),
+        ]
+
+
+async def test_databases_of_the_former_runner_are_stamped(scratch_engine):
+    await upgrade(scratch_engine)
+    await downgrade(scratch_engine, "0008")
+    async with scratch_engine.begin() as conn:
+        for statement in (
+            "DROP TABLE alembic_version",
+            "CREATE TABLE schema_migrations (id VARCHAR(128) PRIMARY KEY)",
+            "INSERT INTO schema_migrations VALUES "
+            "('0001_outbox_stream_reminders'), ('0008_contact_aggregates')",
+        ):
+            await conn.execute(text(statement))
+    assert await upgrade(scratch_engine) == ["0009"]
+    assert await pending(scratch_engine) == []
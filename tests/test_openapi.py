@@ -0,0 +1,24 @@
+import json
+from fastapi.testclient import TestClient
+from app import api_schema, app
+
+
+def test_openapi_artifact_matches_live_routes():
+    path = api_schema.artifact_path()
+    assert path.is_file(), "missing artifact: run `python -m app openapi`"
+    live = json.loads(api_schema.render(api_schema.generate(app)))
+    assert json.loads(path.read_bytes()) == live, (
+        "stale artifact: run `python -m app openapi`"
+    )
+
+
+def test_openapi_served_with_etag():
+    client = TestClient(app)
+    r = client.get("/openapi.json")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.json()["info"]["title"] == app.title
+
+    r = client.get("/openapi.json", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert client.get("/docs").status_code == 200
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import pytest
+import httpx
+from app.workers.outbox import (
+    InMemorySink,
+    NDJSONFileSink,
+    OutboxDispatcher,
+    WebhookSink,
+)
+
+EVENTS = [
+    {"id": 1, "topic": "activity.comment", "deal_id": 1},
+    {"id": 2, "topic": "activity.status_changed", "deal_id": 1},
+]
+
+
+async def _webhook_server(status: int, received: list):
+    """Minimal local HTTP server recording request bodies."""
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.decode().split("\r\n"):
+            if line.lower().startswith("content-length:"):
+                length = int(line.split(":", 1)[1])
+        received.append(json.loads(await reader.readexactly(length)))
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Length: 0\r\n"
+            "Connection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"http://127.0.0.1:{port}/hook"
+
+
+async def test_memory_sink_fans_out():
+    sink = InMemorySink()
+    q1, q2 = sink.subscribe(), sink.subscribe()
+    await sink.deliver(EVENTS)
+    assert [q1.get_nowait()["id"] for _ in EVENTS] == [1, 2]
+    assert q2.qsize() == 2
+
+    sink.unsubscribe(q1)
+    await sink.deliver(EVENTS[:1])
+    assert q1.empty()
+
+
+async def test_ndjson_sink_appends(tmp_path):
+    path = tmp_path / "out" / "events.ndjson"
+    sink = NDJSONFileSink(path)
+    await sink.deliver(EVENTS)
+    await sink.deliver(EVENTS[:1])
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 1]
+
+
+async def test_webhook_sink_posts_batch():
+    received: list = []
+    server, url = await _webhook_server(200, received)
+    async with server:
+        await WebhookSink(url).deliver(EVENTS)
+    assert received == [{"events": EVENTS}]
+
+
+async def test_webhook_sink_raises_for_retry():
+    received: list = []
+    server, url = await _webhook_server(503, received)
+    async with server:
+        dispatcher = OutboxDispatcher(
+            session_factory=None,  # type: ignore
+            sinks=[InMemorySink(), WebhookSink(url)],
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            await dispatcher.deliver(EVENTS)
+    assert len(received) == 1
+
+
+async def _pending(session_factory, count):
+    from app.models.models import OutboxEvent
+
+    async with session_factory() as session:
+        async with session.begin():
+            events = [
+                OutboxEvent(topic="activity.comment", payload={"n": n})
+                for n in range(count)
+            ]
+            session.add_all(events)
+    return [e.id for e in events]
+
+
+async def _rows(session_factory, ids):
+    from sqlalchemy import select
+    from app.models.models import OutboxEvent
+
+    async with session_factory() as session:
+        q = await session.execute(
+            select(OutboxEvent)
+            .filter(OutboxEvent.id.in_(ids))
+            .order_by(OutboxEvent.id)
+        )
+        return q.scalars().all()
+
+
+async def test_claim_leases_rows_until_marked(session_factory):
+    from app.repositories.outbox_repo import OutboxRepository
+
+    ids = await _pending(session_factory, 3)
+    async with session_factory() as session:
+        async with session.begin():
+            claimed = await OutboxRepository(session).claim_batch(2, 60)
+    assert [e.id for e in claimed] == ids[:2]
+    # leased rows are invisible to the next claim, even after commit
+    async with session_factory() as session:
+        async with session.begin():
+            rest = await OutboxRepository(session).claim_batch(10, 60)
+    assert [e.id for e in rest] == ids[2:]
+
+    async with session_factory() as session:
+        async with session.begin():
+            await OutboxRepository(session).mark_processed(ids[:2])
+    rows = await _rows(session_factory, ids)
+    assert [r.processed_at is not None for r in rows] == [True, True, False]
+
+
+async def test_dispatcher_delivers_then_marks(session_factory):
+    sink = InMemorySink()
+    queue = sink.subscribe()
+    ids = await _pending(session_factory, 3)
+    dispatcher = OutboxDispatcher(session_factory, [sink], batch_size=10)
+    assert await dispatcher.run_once() == 3
+    assert [queue.get_nowait()["n"] for _ in ids] == [0, 1, 2]
+    rows = await _rows(session_factory, ids)
+    assert all(r.processed_at is not None for r in rows)
+    assert await dispatcher.run_once() == 0
+    assert dispatcher.stats()["delivered"] == 3
+
+
+class FailingSink:
+    name = "failing"
+
+    async def deliver(self, events):
+        raise ConnectionError("sink unavailable")
+
+
+async def test_dispatcher_backs_off_when_a_sink_fails(session_factory):
+    from datetime import datetime, timedelta, timezone
+
+    ids = await _pending(session_factory, 3)
+    dispatcher = OutboxDispatcher(
+        session_factory, [FailingSink()], batch_size=10, max_backoff=300
+    )
+    before = datetime.now(timezone.utc)
+    assert await dispatcher.run_once() == 0
+    rows = await _rows(session_factory, ids)
+    for row in rows:
+        assert row.processed_at is None and row.attempts == 1
+        assert "sink unavailable" in row.last_error
+        available_at = row.available_at
+        if available_at.tzinfo is None:  # SQLite
+            available_at = available_at.replace(tzinfo=timezone.utc)
+        assert available_at >= before + timedelta(seconds=1)
+    # still backing off
+    assert await dispatcher.run_once() == 0
+    assert dispatcher.stats()["failed"] == 3
+
+
+async def test_memory_sink_disconnects_slow_subscribers():
+    sink = InMemorySink(maxsize=2)
+    slow, fast = sink.subscribe(), sink.subscribe()
+    await sink.deliver(EVENTS)
+    assert [fast.get_nowait()["id"] for _ in EVENTS] == [1, 2]
+
+    # the slow queue has no room left: it is cut off, the batch goes on
+    await sink.deliver(EVENTS[:1])
+    assert fast.get_nowait()["id"] == 1
+    assert [slow.get_nowait() for _ in range(3)] == [*EVENTS, None]
+    assert sink.disconnected == 1
+
+    await sink.deliver(EVENTS[:1])
+    assert slow.empty() and fast.qsize() == 1
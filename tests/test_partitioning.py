@@ -0,0 +1,125 @@
+from datetime import date, datetime, timezone
+import pytest
+from sqlalchemy import event, text
+from app.core.config import settings
+from app.db import partitioning
+from app.models.models import Activity
+from app.repositories.activity_repo import ActivityRepository
+from tests.helpers import comment, create_deal, org_id, register
+
+pytestmark = pytest.mark.skipif(
+    settings.TEST_DATABASE_URL.startswith("sqlite"),
+    reason="declarative partitioning is Postgres only",
+)
+
+
+async def _timeline_plan(session, deal_id: int, org: int) -> str:
+    """EXPLAIN ANALYZE of the query behind the deal timeline."""
+    captured = []
+
+    def capture(conn, cursor, statement, params, context, executemany):
+        captured.append((statement, params))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        rows = await ActivityRepository(session).page_by_deal(deal_id, org)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, params = captured[-1]
+    raw = await (await session.connection()).get_raw_connection()
+    plan = await raw.driver_connection.fetch(
+        f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF) {statement}", *params
+    )
+    return rows, "\n".join(r[0] for r in plan)
+
+
+async def _timeline_ids(client, headers: dict, deal_id: int) -> list:
+    r = await client.get(
+        f"/api/v1/deals/{deal_id}/activities", headers=headers
+    )
+    assert r.status_code == 200
+    return [a["id"] for a in r.json()]
+
+
+async def _old_activity(session, deal: dict, headers: dict):
+    session.add(
+        Activity(
+            deal_id=deal["id"],
+            organization_id=org_id(headers),
+            type="comment",
+            payload={"text": "imported"},
+            created_at=datetime(2024, 1, 15, tzinfo=timezone.utc),
+        )
+    )
+    await session.flush()
+
+
+async def test_range_partitioning_keeps_rows_and_prunes_old_months(
+    client, session, connection
+):
+    headers = await register(client, "range@example.com")
+    old = await create_deal(client, headers, "Old")
+    await _old_activity(session, old, headers)
+    deal = await create_deal(client, headers, "New")
+    await comment(client, headers, deal["id"], "hi")
+    ids = await _timeline_ids(client, headers, deal["id"])
+
+    assert await partitioning.convert(connection, "range")
+    assert await partitioning.current_mode(connection) == "range"
+    assert not await partitioning.convert(connection, "range")
+    q = await connection.execute(
+        text("SELECT count(*) FROM activities_y2024m01")
+    )
+    assert q.scalar() == 1
+
+    rows, plan = await _timeline_plan(session, deal["id"], org_id(headers))
+    assert sorted(r.id for r in rows) == ids
+    # months before the deal was created are skipped at execution time
+    this_month = partitioning.month_partition(
+        partitioning.month_start(date.today())
+    )
+    scans = {
+        line.split(" on ")[1].split()[0]: "never executed" in line
+        for line in plan.splitlines()
+        if " on activities_y" in line
+    }
+    assert scans["activities_y2024m01"] is True
+    assert scans[this_month] is False
+
+
+async def test_hash_partitioning_prunes_other_organizations(
+    client, session, connection
+):
+    headers = await register(client, "hash@example.com")
+    deal = await create_deal(client, headers, "Hashed")
+    await comment(client, headers, deal["id"], "hi")
+    ids = await _timeline_ids(client, headers, deal["id"])
+
+    assert await partitioning.convert(connection, "hash", hash_partitions=4)
+    rows, plan = await _timeline_plan(session, deal["id"], org_id(headers))
+    assert sorted(r.id for r in rows) == ids
+    # organization_id = :org is known at planning time: one bucket
+    scanned = {
+        f"activities_h{i:02d}"
+        for i in range(4)
+        if f"activities_h{i:02d}" in plan
+    }
+    assert len(scanned) == 1
+
+
+async def test_maintain_creates_ahead_and_detaches_old_months(connection):
+    assert await partitioning.convert(connection, "range")
+    report = await partitioning.maintain(
+        connection,
+        months_ahead=12,
+        retention_months=1,
+        today=date(2030, 6, 1),
+    )
+    assert report.created[0] == "activities_y2030m06"
+    assert report.created[-1] == "activities_y2031m06"
+    this_month = partitioning.month_partition(
+        partitioning.month_start(date.today())
+    )
+    assert this_month in report.detached
+    assert "activities_y2030m05" not in report.detached
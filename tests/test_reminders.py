@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.models import (
+    Activity,
+    Contact,
+    Deal,
+    Organization,
+    OutboxEvent,
+    Task,
+    User,
+)
+from app.repositories.task_repo import TaskRepository
+from app.workers.reminders import TaskReminderScheduler
+
+
+@pytest.fixture
+async def committed_factory(test_engine):
+    """
+    Sessions on their own connections, for tests that need rows locked
+    by one transaction to be visible to another. Everything a test
+    commits through it is removed afterwards.
+    """
+    if test_engine.dialect.name != "postgresql":
+        pytest.skip("row locks / advisory locks are Postgres only")
+    factory = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with factory() as session:
+        q = await session.execute(select(func.max(OutboxEvent.id)))
+        last_event = q.scalar() or 0
+    created = {}
+    yield factory, created
+    async with factory() as session:
+        async with session.begin():
+            await session.execute(
+                delete(OutboxEvent).filter(OutboxEvent.id > last_event)
+            )
+            if "org" in created:
+                await session.execute(
+                    delete(Organization).filter_by(id=created["org"])
+                )
+            if "user" in created:
+                await session.execute(
+                    delete(User).filter_by(id=created["user"])
+                )
+
+
+@pytest.fixture
+async def due_tasks(committed_factory):
+    """Four open tasks of one deal, due within the hour."""
+    factory, created = committed_factory
+    now = datetime.now(timezone.utc)
+    async with factory() as session:
+        async with session.begin():
+            org = Organization(name="Reminders")
+            user = User(email="reminders@example.com", hashed_password="x")
+            session.add_all([org, user])
+            await session.flush()
+            created.update(org=org.id, user=user.id)
+            contact = Contact(
+                organization_id=org.id, owner_id=user.id, name="Contact"
+            )
+            session.add(contact)
+            await session.flush()
+            deal = Deal(
+                organization_id=org.id,
+                contact_id=contact.id,
+                owner_id=user.id,
+                title="Deal",
+            )
+            session.add(deal)
+            await session.flush()
+            tasks = [
+                Task(
+                    deal_id=deal.id,
+                    organization_id=org.id,
+                    owner_id=user.id,
+                    title=f"Task {i}",
+                    description="",
+                    due_date=now + timedelta(minutes=i),
+                )
+                for i in range(4)
+            ]
+            session.add_all(tasks)
+    return factory, org.id, sorted(t.id for t in tasks), now
+
+
+async def test_claim_due_skips_tasks_locked_by_another_worker(due_tasks):
+    factory, _, ids, now = due_tasks
+    due_before = now + timedelta(hours=1)
+    async with factory() as first, factory() as second:
+        async with first.begin(), second.begin():
+            mine = await TaskRepository(first).claim_due(due_before, 2)
+            theirs = await TaskRepository(second).claim_due(due_before, 10)
+    mine, theirs = [t.id for t in mine], [t.id for t in theirs]
+    # earliest first; the second worker gets only what is left
+    assert mine == ids[:2]
+    assert theirs == ids[2:]
+
+
+async def test_concurrent_schedulers_remind_each_task_once(due_tasks):
+    factory, org_id, ids, now = due_tasks
+    schedulers = [
+        TaskReminderScheduler(factory, batch_size=2, lead=timedelta(hours=1))
+        for _ in range(2)
+    ]
+    while sum(await asyncio.gather(*(s.run_once() for s in schedulers))):
+        pass
+
+    assert sum(s.reminded for s in schedulers) == len(ids)
+    async with factory() as session:
+        q = await session.execute(
+            select(Activity.payload).filter(
+                Activity.organization_id == org_id,
+                Activity.type == "task_due",
+            )
+        )
+        reminded = sorted(p["task_id"] for p in q.scalars().all())
+        q = await session.execute(
+            select(Task.id).filter(
+                Task.id.in_(ids), Task.reminded_at.is_(None)
+            )
+        )
+        assert q.scalars().all() == []
+    assert reminded == ids
@@ -0,0 +1,169 @@
+import pytest
+from app.models.models import Contact, Deal, Organization, User
+from app.repositories import Scope
+from app.repositories.contact_repo import ContactRepository
+from app.repositories.deal_repo import DealRepository
+
+
+@pytest.fixture
+async def org(session):
+    """An organization with two users, one contact each and three deals."""
+    org = Organization(name="Repo")
+    alice = User(email="alice@repo.test", hashed_password="x")
+    bob = User(email="bob@repo.test", hashed_password="x")
+    session.add_all([org, alice, bob])
+    await session.flush()
+    contacts = [
+        Contact(organization_id=org.id, owner_id=user.id, name=user.email)
+        for user in (alice, bob)
+    ]
+    session.add_all(contacts)
+    await session.flush()
+    deals = [
+        Deal(
+            organization_id=org.id,
+            contact_id=contact.id,
+            owner_id=contact.owner_id,
+            title=title,
+        )
+        for contact, title in (
+            (contacts[0], "a1"),
+            (contacts[0], "a2"),
+            (contacts[1], "b1"),
+        )
+    ]
+    session.add_all(deals)
+    await session.flush()
+    return org, alice, bob, deals
+
+
+async def test_exists_count_and_project_respect_the_scope(session, org):
+    org, alice, bob, deals = org
+    everyone = DealRepository(session, Scope(org.id))
+    own = DealRepository(session, Scope(org.id, owner_id=bob.id))
+    other_org = DealRepository(session, Scope(org.id + 1000))
+
+    assert await everyone.count() == 3
+    assert await own.count() == 1
+    assert await everyone.count(owner_id=alice.id) == 2
+    assert await other_org.count() == 0
+
+    assert await everyone.exists(title="b1")
+    assert not await own.exists(title="a1")
+    assert await own.exists(Deal.title.like("b%"))
+
+    rows = await everyone.project("id", "title", owner_id=alice.id)
+    assert sorted(row.title for row in rows) == ["a1", "a2"]
+    assert {row.id for row in await own.project("id")} == {deals[2].id}
+
+
+async def test_get_hits_the_identity_map(session, org, statements):
+    org, alice, bob, deals = org
+    repo = DealRepository(session, Scope(org.id))
+    statements.clear()
+    assert await repo.get(deals[0].id) is deals[0]
+    assert await repo.exists(id=deals[0].id, title="a1")
+    assert not await repo.exists(id=deals[0].id, title="other")
+    assert statements == []
+
+    # loaded rows outside the scope are still asked of the database
+    own = DealRepository(session, Scope(org.id, owner_id=bob.id))
+    assert await own.get(deals[0].id) is None
+    assert len(statements) == 1
+
+
+async def test_misses_are_remembered_until_the_next_flush(
+    session, org, statements
+):
+    org, alice, bob, deals = org
+    repo = ContactRepository(session, Scope(org.id))
+    missing = deals[-1].id + 1000
+    statements.clear()
+    assert await repo.get(missing) is None
+    assert await repo.get(missing) is None
+    assert not await repo.exists(id=missing)
+    assert len(statements) == 1
+
+    # an insert of that very id must not be hidden by the miss cache
+    session.add(
+        Contact(
+            id=missing, organization_id=org.id, owner_id=alice.id, name="new"
+        )
+    )
+    await session.flush()
+    session.expunge_all()
+    assert (await repo.get(missing)).name == "new"
+
+
+async def test_misses_are_forgotten_on_rollback(session, org):
+    org, alice, bob, deals = org
+    repo = DealRepository(session, Scope(org.id))
+    async with session.begin_nested() as savepoint:
+        assert await repo.get(deals[-1].id + 1000) is None
+        assert session.info["repository_misses"]
+        await savepoint.rollback()
+    assert "repository_misses" not in session.info
+
+
+async def test_get_many_queries_only_the_misses_once(
+    session, org, statements
+):
+    org, alice, bob, deals = org
+    repo = DealRepository(session, Scope(org.id))
+    missing = deals[-1].id + 1000
+    session.expunge(deals[1])
+    session.expunge(deals[2])
+    statements.clear()
+
+    found = await repo.get_many([d.id for d in deals] + [missing])
+    assert sorted(found) == sorted(d.id for d in deals)
+    assert found[deals[0].id] is deals[0]
+    # deals[0] came from the identity map, the rest from one IN query
+    assert len(statements) == 1 and " IN " in statements[0]
+
+    # everything is cached now, the missing id included
+    assert len(await repo.get_many([deals[1].id, missing])) == 1
+    assert await repo.get(missing) is None
+    assert len(statements) == 1
+
+    # the scope applies to the batch as well
+    own = DealRepository(session, Scope(org.id, owner_id=bob.id))
+    assert list(await own.get_many([d.id for d in deals])) == [deals[2].id]
+
+
+async def test_prefetch_makes_later_gets_free(session, org, statements):
+    org, alice, bob, deals = org
+    contacts = ContactRepository(session, Scope(org.id))
+    session.expunge_all()
+    statements.clear()
+    await contacts.prefetch(d.contact_id for d in deals)
+    assert len(statements) == 1
+    for deal in deals:
+        assert (await contacts.get(deal.contact_id)).id == deal.contact_id
+    assert len(statements) == 1
+
+
+async def test_deal_list_loads_parties_without_n_plus_one(client, statements):
+    from tests.helpers import create_deal, register
+
+    headers = await register(client, "parties@example.com")
+
+    async def list_deals():
+        statements.clear()
+        r = await client.get("/api/v1/deals", headers=headers)
+        assert r.status_code == 200, r.text
+        return r.json()["items"], len(statements)
+
+    await create_deal(client, headers, "First")
+    items, one_deal = await list_deals()
+    for title in ("Second", "Third"):
+        await create_deal(client, headers, title)
+    items, three_deals = await list_deals()
+
+    assert three_deals == one_deal
+    assert sorted(i["contact"]["name"] for i in items) == [
+        "First contact",
+        "Second contact",
+        "Third contact",
+    ]
+    assert {i["owner"]["name"] for i in items} == {"parties"}
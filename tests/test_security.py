@@ -0,0 +1,223 @@
+from app.core.revocation import BloomFilter, RevocationCache
+from app.core.security import TokenService
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_revocation_cache_skips_db_for_unknown_jti():
+    cache = RevocationCache(capacity=100, error_rate=0.01, lru_size=1)
+    assert cache.maybe_revoked("a") is False
+    cache.add("a")
+    assert cache.maybe_revoked("a") is True
+    cache.add("b")  # evicts "a" from the LRU, the bloom still has it
+    assert cache.maybe_revoked("a") is None
+
+
+def test_refresh_tokens_are_unique_and_typed():
+    tokens = TokenService(secret="test")
+    first = tokens.decode(tokens.create_refresh_token(1))
+    second = tokens.decode(tokens.create_refresh_token(1))
+    assert first["typ"] == "refresh" and first["jti"] != second["jti"]
+    assert tokens.decode(tokens.create_access_token(1))["typ"] == "access"
+
+
+def test_embedded_memberships_authorize_until_version_changes():
+    from types import SimpleNamespace
+    from app.deps import _org_from_claims
+    from app.models.models import RoleEnum
+
+    tokens = TokenService(secret="test")
+    claims = tokens.decode(
+        tokens.create_access_token(
+            7, orgs={1: "admin"}, membership_version=3
+        )
+    )
+    user = SimpleNamespace(id=7, membership_version=3)
+    current = _org_from_claims(claims, user, 1)
+    assert current is not None and current.role == RoleEnum.admin
+    # unknown org or a bumped membership version -> DB fallback
+    assert _org_from_claims(claims, user, 2) is None
+    user.membership_version = 4
+    assert _org_from_claims(claims, user, 1) is None
+
+
+def test_rate_limiter_refills_over_time():
+    from app.core.rate_limit import RateLimiter
+
+    now = [0.0]
+    limiter = RateLimiter(per_minute=60, burst=2, clock=lambda: now[0])
+    assert limiter.hit("a") == 0 and limiter.hit("a") == 0
+    assert limiter.hit("a") == 1.0
+    assert limiter.hit("b") == 0  # keys are independent
+    now[0] = 1.0
+    assert limiter.hit("a") == 0
+
+
+def test_permissions_evaluate_without_queries():
+    from types import SimpleNamespace
+    from app.deps import CurrentOrg
+    from app.models.models import RoleEnum
+    from app.services.permission_service import Permissions
+
+    member = Permissions(CurrentOrg(id=1, role=RoleEnum.member, user_id=5))
+    manager = Permissions(CurrentOrg(id=1, role=RoleEnum.manager, user_id=6))
+    own = SimpleNamespace(organization_id=1, owner_id=5)
+    other = SimpleNamespace(organization_id=1, owner_id=6)
+    foreign = SimpleNamespace(organization_id=2, owner_id=5)
+
+    assert member.can_modify(own) and not member.can_modify(other)
+    assert manager.can_modify(other) and not manager.can_modify(foreign)
+    assert manager.is_manager and not manager.is_admin
+    assert not member.at_least("manager")
+
+
+def test_member_scope_filters_in_sql():
+    from app.deps import CurrentOrg
+    from app.models.models import RoleEnum
+    from app.repositories.activity_repo import ActivityRepository
+    from app.repositories.deal_repo import DealRepository
+    from app.services.permission_service import Permissions
+
+    member = Permissions(CurrentOrg(id=1, role=RoleEnum.member, user_id=5))
+    manager = Permissions(CurrentOrg(id=1, role=RoleEnum.manager, user_id=6))
+
+    deals = str(DealRepository(None, member.scope).select())  # type: ignore
+    assert "deals.owner_id = " in deals
+    assert "deals.organization_id = " in deals
+    deals = str(DealRepository(None, manager.scope).select())  # type: ignore
+    assert "owner_id" not in deals.split("WHERE")[1]
+    activities = str(ActivityRepository(None, member.scope).select())  # type: ignore
+    assert "activities.deal_id IN (SELECT deals.id" in activities
+
+
+async def _register(client, email):
+    r = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": email,
+            "password": "Pass12345",
+            "name": "Owner",
+            "organization_name": "Tokens",
+        },
+    )
+    assert r.status_code == 200
+    return r.json()
+
+
+async def test_refresh_rotates_and_rejects_reuse(client):
+    from app.core.revocation import revocation_cache
+
+    first = (await _register(client, "refresh@example.com"))["refresh_token"]
+    r = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": first}
+    )
+    assert r.status_code == 200
+    second = r.json()["refresh_token"]
+    assert second != first and r.json()["access_token"]
+    # cached only after the revocation committed
+    jti = TokenService().decode(first)["jti"]
+    assert revocation_cache.maybe_revoked(jti) is True
+
+    r = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": first}
+    )
+    assert r.status_code == 401
+    r = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": second}
+    )
+    assert r.status_code == 200
+
+
+async def test_refresh_rejects_access_tokens(client):
+    access = (await _register(client, "typ@example.com"))["access_token"]
+    r = await client.post(
+        "/api/v1/auth/refresh", json={"refresh_token": access}
+    )
+    assert r.status_code == 401
+
+
+async def test_purger_drops_only_expired_revocations(session_factory):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select
+    from app.models.models import RevokedToken
+    from app.workers.revocations import RevocationPurger
+
+    now = datetime.now(timezone.utc)
+    async with session_factory() as session:
+        async with session.begin():
+            session.add_all(
+                [
+                    RevokedToken(jti="old-1", expires_at=now - timedelta(1)),
+                    RevokedToken(jti="old-2", expires_at=now - timedelta(2)),
+                    RevokedToken(jti="live", expires_at=now + timedelta(1)),
+                ]
+            )
+    purger = RevocationPurger(session_factory, batch_size=1)
+    assert await purger.run_once() == 1
+    assert await purger.run_once() == 1
+    assert await purger.run_once() == 0
+    async with session_factory() as session:
+        q = await session.execute(select(RevokedToken.jti))
+        assert q.scalars().all() == ["live"]
+    assert purger.stats() == {"purged": 2}
+
+
+async def test_rate_limit_purger_keeps_the_current_window(session_factory):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select
+    from app.models.models import RateLimitCounter
+    from app.workers.rate_limits import RateLimitPurger
+
+    now = datetime.now(timezone.utc)
+    ages = {"old-1": 120, "old-2": 600, "now": 0}
+    async with session_factory() as session:
+        async with session.begin():
+            session.add_all(
+                [
+                    RateLimitCounter(
+                        key=key, window_start=now - timedelta(seconds=age)
+                    )
+                    for key, age in ages.items()
+                ]
+            )
+    purger = RateLimitPurger(session_factory, window=60, batch_size=1)
+    assert await purger.run_once() == 1
+    assert await purger.run_once() == 1
+    assert await purger.run_once() == 0
+    async with session_factory() as session:
+        q = await session.execute(select(RateLimitCounter.key))
+        assert q.scalars().all() == ["now"]
+    assert purger.stats() == {"purged": 2}
+
+
+async def test_shared_login_counter_survives_failed_logins(
+    client, session, monkeypatch
+):
+    from sqlalchemy import select
+    from app.core.config import settings
+    from app.models.models import RateLimitCounter
+
+    monkeypatch.setattr(settings, "LOGIN_RATE_SHARED", True)
+    await _register(client, "counted@example.com")
+    for _ in range(2):
+        r = await client.post(
+            "/api/v1/auth/login",
+            data={"username": "counted@example.com", "password": "wrong"},
+        )
+        assert r.status_code == 401
+    # committed by the rate limit's own unit of work, not rolled back
+    # with the failed login
+    q = await session.execute(
+        select(RateLimitCounter.count).filter_by(
+            key="login:email:counted@example.com"
+        )
+    )
+    assert q.scalar_one() == 2
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import event, select
+from app.models.models import Contact, Organization, User
+from app.repositories.contact_repo import ContactRepository
+from app.uow import UnitOfWork
+
+
+@pytest.fixture
+async def owner(session):
+    org = Organization(name="Uow")
+    user = User(email="uow@example.com", hashed_password="x")
+    session.add_all([org, user])
+    await session.commit()
+    return org, user
+
+
+def _contact(owner, name: str) -> Contact:
+    org, user = owner
+    return Contact(organization_id=org.id, owner_id=user.id, name=name)
+
+
+async def test_writes_are_flushed_together_on_commit(
+    session, owner, statements
+):
+    repo = ContactRepository(session)
+    uow = UnitOfWork(session)
+    flushes = []
+    event.listen(
+        session.sync_session, "after_flush", lambda *_: flushes.append(1)
+    )
+    statements.clear()
+    async with uow.begin():
+        first = await repo.create(_contact(owner, "first"))
+        second = await repo.create(_contact(owner, "second"))
+        # nothing sent yet: the writes wait for the unit of work
+        assert statements == [] and first.id is None
+    assert len(flushes) == 1
+    assert first.id and second.id
+
+
+async def test_savepoint_rolls_back_only_the_failed_step(session, owner):
+    uow = UnitOfWork(session)
+    repo = ContactRepository(session)
+    async with uow.begin():
+        for name in ("kept", "broken", "also kept"):
+            try:
+                async with uow.savepoint():
+                    await repo.create(_contact(owner, name))
+                    await uow.flush()
+                    if name == "broken":
+                        raise ValueError(name)
+            except ValueError:
+                pass
+    q = await session.execute(
+        select(Contact.name)
+        .filter_by(organization_id=owner[0].id)
+        .order_by(Contact.id)
+    )
+    assert q.scalars().all() == ["kept", "also kept"]